@@ -0,0 +1,86 @@
+"""
+Benchmark for Transcript.history. Run from the repository root with
+
+    python -m benchmarks.transcript_history
+
+Reads a fake channel whose history() takes LATENCY seconds for every page of 100 messages, like a
+REST request would, once front to back and then with several slices fetched in parallel. Both
+have to produce the same messages in the same order.
+"""
+
+import asyncio
+import bisect
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from blimp.transcript import Transcript
+
+LATENCY = 0.05
+
+
+class FakeChannel:
+    "A channel with `count` messages spread unevenly over a year."
+
+    def __init__(self, count):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.id = discord.utils.time_snowflake(start)
+        self.requests = 0
+
+        # bursts of activity separated by quiet weeks, as in a real channel
+        rng = random.Random(0)
+        ids = set()
+        while len(ids) < count:
+            burst = start + timedelta(days=rng.uniform(0, 365))
+            for _ in range(rng.randint(10, 500)):
+                burst += timedelta(seconds=rng.uniform(1, 120))
+                ids.add(discord.utils.time_snowflake(burst) + rng.randint(0, 4095))
+        self.messages = sorted(ids)[:count]
+
+    async def history(self, limit=100, after=None, before=None, oldest_first=None):
+        "Yield message ids in (after, before), taking LATENCY per page like the real thing."
+        assert oldest_first
+        low = bisect.bisect_right(self.messages, after.id) if after else 0
+        high = bisect.bisect_left(self.messages, before.id) if before else None
+        selected = self.messages[low:high][:limit]
+
+        for offset in range(0, max(len(selected), 1), 100):
+            self.requests += 1
+            await asyncio.sleep(LATENCY)
+            for message_id in selected[offset : offset + 100]:
+                yield discord.Object(message_id)
+
+
+async def run(channel, concurrency, pages_per_second=None):
+    "Read the whole channel and print how long it took."
+    channel.requests = 0
+    start = time.perf_counter()
+    ids = [
+        message.id
+        async for message in Transcript.history(
+            channel, concurrency=concurrency, pages_per_second=pages_per_second
+        )
+    ]
+    seconds = time.perf_counter() - start
+
+    assert ids == channel.messages, "messages missing or out of order"
+    print(
+        f"concurrency {concurrency:2}, {pages_per_second or 'unlimited'} pages/s: "
+        f"{seconds:6.2f}s, {channel.requests} requests, "
+        f"{len(ids) / seconds:,.0f} msg/s"
+    )
+
+
+async def main():
+    "Compare sequential and parallel reads of the same channel."
+    channel = FakeChannel(20000)
+    await run(channel, 1)
+    for concurrency in (2, 4, 8):
+        await run(channel, concurrency)
+    await run(channel, 8, pages_per_second=50)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark for Transcript.fancify_content. Run from the repository root with
+
+    python -m benchmarks.transcript_markdown
+
+Compares the single-pass renderer against the previous chain of re.sub() calls over a corpus of
+typical Discord messages, and over messages that are nothing but markers or characters that could
+start one. The latter are the worst case for the single-pass renderer: the regex engine still skips
+from one token to the next, but every actual marker is a step in Python, while the old renderer
+never leaves C for text its six patterns don't match. So besides the ratio, this prints how long
+the slowest of them takes at Discord's maximum message length.
+"""
+
+import html
+import re
+import timeit
+
+from blimp.transcript import Transcript
+
+
+def legacy_fancify_content(content):
+    "The renderer Transcript.fancify_content replaced, kept for comparison."
+    content = html.escape(content)
+
+    def emojify(match):
+        return (
+            f"<img src='https://cdn.discordapp.com/emojis/{match[3]}"
+            + (".gif" if match[1] == "a" else ".png")
+            + f"' class='emoji' title='{match[2]}'>"
+        )
+
+    content = re.sub(r"&lt;(a?):(\w+):(\d+)&gt;", emojify, content)
+
+    content = re.sub(r"```(.+)```", r"<pre>\1</pre>", content, flags=re.DOTALL)
+    content = content.replace("\n", "<br>")
+    content = re.sub(r"\*\*([^\*]+)\*\*", r"<b>\1</b>", content)
+    content = re.sub(r"\*([^\*]+)\*", r"<i>\1</i>", content)
+    content = re.sub(r"~~([^~]+)~~", r"<del>\1</del>", content)
+    content = re.sub(r"`([^`]+)`", r"<code>\1</code>", content)
+    return content
+
+
+CORPUS = [
+    "hi",
+    "lol",
+    "good morning everyone!",
+    "has anyone seen the new episode yet? no spoilers please",
+    "||he dies at the end|| sorry",
+    "I **really** think we should move the meeting to *thursday* instead",
+    "ok so `pip install -e .` and then run `python -m blimp`",
+    "```py\nfor i in range(10):\n    print(i * 2)\n```\nthis prints the even numbers",
+    "> did you finish the assignment?\nnot yet, doing it tonight",
+    "<:pepehands:123456789012345678> <a:partyblob:234567890123456789>",
+    "check this out https://example.com/some/long/path?query=1&other=2 it's great",
+    "[the docs](https://discordpy.readthedocs.io/en/latest/) explain it pretty well",
+    "~~never mind~~ found it, my_variable_name was misspelled",
+    "__important__: the server will be down for maintenance at 3pm UTC",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt "
+    "ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation "
+    "ullamco laboris nisi ut aliquip ex ea commodo consequat.\n" * 4,
+    ">>> long quote\nspanning\nseveral lines with *emphasis*",
+]
+
+MARKER_HEAVY = [
+    "**" + "a" * 2000,
+    "*" * 2000,
+    "~~ " * 1000,
+    "_" * 2000,
+    "snake_" * 333,
+    "[a" * 1000,
+    "<" * 2000,
+]
+
+MAX_LENGTH = 4000
+
+
+def run(name, corpus, number):
+    "Time both renderers over a corpus and print messages per second."
+    results = {}
+    for label, function in (
+        ("legacy", legacy_fancify_content),
+        ("single-pass", Transcript.fancify_content),
+    ):
+        seconds = timeit.timeit(
+            lambda function=function: [function(message) for message in corpus],
+            number=number,
+        )
+        results[label] = len(corpus) * number / seconds
+
+    print(
+        f"{name}: legacy {results['legacy']:,.0f} msg/s, "
+        f"single-pass {results['single-pass']:,.0f} msg/s, "
+        f"{results['single-pass'] / results['legacy']:.2f}x"
+    )
+
+
+def worst_case(corpus, number):
+    "Print the slowest time of the single-pass renderer on a message of MAX_LENGTH characters."
+    seconds, message = max(
+        (
+            timeit.timeit(
+                lambda long=long: Transcript.fancify_content(long), number=number
+            )
+            / number,
+            long,
+        )
+        for long in ((message * MAX_LENGTH)[:MAX_LENGTH] for message in corpus)
+    )
+    print(
+        f"slowest {MAX_LENGTH}-character message: {seconds * 1000:.2f}ms ({message[:8]!r}…)"
+    )
+
+
+if __name__ == "__main__":
+    run("typical messages", CORPUS, 2000)
+    run("marker-heavy messages", MARKER_HEAVY, 20)
+    worst_case(MARKER_HEAVY, 20)
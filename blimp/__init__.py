@@ -4,5 +4,6 @@ Python's obsession with underscores is fun.
 """
 
 from .customizations import *
+from .database import *
 from .eff_large_wordlist import *
 from .objects import *
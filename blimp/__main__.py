@@ -54,6 +54,8 @@ async def on_ready():
         cogs.Malarkey,
         cogs.Meta,
         cogs.Moderation,
+        cogs.TicketArchive,
+        cogs.TicketJournal,
         cogs.Tickets,
         cogs.Tools,
         cogs.Triggers,
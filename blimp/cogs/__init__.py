@@ -11,6 +11,8 @@ from .moderation import Moderation
 from .reminders import Reminders
 from .sig import SIG
 from .slowmode import Slowmode
+from .ticketarchive import TicketArchive
+from .ticketjournal import TicketJournal
 from .tickets import Tickets
 from .tools import Tools
 from .triggers import Triggers
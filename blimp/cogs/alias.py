@@ -49,30 +49,28 @@ class Alias(Blimp.Cog):
 
         self.validate_alias(alias)
 
-        ctx.database.execute("BEGIN TRANSACTION;")
-
         oid = None
-        if target.__class__ == discord.Message:
-            oid = ctx.objects.make_object(m=[target.channel.id, target.id])
-        elif target.__class__ == discord.TextChannel:
-            oid = ctx.objects.make_object(tc=target.id)
-        elif target.__class__ == discord.CategoryChannel:
-            oid = ctx.objects.make_object(cc=target.id)
-        else:
-            raise ValueError("Bad object")
-
         try:
-            ctx.database.execute(
-                "INSERT OR ROLLBACK INTO aliases(gid, alias, oid) VALUES(:gid, :alias, :oid);",
-                {"gid": ctx.guild.id, "alias": alias, "oid": oid},
-            )
+            async with ctx.db.transaction():
+                if target.__class__ == discord.Message:
+                    oid = await ctx.objects.make_object(
+                        m=[target.channel.id, target.id]
+                    )
+                elif target.__class__ == discord.TextChannel:
+                    oid = await ctx.objects.make_object(tc=target.id)
+                elif target.__class__ == discord.CategoryChannel:
+                    oid = await ctx.objects.make_object(cc=target.id)
+                else:
+                    raise ValueError("Bad object")
+
+                await ctx.db.execute(
+                    "INSERT INTO aliases(gid, alias, oid) VALUES(:gid, :alias, :oid);",
+                    {"gid": ctx.guild.id, "alias": alias, "oid": oid},
+                )
         except sqlite3.DatabaseError as ex:
-            ctx.database.execute("ABORT;")
             raise UnableToComply(f"Alias {alias} is already registered.") from ex
 
-        ctx.database.execute("COMMIT;")
-
-        link = await ctx.bot.represent_object(ctx.objects.by_oid(oid))
+        link = await ctx.bot.represent_object(await ctx.objects.by_oid(oid))
         await ctx.reply(f"*{link} is now known as {alias}.*")
 
     @commands.command(parent=alias)
@@ -86,11 +84,11 @@ class Alias(Blimp.Cog):
 
         self.validate_alias(alias)
 
-        old = ctx.objects.by_alias(ctx.guild.id, alias)
+        old = await ctx.objects.by_alias(ctx.guild.id, alias)
         if not old:
             raise UnableToComply(f"Alias {alias} doesn't exist.")
 
-        ctx.database.execute(
+        await ctx.db.execute(
             "DELETE FROM aliases WHERE gid=:gid AND alias=:alias",
             {"gid": ctx.guild.id, "alias": alias},
         )
@@ -103,12 +101,11 @@ class Alias(Blimp.Cog):
     async def _list(self, ctx: Blimp.Context):
         "List all aliases currently configured for this server."
 
-        cursor = ctx.database.execute(
+        rows = await ctx.db.fetchall(
             "SELECT * FROM aliases WHERE gid=:gid", {"gid": ctx.guild.id}
         )
         data = [
-            (alias["alias"], ctx.objects.by_alias(ctx.guild.id, alias["alias"])[1])
-            for alias in cursor.fetchall()
+            (alias["alias"], await ctx.objects.by_oid(alias["oid"])) for alias in rows
         ]
         result = "\n".join(
             [f"{d[0]}: {await ctx.bot.represent_object(d[1])}" for d in data]
@@ -120,10 +117,10 @@ class Alias(Blimp.Cog):
         await ctx.reply(result)
 
 
-def find_aliased_message_id(ctx: Blimp.Context, argument: str) -> Tuple[int, int]:
+async def find_aliased_message_id(ctx: Blimp.Context, argument: str) -> Tuple[int, int]:
     "Return a (channelid, messageid) tuple for an aliased message or raise commands.BadArgument."
 
-    row = ctx.objects.by_alias(ctx.guild.id, argument)
+    row = await ctx.objects.by_alias(ctx.guild.id, argument)
     if not row:
         raise commands.BadArgument(f"Unknown alias {argument}.")
 
@@ -144,15 +141,15 @@ class MaybeAliasedMessage(discord.Message):
         if not ctx.guild or not len(argument) > 1 or not argument[0] == "'":
             return await commands.MessageConverter().convert(ctx, argument)
 
-        channelid, messageid = find_aliased_message_id(ctx, argument)
+        channelid, messageid = await find_aliased_message_id(ctx, argument)
         return await commands.MessageConverter().convert(
             ctx, f"{channelid}-{messageid}"
         )
 
 
-def find_aliased_channel_id(ctx: Blimp.Context, argument: str) -> int:
+async def find_aliased_channel_id(ctx: Blimp.Context, argument: str) -> int:
     "Return the id for an aliased channel or raise commands.BadArgument."
-    row = ctx.objects.by_alias(ctx.guild.id, argument)
+    row = await ctx.objects.by_alias(ctx.guild.id, argument)
     if not row:
         raise commands.BadArgument(f"Unknown alias {argument}.")
 
@@ -173,13 +170,13 @@ class MaybeAliasedTextChannel(discord.TextChannel):
         if not ctx.guild or not len(argument) > 1 or not argument[0] == "'":
             return await commands.TextChannelConverter().convert(ctx, argument)
 
-        channelid = find_aliased_channel_id(ctx, argument)
+        channelid = await find_aliased_channel_id(ctx, argument)
         return await commands.TextChannelConverter().convert(ctx, str(channelid))
 
 
-def find_aliased_category_id(ctx: Blimp.Context, argument: str) -> int:
+async def find_aliased_category_id(ctx: Blimp.Context, argument: str) -> int:
     "Return the id for an aliased category or raise commands.BadArgument."
-    row = ctx.objects.by_alias(ctx.guild.id, argument)
+    row = await ctx.objects.by_alias(ctx.guild.id, argument)
     if not row:
         raise commands.BadArgument(f"Unknown alias {argument}.")
 
@@ -200,6 +197,6 @@ class MaybeAliasedCategoryChannel(discord.CategoryChannel):
         if not ctx.guild or not len(argument) > 1 or not argument[0] == "'":
             return await commands.CategoryChannelConverter().convert(ctx, argument)
 
-        catid = find_aliased_category_id(ctx, argument)
+        catid = await find_aliased_category_id(ctx, argument)
 
         return await commands.CategoryChannelConverter().convert(ctx, str(catid))
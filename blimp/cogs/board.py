@@ -15,6 +15,27 @@ from .alias import MaybeAliasedCategoryChannel, MaybeAliasedTextChannel
 class Board(Blimp.Cog):
     "Building monuments to all your sins."
 
+    async def cog_load(self):
+        guilds = await self.bot.db.fetchall(
+            """SELECT DISTINCT guild.primary_id AS guild_id FROM board_configuration
+            JOIN objects AS guild ON guild.oid = board_configuration.guild_oid""",
+            readonly=True,
+        )
+        entries = await self.bot.db.fetchall(
+            """SELECT message.secondary_id AS message_id FROM board_entries
+            JOIN objects AS message ON message.oid = board_entries.oid""",
+            readonly=True,
+        )
+        # boards care about every message in their guild, and about their own posts for deletion
+        # requests, which we tell apart by watching the latter individually
+        self.bot.reactions.register("board", on_add=self.on_raw_reaction_add)
+        for row in guilds:
+            self.bot.reactions.watch_guild("board", row["guild_id"])
+        self.bot.reactions.watch("board", *(row["message_id"] for row in entries))
+
+    async def cog_unload(self):
+        self.bot.reactions.unregister("board")
+
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def board(self, ctx: Blimp.Context):
         """A Board is a channel that gets any messages that get enough of certain reactions reposted
@@ -58,10 +79,10 @@ class Board(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM board_configuration WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(tc=channel.id)},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(tc=channel.id)},
+        )
         if old:
             data = json.loads(old["data"])
 
@@ -72,16 +93,17 @@ class Board(Blimp.Cog):
                 f"Limit to new posts: {old['post_age_limit'] is not None}",
             )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT OR REPLACE INTO board_configuration(oid, guild_oid, data, post_age_limit)
             VALUES(:oid, :guild_oid, :data, :age)""",
             {
-                "oid": ctx.objects.make_object(tc=channel.id),
-                "guild_oid": ctx.objects.make_object(g=channel.guild.id),
+                "oid": await ctx.objects.make_object(tc=channel.id),
+                "guild_oid": await ctx.objects.make_object(g=channel.guild.id),
                 "data": json.dumps([emoji, min_reacts]),
                 "age": age,
             },
         )
+        ctx.bot.reactions.watch_guild("board", channel.guild.id)
 
         logging_embed.add_field(
             name="New",
@@ -109,15 +131,21 @@ class Board(Blimp.Cog):
         if not ctx.privileged_modify(channel.guild):
             raise Unauthorized()
 
-        cursor = ctx.database.execute(
+        cursor = await ctx.db.execute(
             """DELETE FROM board_configuration WHERE oid=:oid""",
-            {"oid": ctx.objects.by_data(tc=channel.id)},
+            {"oid": await ctx.objects.by_data(tc=channel.id)},
         )
         if cursor.rowcount == 0:
             raise UnableToComply(
                 f"Can't disable Board in {channel.mention} as none exists."
             )
 
+        if not await ctx.db.fetchone(
+            "SELECT 1 FROM board_configuration WHERE guild_oid=:guild_oid",
+            {"guild_oid": await ctx.objects.by_data(g=channel.guild.id)},
+        ):
+            ctx.bot.reactions.unwatch_guild("board", channel.guild.id)
+
         await ctx.bot.post_log(
             channel.guild, f"{ctx.author} deleted board {channel.mention}."
         )
@@ -154,12 +182,14 @@ class Board(Blimp.Cog):
                 else:
                     channel_argument = {"tc": channel.id}
 
-                ctx.database.execute(
+                await ctx.db.execute(
                     """INSERT INTO board_exclusions(channel_oid, guild_oid)
                     VALUES(:channel_oid, :guild_oid)""",
                     {
-                        "channel_oid": ctx.objects.make_object(**channel_argument),
-                        "guild_oid": ctx.objects.make_object(g=channel.guild.id),
+                        "channel_oid": await ctx.objects.make_object(
+                            **channel_argument
+                        ),
+                        "guild_oid": await ctx.objects.make_object(g=channel.guild.id),
                     },
                 )
                 await ctx.bot.post_log(
@@ -195,26 +225,26 @@ class Board(Blimp.Cog):
         ]
 
         for channel in channels:
-            if not ctx.database.execute(
+            if not await ctx.db.fetchone(
                 "SELECT * FROM board_exclusions WHERE channel_oid=:channel_oid "
                 "OR channel_oid=:category_oid",
                 {
-                    "channel_oid": ctx.objects.by_data(tc=channel.id),
-                    "category_oid": ctx.objects.by_data(cc=channel.id),
+                    "channel_oid": await ctx.objects.by_data(tc=channel.id),
+                    "category_oid": await ctx.objects.by_data(cc=channel.id),
                 },
-            ).fetchone():
+            ):
                 await ctx.reply(
                     f"Can't un-exclude {channel.mention} as it wasn't excluded.",
                     color=ctx.Color.I_GUESS,
                 )
                 continue
 
-            ctx.database.execute(
+            await ctx.db.execute(
                 "DELETE FROM board_exclusions WHERE channel_oid=:channel_oid "
                 "OR channel_oid=:category_oid",
                 {
-                    "channel_oid": ctx.objects.by_data(tc=channel.id),
-                    "category_oid": ctx.objects.by_data(cc=channel.id),
+                    "channel_oid": await ctx.objects.by_data(tc=channel.id),
+                    "category_oid": await ctx.objects.by_data(cc=channel.id),
                 },
             )
             await ctx.bot.post_log(
@@ -233,10 +263,10 @@ class Board(Blimp.Cog):
         `channel` is the channel whose Board configuration to display. Can be left empty to list all
         active Boards in this server."""
 
-        def format_data(row: sqlite3.Row) -> dict:
+        async def format_data(row: sqlite3.Row) -> dict:
             "format a board_configuration row"
             data = json.loads(row["data"])
-            channel = ctx.bot.get_channel(ctx.objects.by_oid(row["oid"])["tc"])
+            channel = ctx.bot.get_channel((await ctx.objects.by_oid(row["oid"]))["tc"])
             return {
                 "name": f"Board: #{channel}\n",
                 "value": f"Emoji: {ctx.bot.get_emoji(data[0]) or data[0]}\n"
@@ -245,24 +275,26 @@ class Board(Blimp.Cog):
             }
 
         if channel:
-            board_data = ctx.database.execute(
+            board_data = await ctx.db.fetchone(
                 "SELECT * FROM board_configuration WHERE oid=:oid",
-                {"oid": ctx.objects.by_data(tc=channel.id)},
-            ).fetchone()
+                {"oid": await ctx.objects.by_data(tc=channel.id)},
+                readonly=True,
+            )
             if not board_data:
                 raise UnableToComply(f"{channel.mention} is not a Board.")
 
             await ctx.reply(
                 embed=discord.Embed(color=ctx.Color.GOOD).add_field(
-                    **format_data(board_data)
+                    **(await format_data(board_data))
                 )
             )
 
         else:
-            rows = ctx.database.execute(
+            rows = await ctx.db.fetchall(
                 "SELECT * FROM board_configuration WHERE guild_oid=:oid",
-                {"oid": ctx.objects.by_data(g=ctx.guild.id)},
-            ).fetchall()
+                {"oid": await ctx.objects.by_data(g=ctx.guild.id)},
+                readonly=True,
+            )
 
             if not rows:
                 await ctx.reply(
@@ -271,14 +303,15 @@ class Board(Blimp.Cog):
                 )
                 return
 
-            excluded = ctx.database.execute(
+            excluded = await ctx.db.fetchall(
                 "SELECT channel_oid FROM board_exclusions WHERE guild_oid=:oid",
-                {"oid": ctx.objects.by_data(g=ctx.guild.id)},
-            ).fetchall()
+                {"oid": await ctx.objects.by_data(g=ctx.guild.id)},
+                readonly=True,
+            )
             excluded_text = ""
             for exclusion in excluded:
                 channel = await ctx.bot.represent_object(
-                    ctx.objects.by_oid(exclusion["channel_oid"])
+                    await ctx.objects.by_oid(exclusion["channel_oid"])
                 )
                 excluded_text += channel + "\n"
 
@@ -288,7 +321,7 @@ class Board(Blimp.Cog):
                 value=excluded_text or "No channels are excluded.",
             )
             for row in rows:
-                embed.add_field(**format_data(row))
+                embed.add_field(**(await format_data(row)))
 
             await ctx.reply(embed=embed)
 
@@ -343,39 +376,40 @@ class Board(Blimp.Cog):
     ):
         "Delete a Board message on request of the original author"
 
-        original_obj = self.bot.objects.by_oid(board_entry["original_oid"])["m"]
+        original_obj = (await self.bot.objects.by_oid(board_entry["original_oid"]))["m"]
         original_msg = await self.bot.get_channel(original_obj[0]).fetch_message(
             original_obj[1]
         )
         if original_msg.author.id == payload.user_id:
-            board_obj = self.bot.objects.by_oid(board_entry["oid"])["m"]
+            board_obj = (await self.bot.objects.by_oid(board_entry["oid"]))["m"]
             await (
                 await self.bot.get_channel(board_obj[0]).fetch_message(board_obj[1])
             ).delete()
 
-    @Blimp.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        "Listen for reactions and repost/update if appropriate."
+        "Handle reactions in guilds with boards and repost/update if appropriate."
 
         # if the message we're looking at was posted by blimp for a board,
         # check if it's a deletion request
-        if board_entry := self.bot.database.execute(
-            "SELECT * FROM board_entries WHERE oid=:oid",
-            {
-                "oid": self.bot.objects.by_data(
-                    m=[payload.channel_id, payload.message_id]
+        if self.bot.reactions.watching("board", payload.message_id):
+            if payload.emoji.name == "❌" and (
+                board_entry := await self.bot.db.fetchone(
+                    "SELECT * FROM board_entries WHERE oid=:oid",
+                    {
+                        "oid": await self.bot.objects.by_data(
+                            m=[payload.channel_id, payload.message_id]
+                        )
+                    },
                 )
-            },
-        ).fetchall():
-            if payload.emoji.name == "❌":
-                await self.process_delete_request(board_entry[0], payload)
+            ):
+                await self.process_delete_request(board_entry, payload)
             return
 
         # fetch all boards configured for the message's guild
-        board_configurations = self.bot.database.execute(
+        board_configurations = await self.bot.db.fetchall(
             "SELECT * FROM board_configuration WHERE guild_oid=:guild_oid",
-            {"guild_oid": self.bot.objects.by_data(g=payload.guild_id)},
-        ).fetchall()
+            {"guild_oid": await self.bot.objects.by_data(g=payload.guild_id)},
+        )
         if not board_configurations:
             return
 
@@ -384,29 +418,22 @@ class Board(Blimp.Cog):
         )
 
         # return early if message's channel or category is excluded
-        if self.bot.database.execute(
+        if await self.bot.db.fetchone(
             "SELECT * FROM board_exclusions WHERE channel_oid=:channel_oid",
-            {"channel_oid": self.bot.objects.make_object(tc=payload.channel_id)},
-        ).fetchone() or (
+            {"channel_oid": await self.bot.objects.make_object(tc=payload.channel_id)},
+        ) or (
             message.channel.category
-            and self.bot.database.execute(
+            and await self.bot.db.fetchone(
                 "SELECT * FROM board_exclusions WHERE channel_oid=:channel_oid",
                 {
-                    "channel_oid": self.bot.objects.make_object(
+                    "channel_oid": await self.bot.objects.make_object(
                         cc=message.channel.category.id
                     )
                 },
-            ).fetchone()
+            )
         ):
             return
 
-        # return early if the message we're looking at was posted by blimp for a board
-        if self.bot.database.execute(
-            "SELECT * FROM board_entries WHERE oid=:oid",
-            {"oid": self.bot.objects.by_data(m=[message.channel.id, message.id])},
-        ).fetchall():
-            return
-
         for board in board_configurations:
             post_age_limit = board["post_age_limit"] and datetime.fromisoformat(
                 board["post_age_limit"]
@@ -441,34 +468,37 @@ class Board(Blimp.Cog):
             embed = self.format_message(message, actual_reactions)
 
             async with self.BOARD_LOCK:
-                if existing_board := self.bot.database.execute(
+                if existing_board := await self.bot.db.fetchone(
                     "SELECT * FROM board_entries WHERE original_oid=:original_oid",
                     {
-                        "original_oid": self.bot.objects.by_data(
+                        "original_oid": await self.bot.objects.by_data(
                             m=[message.channel.id, message.id]
                         )
                     },
-                ).fetchone():
-                    existing_board = self.bot.objects.by_oid(existing_board["oid"])["m"]
+                ):
+                    existing_board = (
+                        await self.bot.objects.by_oid(existing_board["oid"])
+                    )["m"]
                     board_msg = self.bot.get_channel(
                         existing_board[0]
                     ).get_partial_message(existing_board[1])
                     await board_msg.edit(embed=embed)
                 else:
                     board_channel = self.bot.get_channel(
-                        self.bot.objects.by_oid(board["oid"])["tc"]
+                        (await self.bot.objects.by_oid(board["oid"]))["tc"]
                     )
 
                     board_msg = await board_channel.send("", embed=embed)
 
-                    self.bot.database.execute(
+                    await self.bot.db.execute(
                         "INSERT INTO board_entries(oid, original_oid) VALUES(:oid, :original_oid)",
                         {
-                            "oid": self.bot.objects.make_object(
+                            "oid": await self.bot.objects.make_object(
                                 m=[board_msg.channel.id, board_msg.id]
                             ),
-                            "original_oid": self.bot.objects.make_object(
+                            "original_oid": await self.bot.objects.make_object(
                                 m=[message.channel.id, message.id]
                             ),
                         },
                     )
+                    self.bot.reactions.watch("board", board_msg.id)
@@ -30,35 +30,36 @@ class Coops(Blimp.Cog):
                     name=f"{row['name']}: {row['description']}"[0:100],
                     value=row["name"],
                 )
-                for row in self.bot.database.execute(
+                for row in await self.bot.db.fetchall(
                     "SELECT * FROM coop_descriptions WHERE server_id = :sid",
                     {"sid": ia.guild.id},
-                ).fetchall()
+                    readonly=True,
+                )
                 if not current or (current in row["name"] + row["description"])
             ],
             key=lambda choice: choice.value,
         )[0:25]
 
-    def find_coop(self, server_id: int, name: str):
-        if row := self.bot.database.execute(
+    async def find_coop(self, server_id: int, name: str):
+        if row := await self.bot.db.fetchone(
             "SELECT * FROM coop_descriptions WHERE server_id = :sid AND name = :name",
             {"sid": server_id, "name": name},
-        ).fetchone():
+        ):
             return row
         else:
             return None
 
-    def find_coop_rep_ids(self, thread_id: int):
-        rows = self.bot.database.execute(
+    async def find_coop_rep_ids(self, thread_id: int):
+        rows = await self.bot.db.fetchall(
             "SELECT * FROM coop_reps WHERE thread_id=:tid", {"tid": thread_id}
-        ).fetchall()
+        )
         return [row["user_id"] for row in rows]
 
-    def is_user_banned(self, user_id: int, thread_id: int):
-        if row := self.bot.database.execute(
+    async def is_user_banned(self, user_id: int, thread_id: int):
+        if row := await self.bot.db.fetchone(
             "SELECT * FROM coop_bans WHERE user_id = :uid AND thread_id = :tid",
             {"uid": user_id, "tid": thread_id},
-        ).fetchone():
+        ):
             return row
         return False
 
@@ -106,12 +107,12 @@ class Coops(Blimp.Cog):
         "view and search all the coops on this server"
         pages = [[]]
         page_i = 0
-        coops = self.bot.database.execute(
+        coops = await self.bot.db.fetchall(
             "SELECT name, coop_descriptions.thread_id, description, group_concat(user_id) AS reps "
             "FROM coop_descriptions LEFT JOIN coop_reps USING (thread_id) WHERE server_id = :sid "
             "GROUP BY thread_id;",
             {"sid": ia.guild.id},
-        ).fetchall()
+        )
         coops = sorted(coops, key=lambda row: row["name"])
         if search:
             coops = [
@@ -152,8 +153,8 @@ class Coops(Blimp.Cog):
     @discord.app_commands.autocomplete(coop=autocomplete_coops)
     async def subscribe(self, ia: discord.Interaction, coop: str):
         "subscribe to a coop to receive pings about events and news"
-        if coop := self.find_coop(ia.guild.id, coop):
-            self.bot.database.execute(
+        if coop := await self.find_coop(ia.guild.id, coop):
+            await self.bot.db.execute(
                 "INSERT INTO coop_subscribers VALUES(:uid, :tid)",
                 {"uid": ia.user.id, "tid": coop["thread_id"]},
             )
@@ -168,8 +169,8 @@ class Coops(Blimp.Cog):
     @discord.app_commands.autocomplete(coop=autocomplete_coops)
     async def unsubscribe(self, ia: discord.Interaction, coop: str):
         "unsubscribe to a coop to no longer receive pings"
-        if coop := self.find_coop(ia.guild.id, coop):
-            self.bot.database.execute(
+        if coop := await self.find_coop(ia.guild.id, coop):
+            await self.bot.db.execute(
                 "DELETE FROM coop_subscribers WHERE user_id = :uid AND thread_id =  :tid",
                 {"uid": ia.user.id, "tid": coop["thread_id"]},
             )
@@ -189,7 +190,7 @@ class Coops(Blimp.Cog):
         description: str,
     ):
         "create a new coop"
-        if self.find_coop(ia.guild.id, name):
+        if await self.find_coop(ia.guild.id, name):
             await ia.response.send_message(
                 f"A coop called {name} already exists on this server. Please choose a different name.",
                 ephemeral=True,
@@ -204,7 +205,7 @@ class Coops(Blimp.Cog):
         coop_thread, coop_message = await parent_channel.create_thread(
             name=name, content=description
         )
-        self.bot.database.execute(
+        await self.bot.db.execute(
             "INSERT INTO coop_descriptions VALUES(:thread_id, :server_id, :name, :description)",
             {
                 "thread_id": coop_thread.id,
@@ -229,26 +230,26 @@ class Coops(Blimp.Cog):
         self, ia: discord.Interaction, coop: str, user_to_appoint: discord.Member
     ):
         "appoint a new member to be coop rep"
-        if coop := self.find_coop(ia.guild.id, coop):
+        if coop := await self.find_coop(ia.guild.id, coop):
             coop_channel = self.bot.get_channel(coop["thread_id"])
-            if user_to_appoint.id in self.find_coop_rep_ids(coop["thread_id"]):
+            if user_to_appoint.id in await self.find_coop_rep_ids(coop["thread_id"]):
                 await ia.response.send_message(
                     f"{user_to_appoint.mention} is already a rep of {coop_channel.mention}, "
                     "so you can't appoint them to that position.",
                     ephemeral=True,
                 )
                 return
-            self.bot.database.execute(
+            await self.bot.db.execute(
                 "INSERT INTO coop_reps VALUES(:uid, :tid)",
                 {"uid": user_to_appoint.id, "tid": coop["thread_id"]},
             )
-            coop_desc = self.bot.database.execute(
+            coop_desc = await self.bot.db.fetchone(
                 "SELECT * FROM coop_descriptions WHERE thread_id = :tid",
                 {"tid": coop["thread_id"]},
-            ).fetchone()
+            )
             coop_reps = [
                 ia.guild.get_member(rep_id)
-                for rep_id in self.find_coop_rep_ids(coop["thread_id"])
+                for rep_id in await self.find_coop_rep_ids(coop["thread_id"])
                 if ia.guild.get_member(rep_id)
             ]
             coop_message = [
@@ -286,12 +287,12 @@ class Coops(Blimp.Cog):
                 ephemeral=True,
             )
             return
-        if coop := self.find_coop(ia.guild.id, coop):
+        if coop := await self.find_coop(ia.guild.id, coop):
             if user_to_dismiss:
                 user_id_to_dismiss = user_to_dismiss.id
             coop_channel = self.bot.get_channel(coop["thread_id"])
             if ia.guild.get_member(user_id_to_dismiss) and not (
-                user_id_to_dismiss in self.find_coop_rep_ids(coop["thread_id"])
+                user_id_to_dismiss in await self.find_coop_rep_ids(coop["thread_id"])
             ):
                 await ia.response.send_message(
                     f"<@{user_id_to_dismiss}> is not a rep of {coop_channel.mention}, "
@@ -300,17 +301,17 @@ class Coops(Blimp.Cog):
                 )
                 return
 
-            self.bot.database.execute(
+            await self.bot.db.execute(
                 "DELETE FROM coop_reps WHERE user_id=:uid AND thread_id=:tid",
                 {"uid": user_id_to_dismiss, "tid": coop["thread_id"]},
             )
-            coop_desc = self.bot.database.execute(
+            coop_desc = await self.bot.db.fetchone(
                 "SELECT * FROM coop_descriptions WHERE thread_id = :tid",
                 {"tid": coop["thread_id"]},
-            ).fetchone()
+            )
             coop_reps = [
                 ia.guild.get_member(rep_id)
-                for rep_id in self.find_coop_rep_ids(coop["thread_id"])
+                for rep_id in await self.find_coop_rep_ids(coop["thread_id"])
                 if ia.guild.get_member(rep_id)
             ]
             coop_message = [
@@ -343,9 +344,9 @@ class Coops(Blimp.Cog):
         duration: Optional[str],
     ):
         "channel-ban a member from a coop you manage, either indefinitely or for a set duration"
-        if (coop := self.find_coop(ia.guild.id, coop)) and (
+        if (coop := await self.find_coop(ia.guild.id, coop)) and (
             ia.user.guild_permissions.manage_channels
-            or ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            or ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
             expires = None
@@ -353,7 +354,7 @@ class Coops(Blimp.Cog):
                 expires = datetime.now(tz=timezone.utc) + (
                     await ParseableTimedelta.convert(None, duration)
                 )
-            if self.is_user_banned(user_to_coopban.id, coop["thread_id"]):
+            if await self.is_user_banned(user_to_coopban.id, coop["thread_id"]):
                 await ia.response.send_message(
                     f"{user_to_coopban.mention} is already banned from {coop['name']}.",
                     ephemeral=True,
@@ -361,7 +362,7 @@ class Coops(Blimp.Cog):
                 return
 
             await ia.response.defer()
-            self.bot.database.execute(
+            await self.bot.db.execute(
                 "INSERT INTO coop_bans VALUES(:uid, :tid, :rep_id, :reason, :expires);",
                 {
                     "uid": user_to_coopban.id,
@@ -404,12 +405,12 @@ class Coops(Blimp.Cog):
         self, ia: discord.Interaction, coop: str, user_to_coopunban: discord.Member
     ):
         "un-channel-ban a member from a coop you manage"
-        if (coop := self.find_coop(ia.guild.id, coop)) and (
+        if (coop := await self.find_coop(ia.guild.id, coop)) and (
             ia.user.guild_permissions.manage_channels
-            or ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            or ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
-            if not self.is_user_banned(user_to_coopunban.id, coop["thread_id"]):
+            if not await self.is_user_banned(user_to_coopunban.id, coop["thread_id"]):
                 await ia.response.send_message(
                     f"{user_to_coopunban.mention} isn't banned from {coop['name']}.",
                     ephemeral=True,
@@ -417,7 +418,7 @@ class Coops(Blimp.Cog):
                 return
 
             await ia.response.defer()
-            self.bot.database.execute(
+            await self.bot.db.execute(
                 "DELETE FROM coop_bans WHERE user_id = :uid AND thread_id = :tid",
                 {
                     "uid": user_to_coopunban.id,
@@ -445,7 +446,7 @@ class Coops(Blimp.Cog):
         if not msg.guild or not msg.guild.id in [g.id for g in self.guilds]:
             return
         if (
-            ban := self.is_user_banned(msg.author.id, msg.channel.id)
+            ban := await self.is_user_banned(msg.author.id, msg.channel.id)
         ) and not msg.author.guild_permissions.manage_messages:
             await msg.delete()
             expires_text = "\nYour ban doesn't have an expiration date."
@@ -467,7 +468,7 @@ class Coops(Blimp.Cog):
         if not payload.guild_id in [g.id for g in self.guilds]:
             return
         if (
-            ban := self.is_user_banned(payload.user_id, payload.channel_id)
+            ban := await self.is_user_banned(payload.user_id, payload.channel_id)
         ) and not payload.member.guild_permissions.manage_messages:
             channel = self.bot.get_channel(payload.channel_id)
             msg = channel.get_partial_message(payload.message_id)
@@ -477,11 +478,11 @@ class Coops(Blimp.Cog):
     async def unban_users(self):
         "regularly unban users whose coop bans have expired"
         now = datetime.now(tz=timezone.utc)
-        bans = self.bot.database.execute(
+        bans = await self.bot.db.fetchall(
             "SELECT * FROM coop_bans WHERE expires < :now",
             {"now": now},
-        ).fetchall()
-        self.bot.database.execute(
+        )
+        await self.bot.db.execute(
             "DELETE FROM coop_bans WHERE expires < :now",
             {"now": now},
         )
@@ -498,15 +499,15 @@ class Coops(Blimp.Cog):
     @discord.app_commands.autocomplete(coop=autocomplete_coops)
     async def listbans(self, ia: discord.Interaction, coop: str):
         "list the channel-banned members for a coop you manage"
-        if (coop := self.find_coop(ia.guild.id, coop)) and (
+        if (coop := await self.find_coop(ia.guild.id, coop)) and (
             ia.user.guild_permissions.manage_channels
-            or ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            or ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
-            bans = self.bot.database.execute(
+            bans = await self.bot.db.fetchall(
                 "SELECT * FROM coop_bans WHERE thread_id = :tid",
                 {"tid": coop["thread_id"]},
-            ).fetchall()
+            )
 
             def format_ban(row):
                 expires = None
@@ -539,16 +540,16 @@ class Coops(Blimp.Cog):
     @discord.app_commands.autocomplete(coop=autocomplete_coops)
     async def ping(self, ia: discord.Interaction, coop: str):
         "send a ping to all subscribed members of a coop you manage"
-        if (coop := self.find_coop(ia.guild.id, coop)) and (
+        if (coop := await self.find_coop(ia.guild.id, coop)) and (
             ia.user.guild_permissions.manage_channels
-            or ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            or ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
             await ia.response.defer(ephemeral=True)
             subscribers = sorted(
                 [
                     ia.guild.get_member(row["user_id"])
-                    for row in self.bot.database.execute(
+                    for row in await self.bot.db.fetchall(
                         "SELECT * FROM coop_subscribers WHERE thread_id = :tid",
                         {"tid": coop["thread_id"]},
                     )
@@ -588,9 +589,9 @@ class Coops(Blimp.Cog):
         new_description: Optional[str],
     ):
         "edit the name and description of a coop you manage"
-        if (coop := self.find_coop(ia.guild.id, coop)) and (
+        if (coop := await self.find_coop(ia.guild.id, coop)) and (
             ia.user.guild_permissions.manage_channels
-            or ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            or ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
             if not new_name and not new_description:
@@ -625,7 +626,7 @@ class Coops(Blimp.Cog):
                 return
 
             await ia.response.defer(ephemeral=True)
-            self.bot.database.execute(
+            await self.bot.db.execute(
                 "UPDATE coop_descriptions SET name = :name, description = :desc WHERE thread_id =:tid",
                 {
                     "name": new_name or coop["name"],
@@ -642,7 +643,7 @@ class Coops(Blimp.Cog):
                 ][0]
                 coop_reps = [
                     ia.guild.get_member(rep_id)
-                    for rep_id in self.find_coop_rep_ids(coop["thread_id"])
+                    for rep_id in await self.find_coop_rep_ids(coop["thread_id"])
                     if ia.guild.get_member(rep_id)
                 ]
                 await coop_message.edit(
@@ -694,12 +695,12 @@ class Coops(Blimp.Cog):
     async def delete(self, ia: discord.Interaction, message: discord.Message):
         "delete a message in a coop you manage"
         if (
-            coop := self.bot.database.execute(
+            coop := await self.bot.db.fetchone(
                 "SELECT * FROM coop_descriptions WHERE thread_id = :tid",
                 {"tid": message.channel.id},
-            ).fetchone()
+            )
         ) and (
-            ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
             await ia.response.send_message(
@@ -717,12 +718,12 @@ class Coops(Blimp.Cog):
     async def pin(self, ia: discord.Interaction, message: discord.Message):
         "pin/unpin a message in a coop you manage"
         if (
-            coop := self.bot.database.execute(
+            coop := await self.bot.db.fetchone(
                 "SELECT * FROM coop_descriptions WHERE thread_id = :tid",
                 {"tid": message.channel.id},
-            ).fetchone()
+            )
         ) and (
-            ia.user.id in self.find_coop_rep_ids(coop["thread_id"])
+            ia.user.id in await self.find_coop_rep_ids(coop["thread_id"])
             or coop["name"].startswith("anarchy")
         ):
             await ia.response.defer(ephemeral=True)
@@ -1,6 +1,10 @@
+import asyncio
+import functools
 import json
+import logging
 import re
-from typing import List, Tuple, Union
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import discord
 from discord.ext import commands
@@ -9,14 +13,271 @@ from ..customizations import Blimp, PleaseRestate, UnableToComply, Unauthorized
 from .alias import MaybeAliasedMessage
 
 
+def check_roles(ctx: Blimp.Context, roles: List[discord.Role]):
+    "Make sure both the invoking user and BLIMP may hand out all of these roles."
+
+    user_failed_roles = []
+    bot_failed_roles = []
+    for role in roles:
+        if not ctx.privileged_modify(role):
+            user_failed_roles.append(role)
+        if not ctx.me.top_role > role:
+            bot_failed_roles.append(role)
+
+    if user_failed_roles:
+        raise Unauthorized(
+            "You can't modify the following roles: "
+            + " ".join([r.mention for r in user_failed_roles])
+            + "\nYour highest role needs to be above all of them.",
+        )
+
+    if bot_failed_roles:
+        raise UnableToComply(
+            "BLIMP can't modify the following roles: "
+            + " ".join([r.mention for r in bot_failed_roles])
+            + "\nThe bot's highest role needs to be above all of them.",
+        )
+
+
+class RoleEditor:
+    """
+    Applies role changes to members. Changes queued with queue() are held back for `debounce`
+    seconds and then applied in one edit per member, so clicking through a kiosk doesn't cost a
+    request per reaction. Edits of the same member go out one after the other, and at most
+    `concurrency` edits are in flight at once.
+    """
+
+    def __init__(self, bot, log: logging.Logger, debounce: float, concurrency: int):
+        self.bot = bot
+        self.log = log
+        self.debounce = debounce
+        self.slots = asyncio.Semaphore(concurrency)
+
+        # (guild ID, member ID) to role IDs and whether they're added, the kiosks involved, and
+        # the task that will apply them
+        self.pending: Dict[
+            Tuple[int, int], Tuple[Dict[int, bool], Set[int], asyncio.Task]
+        ] = {}
+        # (guild ID, member ID) to the latest edit of their roles, which the next one waits for
+        self.member_edits: Dict[Tuple[int, int], asyncio.Task] = {}
+
+        # role changes queued or made through menus, and member edits that went out for them
+        self.stats = Counter(changes=0, edits=0)
+
+    async def close(self):
+        "Wait for the pending role changes to go out instead of dropping them."
+        await asyncio.gather(
+            *(flush for _, _, flush in self.pending.values()),
+            *self.member_edits.values(),
+            return_exceptions=True,
+        )
+
+    def info(self) -> dict:
+        "Return statistics on how many role changes were merged into how many member edits."
+        return {
+            "pending": len(self.pending),
+            "changes": self.stats["changes"],
+            "edits": self.stats["edits"],
+            "merged": self.stats["changes"] - self.stats["edits"],
+        }
+
+    def queue(
+        self,
+        member: discord.Member,
+        message_id: int,
+        roles: List[discord.Role],
+        add: bool,
+    ):
+        "Remember roles to add to or take away from a member and make sure they'll be applied."
+        key = (member.guild.id, member.id)
+        if key not in self.pending:
+            self.pending[key] = ({}, set(), asyncio.create_task(self.flush(*key)))
+        changes, kiosks, _ = self.pending[key]
+        for role in roles:
+            # whatever happened last to a role wins, so clicking it twice cancels out
+            changes[role.id] = add
+        kiosks.add(message_id)
+        self.stats["changes"] += len(roles)
+
+    async def flush(self, guild_id: int, member_id: int):
+        "Wait for more changes to come in, then apply all of a member's pending ones in one edit."
+        await asyncio.sleep(self.debounce)
+        # changes coming in from here on are for the next edit
+        changes, kiosks, _ = self.pending.pop((guild_id, member_id))
+
+        try:
+            member, added, removed = await self.edit(
+                guild_id,
+                member_id,
+                changes,
+                "Role Kiosk " + ", ".join(str(kiosk) for kiosk in sorted(kiosks)),
+            )
+        except discord.HTTPException as ex:
+            self.log.warning(f"Couldn't update roles of {member_id}", exc_info=ex)
+            return
+
+        if (added or removed) and len(changes) > 1:
+            self.log.info(
+                f"Applied {len(changes)} role changes to {member} at once, {self.info()}"
+            )
+
+    async def throttle(self, limit: int):
+        "Wait for queued role changes to go out until at most `limit` members have some pending."
+        while len(self.pending) > limit:
+            await asyncio.gather(
+                *(flush for _, _, flush in self.pending.values()),
+                return_exceptions=True,
+            )
+
+    def edit(
+        self, guild_id: int, member_id: int, changes: Dict[int, bool], reason: str
+    ) -> asyncio.Task:
+        """Add (True) or take away (False) roles by ID once all edits of the member's roles started
+        before are done. Each edit replaces all of the member's roles, so working from what they
+        had before an earlier edit went out would undo it."""
+        key = (guild_id, member_id)
+        task = asyncio.create_task(
+            self.apply(self.member_edits.get(key), key, changes, reason)
+        )
+        self.member_edits[key] = task
+
+        def done(task: asyncio.Task):
+            if self.member_edits.get(key) is task:
+                del self.member_edits[key]
+
+        task.add_done_callback(done)
+        return task
+
+    async def apply(
+        self,
+        previous: Optional[asyncio.Task],
+        key: Tuple[int, int],
+        changes: Dict[int, bool],
+        reason: str,
+    ) -> Tuple[Optional[discord.Member], List[discord.Role], List[discord.Role]]:
+        "Edit a member's roles for edit() and return them with the roles added and removed."
+        member = None
+        if previous:
+            # how the previous edit went is up to whoever started it
+            await asyncio.wait([previous])
+            if not previous.cancelled() and not previous.exception():
+                # the gateway may not have caught up with it yet, but its response has
+                member = previous.result()[0]
+
+        async with self.slots:
+            if not member:
+                guild = self.bot.get_guild(key[0])
+                member = guild and guild.get_member(key[1])
+            if not member:
+                return None, [], []
+
+            added = [
+                role
+                for role_id, add in changes.items()
+                if add
+                and not member.get_role(role_id)
+                and (role := member.guild.get_role(role_id))
+            ]
+            removed = [role for role in member.roles if changes.get(role.id) is False]
+            if not (added or removed):
+                return member, added, removed
+
+            self.stats["edits"] += 1
+            edited = await member.edit(
+                roles=[
+                    role
+                    for role in member.roles + added
+                    if not role.is_default() and role not in removed
+                ],
+                reason=reason,
+            )
+            return edited or member, added, removed
+
+
 class Kiosk(Blimp.Cog):
     "Handing out fancy badges."
 
+    class MenuView(discord.ui.View):
+        """The select menus of menu kiosks. Menus have the same custom IDs on every kiosk, so one
+        instance registered with add_view() handles all of them, across restarts."""
+
+        MENUS = 5
+        OPTIONS = 25
+
+        def __init__(
+            self, cog, menus: Optional[List[List[discord.SelectOption]]] = None
+        ):
+            super().__init__(timeout=None)
+            for index in range(self.MENUS if menus is None else len(menus)):
+                options = menus[index] if menus else []
+                select = discord.ui.Select(
+                    custom_id=f"kiosk:{index}",
+                    placeholder="Pick roles…",
+                    min_values=0,
+                    max_values=max(1, len(options)),
+                    options=options,
+                )
+                select.callback = functools.partial(cog.menu_selected, select)
+                self.add_item(select)
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        # kiosk message IDs to their emoji (unicode or custom emoji ID) and the roles they stand for
+        self.kiosks: Dict[int, Dict[Union[int, str], List[int]]] = {}
+        # message IDs of the kiosks that use select menus instead of reactions
+        self.menus: Set[int] = set()
+        self.menu_view: Optional[Kiosk.MenuView] = None
+
+        self.roles = RoleEditor(
+            bot,
+            self.log,
+            debounce=bot.config.getfloat("kiosk", "debounce", fallback=1.5),
+            concurrency=bot.config.getint("kiosk", "concurrency", fallback=4),
+        )
+        # how many members may have changes waiting while reconciling before we hold off on
+        # queueing more
+        self.reconcile_batch = bot.config.getint(
+            "kiosk", "reconcile_batch", fallback=100
+        )
+        self.reconcile_removals = bot.config.getboolean(
+            "kiosk", "reconcile_removals", fallback=False
+        )
+        self.reconciler: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        for row in await self.bot.db.fetchall(
+            """SELECT message.secondary_id AS message_id, data, menu FROM rolekiosk_entries
+            JOIN objects AS message ON message.oid = rolekiosk_entries.oid""",
+            readonly=True,
+        ):
+            self.kiosks[row["message_id"]] = self.compile(json.loads(row["data"]))
+            if row["menu"]:
+                self.menus.add(row["message_id"])
+
+        self.bot.reactions.register(
+            "kiosk",
+            on_add=self.on_raw_reaction_add,
+            on_remove=self.on_raw_reaction_remove,
+        )
+        self.bot.reactions.watch("kiosk", *(self.kiosks.keys() - self.menus))
+        self.menu_view = self.MenuView(self)
+        self.bot.add_view(self.menu_view)
+
+        self.reconciler = asyncio.create_task(self.reconcile_all())
+
+    async def cog_unload(self):
+        self.bot.reactions.unregister("kiosk")
+        if self.menu_view:
+            self.menu_view.stop()
+        if self.reconciler:
+            self.reconciler.cancel()
+        await self.roles.close()
+
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def kiosk(self, ctx: Blimp.Context):
-        """Kiosks allow users to pick roles by reacting to specific messages with certain reactions.
-        This is frequently used for pronouns, ping roles, opt-ins or colors. Every Kiosk has its own
-        set of reaction-role pairings."""
+        """Kiosks allow users to pick roles by reacting to specific messages with certain reactions,
+        or by choosing them from select menus. This is frequently used for pronouns, ping roles,
+        opt-ins or colors. Every Kiosk has its own set of reaction-role pairings."""
 
         await ctx.invoke_command("help kiosk")
 
@@ -36,6 +297,18 @@ class Kiosk(Blimp.Cog):
 
         return result
 
+    @staticmethod
+    def compile(
+        pairs: List[Tuple[Union[int, str], int]]
+    ) -> Dict[Union[int, str], List[int]]:
+        "Turn stored kiosk data into a map of emoji to role IDs."
+
+        result = {}
+        for emoji, role_id in pairs:
+            result.setdefault(emoji, []).append(role_id)
+
+        return result
+
     def render_emoji_pairs(
         self,
         pairs: List[Tuple[Union[int, str], Union[int, discord.Role]]],
@@ -74,6 +347,43 @@ class Kiosk(Blimp.Cog):
         possible per message.
         """
 
+        await self.configure(ctx, msg, args, menu=False)
+
+    @commands.command(parent=kiosk)
+    async def menu(
+        self,
+        ctx: Blimp.Context,
+        msg: MaybeAliasedMessage,
+        args: commands.Greedy[Union[discord.Role, str]],
+    ):
+        """
+        Update (or create) a role kiosk that offers its roles in select menus instead of as
+        reactions, overwriting its setup entirely. Members can pick several roles at once this way,
+        and choosing in a menu replaces whatever they had picked in it before.
+
+        `msg` needs to be a message BLIMP posted, for example with `post$sfx`.
+
+        `args` is a space-separated list of one emoji each followed by one role, same as for
+        `kiosk$sfx update`. Up to 125 pairs are possible, 25 per menu.
+        """
+
+        if msg.author != ctx.me:
+            raise UnableToComply(
+                "Menu Kiosks can only be attached to messages BLIMP posted. Use "
+                f"`post{ctx.bot.suffix}` to create one."
+            )
+
+        await self.configure(ctx, msg, args, menu=True)
+
+    async def configure(
+        self,
+        ctx: Blimp.Context,
+        msg: discord.Message,
+        args: List[Union[discord.Role, str]],
+        menu: bool,
+    ):
+        "Set up a kiosk offering roles as reactions or, with `menu`, in select menus."
+
         if not ctx.privileged_modify(msg.guild):
             return
 
@@ -86,33 +396,29 @@ class Kiosk(Blimp.Cog):
             )
             return
 
-        if len(result) > 20:
+        limit = self.MenuView.MENUS * self.MenuView.OPTIONS if menu else 20
+        if len(result) > limit:
             raise UnableToComply(
-                "You can't use more than 20 reaction-role pairs per message.",
-            )
-
-        user_failed_roles = []
-        bot_failed_roles = []
-        for _, role in result:
-            if not ctx.privileged_modify(role):
-                user_failed_roles.append(role)
-            if not ctx.me.top_role > role:
-                bot_failed_roles.append(role)
-
-        if user_failed_roles:
-            raise Unauthorized(
-                "You can't modify the following roles: "
-                + " ".join([r.mention for r in user_failed_roles])
-                + "\nYour highest role needs to be above all of them.",
+                f"You can't use more than {limit} "
+                + ("emoji-role pairs in menus" if menu else "reaction-role pairs")
+                + " per message.",
             )
 
-        if bot_failed_roles:
-            raise UnableToComply(
-                "BLIMP can't modify the following roles: "
-                + " ".join([r.mention for r in bot_failed_roles])
-                + "\nThe bot's highest role needs to be above all of them.",
-            )
+        check_roles(ctx, [role for _, role in result])
 
+        menus = [
+            [
+                discord.SelectOption(
+                    label=role.name,
+                    value=str(role.id),
+                    emoji=(
+                        self.bot.get_emoji(emoji) if isinstance(emoji, int) else emoji
+                    ),
+                )
+                for emoji, role in result[offset : offset + self.MenuView.OPTIONS]
+            ]
+            for offset in range(0, len(result), self.MenuView.OPTIONS)
+        ]
         result = [(emoji, role.id) for (emoji, role) in result]
 
         for emoji in [item for item in msg.reactions if item.me]:
@@ -120,8 +426,17 @@ class Kiosk(Blimp.Cog):
                 emoji.emoji, ctx.guild.get_member(ctx.bot.user.id)
             )
 
-        for emoji in [item for item in args if item.__class__ == str]:
-            await msg.add_reaction(emoji)
+        if menu:
+            view = self.MenuView(self, menus)
+            # the view registered in cog_load handles interactions for every menu kiosk, so keep
+            # discord.py from storing this one for this message as well
+            view.stop()
+            await msg.edit(view=view)
+        else:
+            if msg.id in self.menus:
+                await msg.edit(view=None)
+            for emoji in [item for item in args if item.__class__ == str]:
+                await msg.add_reaction(emoji)
 
         log_embed = discord.Embed(
             description=f"{ctx.author} updated "
@@ -129,10 +444,10 @@ class Kiosk(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM rolekiosk_entries WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(m=[msg.channel.id, msg.id])},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(m=[msg.channel.id, msg.id])},
+        )
         if old:
             log_embed.add_field(
                 name="Old",
@@ -144,13 +459,22 @@ class Kiosk(Blimp.Cog):
             value=self.render_emoji_pairs(result, "\n"),
         )
 
-        ctx.database.execute(
-            "INSERT OR REPLACE INTO rolekiosk_entries(oid, data) VALUES(:oid,json(:data))",
+        await ctx.db.execute(
+            """INSERT OR REPLACE INTO rolekiosk_entries(oid, data, menu)
+            VALUES(:oid, json(:data), :menu)""",
             {
-                "oid": ctx.objects.make_object(m=[msg.channel.id, msg.id]),
+                "oid": await ctx.objects.make_object(m=[msg.channel.id, msg.id]),
                 "data": json.dumps(result),
+                "menu": menu,
             },
         )
+        self.kiosks[msg.id] = self.compile(result)
+        if menu:
+            self.menus.add(msg.id)
+            ctx.bot.reactions.unwatch("kiosk", msg.id)
+        else:
+            self.menus.discard(msg.id)
+            ctx.bot.reactions.watch("kiosk", msg.id)
 
         await ctx.bot.post_log(msg.guild, embed=log_embed)
 
@@ -176,10 +500,10 @@ class Kiosk(Blimp.Cog):
         if not ctx.privileged_modify(msg.guild):
             return
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM rolekiosk_entries WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(m=[msg.channel.id, msg.id])},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(m=[msg.channel.id, msg.id])},
+        )
 
         if not old:
             raise UnableToComply(
@@ -193,7 +517,8 @@ class Kiosk(Blimp.Cog):
             " ",
         )
 
-        text = f"kiosk{ctx.bot.suffix} update {msg.channel.id}-{msg.id} {pair_string}"
+        mode = "menu" if old["menu"] else "update"
+        text = f"kiosk{ctx.bot.suffix} {mode} {msg.channel.id}-{msg.id} {pair_string}"
 
         await ctx.reply(
             text,
@@ -210,13 +535,15 @@ class Kiosk(Blimp.Cog):
 
         `msg` is the message the Kiosk you're interested in is attached to."""
 
-        row = ctx.database.execute(
+        row = await ctx.db.fetchone(
             "SELECT * FROM rolekiosk_entries WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(m=[msg.channel.id, msg.id])},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(m=[msg.channel.id, msg.id])},
+        )
         if row:
             await ctx.reply(
-                f"**[Role kiosk in #{msg.channel.name}]({msg.jump_url})**\n"
+                f"**[Role kiosk in #{msg.channel.name}]({msg.jump_url})**"
+                + (" (menus)" if row["menu"] else "")
+                + "\n"
                 + self.render_emoji_pairs(json.loads(row["data"]), "\n"),
             )
         else:
@@ -233,14 +560,19 @@ class Kiosk(Blimp.Cog):
         if not ctx.privileged_modify(msg.guild):
             return
 
-        cursor = ctx.database.execute(
+        cursor = await ctx.db.execute(
             "DELETE FROM rolekiosk_entries WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(m=[msg.channel.id, msg.id])},
+            {"oid": await ctx.objects.by_data(m=[msg.channel.id, msg.id])},
         )
         if cursor.rowcount == 0:
             raise PleaseRestate(
                 "That message is not a Kiosk.",
             )
+        self.kiosks.pop(msg.id, None)
+        ctx.bot.reactions.unwatch("kiosk", msg.id)
+        if msg.id in self.menus:
+            self.menus.discard(msg.id)
+            await msg.edit(view=None)
 
         for emoji in [item for item in msg.reactions if item.me]:
             await msg.remove_reaction(emoji.emoji, ctx.guild.me)
@@ -249,56 +581,235 @@ class Kiosk(Blimp.Cog):
             f"*Deleted [role kiosk in #{msg.channel.name}]({msg.jump_url}).*"
         )
 
+    @commands.command(parent=kiosk, name="reconcile")
+    async def _reconcile(
+        self, ctx: Blimp.Context, msg: MaybeAliasedMessage, prune: bool = False
+    ):
+        """Hand out roles a Kiosk's reactions call for but that members don't have, for example
+        because they reacted while BLIMP was offline.
+
+        `prune` also takes the Kiosk's roles away from members who have them without the matching
+        reaction. Only use this if the roles aren't given out any other way."""
+
+        if not ctx.privileged_modify(msg.guild):
+            raise Unauthorized()
+
+        if msg.id not in self.kiosks:
+            raise PleaseRestate("That message is not a Kiosk.")
+
+        if msg.id in self.menus:
+            raise UnableToComply("Menu Kiosks have no reactions to reconcile.")
+
+        async with ctx.typing():
+            summary = await self.reconcile(msg, prune)
+
+        await ctx.reply(
+            f"*Reconciled [role kiosk in #{msg.channel.name}]({msg.jump_url}):* "
+            f"{summary['reactors']} reactions, {summary['added']} roles added, "
+            f"{summary['removed']} roles removed."
+        )
+
     def roles_from_payload(
         self, payload: discord.RawReactionActionEvent
-    ) -> List[discord.Role]:
+    ) -> Optional[List[discord.Role]]:
         "Turn a reaction payload into a list of roles to apply or take away."
 
-        cursor = self.bot.database.execute(
-            "SELECT data FROM rolekiosk_entries WHERE oid=:oid",
-            {
-                "oid": self.bot.objects.by_data(
-                    m=[payload.channel_id, payload.message_id]
-                )
-            },
-        )
-        result = cursor.fetchone()
-        if not result:
+        kiosk = self.kiosks.get(payload.message_id)
+        if kiosk is None:
             return None
 
-        data = json.loads(result["data"])
+        guild = self.bot.get_guild(payload.guild_id)
         return [
-            self.bot.get_guild(payload.guild_id).get_role(number)
-            for (emoji, number) in data
-            if emoji in (payload.emoji.name, payload.emoji.id)
+            role
+            for number in kiosk.get(payload.emoji.id or payload.emoji.name, ())
+            if (role := guild.get_role(number))
         ]
 
-    @Blimp.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        "On reaction creation, check if we should add roles and do so."
+        "On reaction creation on a kiosk, check if we should add roles and do so."
         if not payload.guild_id or payload.user_id == self.bot.user.id:
             return
 
         roles = self.roles_from_payload(payload)
         if roles:
-            await self.bot.get_guild(payload.guild_id).get_member(
-                payload.user_id
-            ).add_roles(
-                *roles,
-                reason=f"Role Kiosk {payload.message_id}",
-            )
+            self.roles.queue(payload.member, payload.message_id, roles, add=True)
 
-    @Blimp.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
-        "On reaction removal, check if we should remove roles and do so."
+        "On reaction removal on a kiosk, check if we should remove roles and do so."
         if not payload.guild_id or payload.user_id == self.bot.user.id:
             return
 
         roles = self.roles_from_payload(payload)
-        if roles:
-            await self.bot.get_guild(payload.guild_id).get_member(
-                payload.user_id
-            ).remove_roles(
-                *roles,
-                reason=f"Role Kiosk {payload.message_id}",
+        member = self.bot.get_guild(payload.guild_id).get_member(payload.user_id)
+        if roles and member:
+            self.roles.queue(member, payload.message_id, roles, add=False)
+
+    async def reconcile(self, message: discord.Message, prune: bool = False) -> Counter:
+        """Give the roles of a kiosk to everyone who reacted for them but doesn't have them yet.
+        With `prune`, also take them away from members who have them without the matching
+        reaction.
+
+        Reactors are streamed a page at a time and role changes are applied in batches as we go,
+        so this only holds on to the members of the kiosk's roles and at most `reconcile_batch`
+        members' worth of pending changes, no matter how many reactions there are."""
+
+        kiosk = self.kiosks.get(message.id, {})
+        summary = Counter(reactors=0, missing=0, added=0, removed=0)
+
+        # role IDs to members holding the role that haven't shown up among the reactors
+        unseen = {
+            role_id: {member.id for member in role.members}
+            for role_ids in kiosk.values()
+            for role_id in role_ids
+            if prune and (role := message.guild.get_role(role_id))
+        }
+
+        reactions = {
+            getattr(reaction.emoji, "id", None) or reaction.emoji: reaction
+            for reaction in message.reactions
+        }
+        for emoji, role_ids in kiosk.items():
+            if emoji in reactions:
+                await self.reconcile_reaction(
+                    reactions[emoji], role_ids, unseen, summary
+                )
+
+        await self.prune_unseen(message, unseen, summary)
+        await self.roles.throttle(0)
+        return summary
+
+    async def reconcile_reaction(
+        self,
+        reaction: discord.Reaction,
+        role_ids: List[int],
+        unseen: Dict[int, Set[int]],
+        summary: Counter,
+    ):
+        "Queue the roles of one kiosk emoji for everyone who reacted with it but doesn't have them."
+        guild = reaction.message.guild
+        roles = [role for number in role_ids if (role := guild.get_role(number))]
+        async for user in reaction.users(limit=None):
+            if user.id == self.bot.user.id:
+                continue
+
+            summary["reactors"] += 1
+            member = guild.get_member(user.id)
+            if not member:
+                summary["missing"] += 1
+                continue
+
+            for role in roles:
+                unseen.get(role.id, set()).discard(member.id)
+            if missing := [role for role in roles if not member.get_role(role.id)]:
+                self.roles.queue(member, reaction.message.id, missing, add=True)
+                summary["added"] += len(missing)
+                await self.roles.throttle(self.reconcile_batch)
+
+    async def prune_unseen(
+        self, message: discord.Message, unseen: Dict[int, Set[int]], summary: Counter
+    ):
+        "Queue taking a kiosk's roles away from the members who didn't react for them."
+        for role_id, member_ids in unseen.items():
+            role = message.guild.get_role(role_id)
+            for member_id in member_ids if role else ():
+                if member := message.guild.get_member(member_id):
+                    self.roles.queue(member, message.id, [role], add=False)
+                    summary["removed"] += 1
+                    await self.roles.throttle(self.reconcile_batch)
+
+    async def reconcile_all(self):
+        "Reconcile every kiosk, catching up on reactions from while BLIMP was offline."
+        await self.bot.wait_until_ready()
+
+        summary = Counter(kiosks=0, failed=0)
+        for row in await self.bot.db.fetchall(
+            """SELECT message.primary_id AS channel_id, message.secondary_id AS message_id
+            FROM rolekiosk_entries
+            JOIN objects AS message ON message.oid = rolekiosk_entries.oid""",
+            readonly=True,
+        ):
+            channel = self.bot.get_channel(row["channel_id"])
+            if (
+                not channel
+                or row["message_id"] not in self.kiosks
+                or row["message_id"] in self.menus
+            ):
+                continue
+
+            try:
+                message = await channel.fetch_message(row["message_id"])
+                summary.update(await self.reconcile(message, self.reconcile_removals))
+                summary["kiosks"] += 1
+            except discord.HTTPException as ex:
+                self.log.warning(
+                    f"Couldn't reconcile kiosk {row['message_id']}", exc_info=ex
+                )
+                summary["failed"] += 1
+
+        self.log.info(f"Reconciled kiosks, {dict(summary)}, {self.roles.info()}")
+
+    async def menu_selected(
+        self, select: discord.ui.Select, interaction: discord.Interaction
+    ):
+        """Give a member the roles they picked in a kiosk's menu and take away the ones from the
+        same menu they didn't, in a single edit."""
+
+        message = interaction.message
+        if message.id not in self.menus or not isinstance(
+            interaction.user, discord.Member
+        ):
+            await interaction.response.send_message(
+                "This Kiosk isn't active anymore.", ephemeral=True
             )
+            return
+
+        # the roles this menu offers, as we put them on the message, and still part of the kiosk
+        kiosk_roles = {
+            role_id
+            for role_ids in self.kiosks[message.id].values()
+            for role_id in role_ids
+        }
+        offered = {
+            int(option.value)
+            for row in message.components
+            for component in row.children
+            if component.custom_id == select.custom_id
+            for option in component.options
+        } & kiosk_roles
+        chosen = {int(value) for value in select.values} & offered
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            # like reactions, this goes after any other edits of the member's roles, so what the
+            # menu does is worked out from the roles they have by then
+            _, added, removed = await self.roles.edit(
+                interaction.guild.id,
+                interaction.user.id,
+                {role_id: role_id in chosen for role_id in offered},
+                f"Role Kiosk {message.id}",
+            )
+        except discord.Forbidden:
+            await interaction.followup.send(
+                "BLIMP isn't allowed to change your roles. Please let the server staff know.",
+                ephemeral=True,
+            )
+            return
+        except discord.HTTPException as ex:
+            self.log.warning(
+                f"Couldn't update roles of {interaction.user}", exc_info=ex
+            )
+            await interaction.followup.send(
+                "Your roles couldn't be updated right now, please try again.",
+                ephemeral=True,
+            )
+            return
+        self.roles.stats["changes"] += len(added) + len(removed)
+
+        await interaction.followup.send(
+            "\n".join(
+                [f"Added {role.mention}." for role in added]
+                + [f"Removed {role.mention}." for role in removed]
+            )
+            or "Your roles are already set up like that.",
+            ephemeral=True,
+        )
@@ -31,12 +31,12 @@ class Logging(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT OR REPLACE INTO logging_configuration(guild_oid, channel_oid)
             VALUES(:guild_oid, :channel_oid)""",
             {
-                "channel_oid": ctx.objects.make_object(tc=channel.id),
-                "guild_oid": ctx.objects.make_object(g=channel.guild.id),
+                "channel_oid": await ctx.objects.make_object(tc=channel.id),
+                "guild_oid": await ctx.objects.make_object(g=channel.guild.id),
             },
         )
 
@@ -48,12 +48,12 @@ class Logging(Blimp.Cog):
         if not ctx.privileged_modify(ctx.guild):
             raise Unauthorized()
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM logging_configuration WHERE guild_oid =:guild_oid",
             {
-                "guild_oid": ctx.objects.make_object(g=ctx.guild.id),
+                "guild_oid": await ctx.objects.make_object(g=ctx.guild.id),
             },
-        ).fetchone()
+        )
         if not old:
             raise UnableToComply("Logging is not enabled in this server.")
 
@@ -63,10 +63,10 @@ class Logging(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             "DELETE FROM logging_configuration WHERE guild_oid =:guild_oid",
             {
-                "guild_oid": ctx.objects.make_object(g=ctx.guild.id),
+                "guild_oid": await ctx.objects.make_object(g=ctx.guild.id),
             },
         )
 
@@ -76,15 +76,15 @@ class Logging(Blimp.Cog):
     async def view(self, ctx: Blimp.Context):
         "View the logging channel."
 
-        row = ctx.database.execute(
+        row = await ctx.db.fetchone(
             "SELECT * FROM logging_configuration WHERE guild_oid=:guild_oid",
             {
-                "guild_oid": ctx.objects.make_object(g=ctx.guild.id),
+                "guild_oid": await ctx.objects.make_object(g=ctx.guild.id),
             },
-        ).fetchone()
+        )
 
         if row:
-            channel = ctx.objects.by_oid(row["channel_oid"])["tc"]
+            channel = (await ctx.objects.by_oid(row["channel_oid"]))["tc"]
             await ctx.reply(f"The current logging channel is <#{channel}>.")
         else:
             await ctx.reply(
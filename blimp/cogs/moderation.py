@@ -39,25 +39,25 @@ class Moderation(Blimp.Cog):
         if member == ctx.bot.user:
             raise UnableToComply("No.")
 
-        exists = ctx.database.execute(
+        exists = await ctx.db.fetchone(
             "SELECT * FROM channelban_entries WHERE channel_oid=:c_oid AND user_oid=:u_oid",
             {
-                "c_oid": ctx.objects.make_object(tc=channel.id),
-                "u_oid": ctx.objects.make_object(u=member.id),
+                "c_oid": await ctx.objects.make_object(tc=channel.id),
+                "u_oid": await ctx.objects.make_object(u=member.id),
             },
-        ).fetchone()
+        )
 
         if exists:
             raise UnableToComply("Member is already channelbanned.")
 
-        ctx.database.execute(
+        await ctx.db.execute(
             "INSERT INTO channelban_entries(channel_oid, guild_oid, user_oid, issuer_oid, reason) "
             "VALUES(:c_oid, :g_oid, :u_oid, :i_oid, :reason)",
             {
-                "c_oid": ctx.objects.make_object(tc=channel.id),
-                "g_oid": ctx.objects.make_object(g=channel.guild.id),
-                "u_oid": ctx.objects.make_object(u=member.id),
-                "i_oid": ctx.objects.make_object(u=ctx.author.id),
+                "c_oid": await ctx.objects.make_object(tc=channel.id),
+                "g_oid": await ctx.objects.make_object(g=channel.guild.id),
+                "u_oid": await ctx.objects.make_object(u=member.id),
+                "i_oid": await ctx.objects.make_object(u=ctx.author.id),
                 "reason": reason,
             },
         )
@@ -91,22 +91,22 @@ class Moderation(Blimp.Cog):
         if not ctx.privileged_modify(channel):
             return
 
-        exists = ctx.database.execute(
+        exists = await ctx.db.fetchone(
             "SELECT * FROM channelban_entries WHERE channel_oid=:c_oid AND user_oid=:u_oid",
             {
-                "c_oid": ctx.objects.make_object(tc=channel.id),
-                "u_oid": ctx.objects.make_object(u=member.id),
+                "c_oid": await ctx.objects.make_object(tc=channel.id),
+                "u_oid": await ctx.objects.make_object(u=member.id),
             },
-        ).fetchone()
+        )
 
         if not exists:
             raise UnableToComply("Member is not channel-banned.")
 
-        ctx.database.execute(
+        await ctx.db.execute(
             "DELETE FROM channelban_entries WHERE channel_oid=:c_oid AND user_oid=:u_oid",
             {
-                "c_oid": ctx.objects.by_data(tc=channel.id),
-                "u_oid": ctx.objects.by_data(u=member.id),
+                "c_oid": await ctx.objects.by_data(tc=channel.id),
+                "u_oid": await ctx.objects.by_data(u=member.id),
             },
         )
 
@@ -122,13 +122,13 @@ class Moderation(Blimp.Cog):
     async def on_member_join(self, member: discord.Member):
         "Reapply channel bans on rejoin"
 
-        rows = self.bot.database.execute(
+        rows = await self.bot.db.fetchall(
             "SELECT * FROM channelban_entries WHERE user_oid=:u_oid AND guild_oid=:g_oid",
             {
-                "u_oid": self.bot.objects.by_data(u=member.id),
-                "g_oid": self.bot.objects.by_data(g=member.guild.id),
+                "u_oid": await self.bot.objects.by_data(u=member.id),
+                "g_oid": await self.bot.objects.by_data(g=member.guild.id),
             },
-        ).fetchall()
+        )
         if not rows:
             return
 
@@ -136,16 +136,16 @@ class Moderation(Blimp.Cog):
         for row in rows:
             try:
                 channel = self.bot.get_channel(
-                    self.bot.objects.by_oid(row["channel_oid"])["tc"]
+                    (await self.bot.objects.by_oid(row["channel_oid"]))["tc"]
                 )
                 await channel.set_permissions(
                     member, send_messages=False, add_reactions=False
                 )
                 log_str += f"{channel.mention} OK\n"
             except:  # pylint: disable=bare-except
-                channel_id = self.bot.objects.by_oid(row["channel_oid"])["tc"]
+                channel_id = (await self.bot.objects.by_oid(row["channel_oid"]))["tc"]
                 log_str += f"<#{channel_id}> Error, auto-unbanning.\n"
-                self.bot.database.execute(
+                await self.bot.db.execute(
                     "DELETE FROM channelban_entries WHERE user_oid=:u_oid AND channel_oid=:c_oid",
                     {
                         "u_oid": row["user_oid"],
@@ -1,8 +1,13 @@
+import asyncio
+import heapq
 import re
+import sqlite3
+import time
 import traceback
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+import aiohttp
 import discord
 from discord.ext import commands, tasks
 
@@ -15,85 +20,248 @@ from ..customizations import (
 
 
 class Reminders(Blimp.Cog):
-    "Reminding you of things that you believe are going to happen."
+    """Reminding you of things that you believe are going to happen.
+
+    Reminders due before `horizon` are kept in a min-heap of (due, id) and execute_reminders()
+    sleeps until the first of them or the horizon, whichever comes first. At the horizon the next
+    WINDOW of reminders is loaded. New reminders that fall into the loaded window get pushed onto
+    the heap and wake the scheduler up. Deleted reminders are left in the heap and skipped when
+    they come up.
+
+    Due reminders are delivered concurrently by deliver(), at most `concurrency` at a time.
+    Transient failures are retried with exponential backoff and a reminder is only deleted once
+    it has been sent or turned out to be undeliverable."""
+
+    WINDOW = 3600
+    TRANSIENT_ERRORS = (
+        discord.DiscordServerError,
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+        OSError,
+    )
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.heap: List[Tuple[int, int]] = []
+        self.horizon = 0
+        self.wakeup = asyncio.Event()
+
+        self.semaphore = asyncio.Semaphore(
+            bot.config.getint("reminders", "concurrency", fallback=8)
+        )
+        self.max_attempts = max(
+            1, bot.config.getint("reminders", "max_attempts", fallback=5)
+        )
+        self.backoff = bot.config.getfloat("reminders", "backoff", fallback=2.0)
+        self.in_flight: Dict[int, asyncio.Task] = {}
+
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
 
-    def __init__(self, *args):
         self.execute_reminders.start()  # pylint: disable=no-member
-        super().__init__(*args)
 
-    @tasks.loop(seconds=1)
+    async def cog_unload(self):
+        self.execute_reminders.cancel()  # pylint: disable=no-member
+        # anything not yet sent is still in the database and goes out after the next start
+        for task in self.in_flight.values():
+            task.cancel()
+
+    def delivery_info(self) -> dict:
+        "Return statistics on the backlog and how late reminders went out."
+        now = time.time()
+        return {
+            "backlog": sum(1 for due, _ in self.heap if due <= now)
+            + len(self.in_flight),
+            "in_flight": len(self.in_flight),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "mean_lag": self.total_lag / self.delivered if self.delivered else 0.0,
+            "max_lag": self.max_lag,
+        }
+
+    def schedule(self, due: int, reminder_id: int):
+        "Make the scheduler aware of a new reminder."
+        if due >= self.horizon:
+            return
+
+        heapq.heappush(self.heap, (due, reminder_id))
+        if self.heap[0] == (due, reminder_id):
+            self.wakeup.set()
+
+    async def load_window(self):
+        "Load all reminders due before the next horizon into the heap."
+        self.horizon = int(time.time()) + self.WINDOW
+        rows = await self.bot.db.fetchall(
+            "SELECT due, id FROM reminders_entries WHERE due < :horizon",
+            {"horizon": self.horizon},
+            readonly=True,
+        )
+        # keep what schedule() pushed while we were waiting for the query
+        self.heap = list({(row["due"], row["id"]) for row in rows} | set(self.heap))
+        heapq.heapify(self.heap)
+
+    @tasks.loop()
     async def execute_reminders(self):
-        "Look at overdue reminders and send notifications out."
-        cursor = self.bot.database.execute(
-            "SELECT * FROM reminders_entries WHERE due < datetime('now')"
+        "Sleep until the next reminder is due, then hand it and everything else due to deliver()."
+        if time.time() >= self.horizon:
+            await self.load_window()
+
+        deadline = min(self.heap[0][0], self.horizon) if self.heap else self.horizon
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(
+                self.wakeup.wait(), timeout=max(0, deadline - time.time())
+            )
+            return
+        except asyncio.TimeoutError:
+            pass
+
+        due_ids = set()
+        while self.heap and self.heap[0][0] <= time.time():
+            reminder_id = heapq.heappop(self.heap)[1]
+            if reminder_id not in self.in_flight:
+                due_ids.add(reminder_id)
+        if not due_ids:
+            return
+
+        entries = await self.bot.db.fetchall(
+            f"""SELECT * FROM reminders_entries
+            WHERE id IN ({",".join("?" * len(due_ids))}) ORDER BY due""",
+            list(due_ids),
         )
-        cursor.arraysize = 10
-        entries = cursor.fetchmany()
+        if len(entries) > 1:
+            self.log.info(
+                f"Delivering {len(entries)} reminders, {self.delivery_info()}"
+            )
         for entry in entries:
-            invoke_msg = self.bot.objects.by_oid(entry["message_oid"])["m"]
-            channel = None
-            user = self.bot.get_user(entry["user_id"])
-
-            try:
-                channel = self.bot.get_channel(invoke_msg[0])
-
-                # if the user can't read this channel or it doesn't exist anymore, try DMs
-                if (
-                    not channel
-                    or isinstance(channel, discord.DMChannel)
-                    or not channel.guild.get_member(entry["user_id"])
-                    or not channel.permissions_for(
-                        channel.guild.get_member(entry["user_id"])
-                    ).read_messages
-                ):
-                    channel = user
-
-                title = str(entry["text"])
-                extratext = ""
-                if len(title) > 255:
-                    extratext = "…" + title[255:]
-                    title = title[:255] + "…"
-
-                # mentions/links don't work in the embed title
-                if re.search(r"<(?:@!?|#|@&)\d{10,}>", entry["text"]) or re.search(
-                    "https://discord(?:app)?.com/channels/", entry["text"]
-                ):
-                    title = None
-                    extratext = entry["text"]
-
-                timestamp = discord.utils.snowflake_time(invoke_msg[1]).replace(
-                    microsecond=0, tzinfo=timezone.utc
-                )
-                await channel.send(
-                    self.bot.get_user(entry["user_id"]).mention,
-                    embed=discord.Embed(
-                        title=title,
-                        description=extratext
-                        + f"\n\n**Reminder from** <t:{int(timestamp.timestamp())}:R> | "
-                        + (await self.bot.represent_object({"m": invoke_msg})),
-                    ),
-                )
-            except Exception as exc:  # pylint: disable=broad-except
+            task = asyncio.create_task(self.deliver(entry))
+            self.in_flight[entry["id"]] = task
+            task.add_done_callback(lambda _, rid=entry["id"]: self.in_flight.pop(rid))
+
+    async def deliver(self, entry: sqlite3.Row):
+        """Send a reminder out, retrying transient errors with exponential backoff, and delete it
+        once that worked. If all attempts fail, try again later."""
+        async with self.semaphore:
+            invoke_obj = await self.bot.objects.by_oid(entry["message_oid"])
+            if not invoke_obj:
+                # without the message it was set on there's nothing to send, ever
                 self.log.error(
-                    f"Failed to deliver reminder {entry['id']}, "
-                    f"origin {await self.bot.represent_object({'m':invoke_msg})}",
-                    exc_info=exc,
-                )
-                if channel_id := self.bot.config["log"].get("error_log_id"):
-                    channel = self.bot.get_channel(int(channel_id))
-                    tb_lines = traceback.format_tb(exc.__traceback__)
-                    tb_lines = "".join(tb_lines)
-
-                    await channel.send(
-                        f"Encountered exception while delivering reminder {entry['id']}, "
-                        f"origin {await self.bot.represent_object({'m':invoke_msg})}"
-                        f"\n```py\n{exc}\n{tb_lines}\n```"
-                    )
-            finally:
-                self.bot.database.execute(
-                    "DELETE FROM reminders_entries WHERE id=:id",
-                    {"id": entry["id"]},
+                    f"Dropping reminder {entry['id']}, its object {entry['message_oid']} is gone"
                 )
+                self.failed += 1
+                await self.forget(entry)
+                return
+
+            invoke_msg = invoke_obj["m"]
+            for attempt in range(self.max_attempts):
+                try:
+                    await self.send_reminder(entry, invoke_msg)
+                    break
+                except self.TRANSIENT_ERRORS as exc:
+                    delay = self.backoff * 2**attempt
+                    if attempt + 1 == self.max_attempts:
+                        self.log.warning(
+                            f"Giving up on reminder {entry['id']} for now, retrying in {delay}s",
+                            exc_info=exc,
+                        )
+                        self.failed += 1
+                        self.schedule(int(time.time() + delay), entry["id"])
+                        return
+
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                except Exception as exc:  # pylint: disable=broad-except
+                    # this is never going to work, so report it and don't try again
+                    self.failed += 1
+                    try:
+                        await self.report_failure(entry, invoke_msg, exc)
+                    except Exception as report_exc:  # pylint: disable=broad-except
+                        self.log.error(
+                            f"Couldn't report failure of reminder {entry['id']}",
+                            exc_info=report_exc,
+                        )
+                    await self.forget(entry)
+                    return
+
+            lag = time.time() - entry["due"]
+            if lag > 0:
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+            self.delivered += 1
+
+            await self.forget(entry)
+
+    async def forget(self, entry: sqlite3.Row):
+        "Delete a reminder that has been dealt with."
+        await self.bot.db.execute(
+            "DELETE FROM reminders_entries WHERE id=:id", {"id": entry["id"]}
+        )
+
+    async def send_reminder(self, entry: sqlite3.Row, invoke_msg: list):
+        "Send a reminder to where it was set, or the user's DMs if that doesn't work."
+        user = self.bot.get_user(entry["user_id"])
+        channel = self.bot.get_channel(invoke_msg[0])
+
+        # if the user can't read this channel or it doesn't exist anymore, try DMs
+        if (
+            not channel
+            or isinstance(channel, discord.DMChannel)
+            or not channel.guild.get_member(entry["user_id"])
+            or not channel.permissions_for(
+                channel.guild.get_member(entry["user_id"])
+            ).read_messages
+        ):
+            channel = user
+
+        title = str(entry["text"])
+        extratext = ""
+        if len(title) > 255:
+            extratext = "…" + title[255:]
+            title = title[:255] + "…"
+
+        # mentions/links don't work in the embed title
+        if re.search(r"<(?:@!?|#|@&)\d{10,}>", entry["text"]) or re.search(
+            "https://discord(?:app)?.com/channels/", entry["text"]
+        ):
+            title = None
+            extratext = entry["text"]
+
+        timestamp = discord.utils.snowflake_time(invoke_msg[1]).replace(
+            microsecond=0, tzinfo=timezone.utc
+        )
+        await channel.send(
+            user.mention,
+            embed=discord.Embed(
+                title=title,
+                description=extratext
+                + f"\n\n**Reminder from** <t:{int(timestamp.timestamp())}:R> | "
+                + (await self.bot.represent_object({"m": invoke_msg})),
+            ),
+        )
+
+    async def report_failure(
+        self, entry: sqlite3.Row, invoke_msg: list, exc: Exception
+    ):
+        "Log a reminder that couldn't be delivered, and post it in the error log channel."
+        self.log.error(
+            f"Failed to deliver reminder {entry['id']}, "
+            f"origin {await self.bot.represent_object({'m':invoke_msg})}",
+            exc_info=exc,
+        )
+        if channel_id := self.bot.config["log"].get("error_log_id"):
+            channel = self.bot.get_channel(int(channel_id))
+            tb_lines = traceback.format_tb(exc.__traceback__)
+            tb_lines = "".join(tb_lines)
+
+            await channel.send(
+                f"Encountered exception while delivering reminder {entry['id']}, "
+                f"origin {await self.bot.represent_object({'m':invoke_msg})}"
+                f"\n```py\n{exc}\n{tb_lines}\n```"
+            )
 
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def reminders(self, ctx: Blimp.Context):
@@ -108,10 +276,11 @@ class Reminders(Blimp.Cog):
     async def _list(self, ctx: Blimp.Context):
         "List all pending reminders for you in DMs."
 
-        rems = ctx.database.execute(
+        rems = await ctx.db.fetchall(
             "SELECT * FROM reminders_entries WHERE user_id=:user_id",
             {"user_id": ctx.author.id},
-        ).fetchall()
+            readonly=True,
+        )
 
         if not rems:
             await ctx.reply("You have no pending reminders.", color=ctx.Color.I_GUESS)
@@ -119,11 +288,10 @@ class Reminders(Blimp.Cog):
 
         rows = []
         for rem in rems:
-            invoke_msg = ctx.objects.by_oid(rem["message_oid"])
+            invoke_msg = await ctx.objects.by_oid(rem["message_oid"])
             invoke_link = await self.bot.represent_object(invoke_msg)
-            timestamp = datetime.fromisoformat(rem["due"])
             rows.append(
-                f"#{rem['id']} <t:{int(timestamp.timestamp())}:R> | {invoke_link}\n{rem['text']}"
+                f"#{rem['id']} <t:{rem['due']}:R> | {invoke_link}\n{rem['text']}"
             )
 
         await Blimp.Context.reply(ctx.author, "\n".join(rows))
@@ -134,16 +302,16 @@ class Reminders(Blimp.Cog):
 
         `number` is the number listed first in a `reminders$sfx list` row."""
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM reminders_entries WHERE user_id=:user_id AND id=:id",
             {"user_id": ctx.author.id, "id": number},
-        ).fetchone()
+        )
         if not old:
             raise UnableToComply(
                 f"Can't delete your reminder #{number} as it doesn't exist."
             )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             "DELETE FROM reminders_entries WHERE user_id=:user_id AND id=:id",
             {"user_id": ctx.author.id, "id": number},
         )
@@ -186,18 +354,19 @@ class Reminders(Blimp.Cog):
         if due < datetime.now(timezone.utc):
             raise UnableToComply("You can't set reminders for past events.")
 
-        cursor = ctx.database.execute(
+        cursor = await ctx.db.execute(
             """INSERT INTO reminders_entries(user_id, message_oid, due, text)
             VALUES(:user_id, :message_oid, :due, :text);""",
             {
                 "user_id": ctx.author.id,
-                "message_oid": ctx.objects.make_object(
+                "message_oid": await ctx.objects.make_object(
                     m=[ctx.channel.id, ctx.message.id]
                 ),
-                "due": due.astimezone(tz=timezone.utc).isoformat(sep=" "),
+                "due": int(due.timestamp()),
                 "text": text,
             },
         )
+        self.schedule(int(due.timestamp()), cursor.lastrowid)
 
         await ctx.reply(
             f"Reminder #{cursor.lastrowid} set for <t:{int(due.timestamp())}:R>."
@@ -22,10 +22,10 @@ class SIG(Blimp.Cog):
     async def view(self, ctx: Blimp.Context):
         "View which SIGs you are subscribed to."
 
-        sigs = ctx.database.execute(
+        sigs = await ctx.db.fetchall(
             "SELECT channel_oid FROM sig_entries WHERE user_id = :user_id",
             {"user_id": ctx.author.id},
-        ).fetchall()
+        )
         if not sigs:
             await ctx.reply(
                 "You aren't subscribed to any SIGs.", color=ctx.Color.I_GUESS
@@ -36,7 +36,9 @@ class SIG(Blimp.Cog):
             "You are subscribed to these SIGs:\n"
             + "\n".join(
                 [
-                    await ctx.bot.represent_object(ctx.objects.by_oid(channel_oid))
+                    await ctx.bot.represent_object(
+                        await ctx.objects.by_oid(channel_oid)
+                    )
                     for (channel_oid,) in sigs
                 ]
             )
@@ -59,10 +61,10 @@ class SIG(Blimp.Cog):
                 raise Unauthorized()
 
             try:
-                ctx.database.execute(
+                await ctx.db.execute(
                     "INSERT INTO sig_entries(channel_oid, user_id) VALUES(:channel_oid, :user_id)",
                     {
-                        "channel_oid": ctx.objects.make_object(tc=channel.id),
+                        "channel_oid": await ctx.objects.make_object(tc=channel.id),
                         "user_id": ctx.author.id,
                     },
                 )
@@ -86,13 +88,13 @@ class SIG(Blimp.Cog):
             channels = [ctx.channel]
 
         for channel in channels:
-            old = ctx.database.execute(
+            old = await ctx.db.fetchone(
                 "SELECT * FROM sig_entries WHERE user_id = :user_id AND channel_oid=:channel_oid",
                 {
                     "user_id": ctx.author.id,
-                    "channel_oid": ctx.objects.make_object(tc=channel.id),
+                    "channel_oid": await ctx.objects.make_object(tc=channel.id),
                 },
-            ).fetchone()
+            )
 
             if not old:
                 await ctx.reply(
@@ -101,10 +103,10 @@ class SIG(Blimp.Cog):
                 )
                 return
 
-            ctx.database.execute(
+            await ctx.db.execute(
                 "DELETE FROM sig_entries WHERE channel_oid=:channel_oid AND user_id=:user_id",
                 {
-                    "channel_oid": ctx.objects.make_object(tc=channel.id),
+                    "channel_oid": await ctx.objects.make_object(tc=channel.id),
                     "user_id": ctx.author.id,
                 },
             )
@@ -125,10 +127,10 @@ class SIG(Blimp.Cog):
         if not ctx.privileged_modify(channel):
             raise Unauthorized()
 
-        members = ctx.database.execute(
+        members = await ctx.db.fetchall(
             "SELECT user_id FROM sig_entries WHERE channel_oid = :channel_oid",
-            {"channel_oid": ctx.objects.by_data(tc=channel.id)},
-        ).fetchall()
+            {"channel_oid": await ctx.objects.by_data(tc=channel.id)},
+        )
 
         members = [
             discord.utils.get(ctx.guild.members, id=member_id)
@@ -1,15 +1,160 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from ..customizations import Blimp, ParseableTimedelta, Unauthorized
 from .alias import MaybeAliasedTextChannel
 
 
 class Slowmode(Blimp.Cog):
-    "Deleting things that are just too new for your taste."
+    """Deleting things that are just too new for your taste.
+
+    While the bot runs, the configuration and everyone's last post are kept in memory and are what
+    enforcement goes by. Changed timestamps get written to slowmode_entries in batches by
+    flush_entries() and once more when the cog is unloaded. Entries that can't get anyone's message
+    deleted anymore are regularly dropped from both by prune_expired()."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        # channel_id -> (secs, ignore_privileged_users)
+        self.configuration: Dict[int, Tuple[float, bool]] = {}
+        # (channel_id, user_id) -> timestamp of the last post that wasn't deleted
+        self.last_posts: Dict[Tuple[int, int], datetime] = {}
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.flush_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        for row in await self.bot.db.fetchall(
+            """SELECT channel.primary_id AS channel_id, secs, ignore_privileged_users
+            FROM slowmode_configuration
+            JOIN objects AS channel ON channel.oid = slowmode_configuration.channel_oid""",
+            readonly=True,
+        ):
+            self.configuration[row["channel_id"]] = (
+                row["secs"],
+                bool(row["ignore_privileged_users"]),
+            )
+
+        for row in await self.bot.db.fetchall(
+            """SELECT channel.primary_id AS channel_id, user.primary_id AS user_id, timestamp
+            FROM slowmode_entries
+            JOIN objects AS channel ON channel.oid = slowmode_entries.channel_oid
+            JOIN objects AS user ON user.oid = slowmode_entries.user_oid""",
+            readonly=True,
+        ):
+            self.last_posts[(row["channel_id"], row["user_id"])] = (
+                datetime.fromtimestamp(row["timestamp"], tz=timezone.utc)
+            )
+
+        self.flush_entries.start()  # pylint: disable=no-member
+        self.prune_entries.start()  # pylint: disable=no-member
+
+    async def cog_unload(self):
+        self.flush_entries.cancel()  # pylint: disable=no-member
+        self.prune_entries.cancel()  # pylint: disable=no-member
+        await self.flush()
+
+    async def write_entries(self):
+        "Write all timestamps that changed since the last flush. flush_lock must be held."
+        if not self.dirty:
+            return
+
+        keys, self.dirty = self.dirty, set()
+        entries = [
+            (
+                channel_id,
+                user_id,
+                int(self.last_posts[(channel_id, user_id)].timestamp()),
+            )
+            for (channel_id, user_id) in keys
+            if (channel_id, user_id) in self.last_posts
+        ]
+        try:
+            # resolve objects in the same transaction, so a cold cache doesn't mean a commit each
+            async with self.bot.db.transaction():
+                rows = [
+                    {
+                        "channel_oid": await self.bot.objects.make_object(
+                            tc=channel_id
+                        ),
+                        "user_oid": await self.bot.objects.make_object(u=user_id),
+                        "timestamp": timestamp,
+                    }
+                    for (channel_id, user_id, timestamp) in entries
+                ]
+                await self.bot.db.executemany(
+                    """INSERT OR REPLACE INTO slowmode_entries(channel_oid, user_oid, timestamp)
+                    VALUES(:channel_oid, :user_oid, :timestamp)""",
+                    rows,
+                )
+        except Exception:
+            self.dirty |= keys
+            raise
+
+        # make_object() doesn't cache inside transactions, but now that they're committed we can
+        for (channel_id, user_id, _), row in zip(entries, rows):
+            self.bot.objects.remember(row["channel_oid"], {"tc": channel_id})
+            self.bot.objects.remember(row["user_oid"], {"u": user_id})
+
+        self.log.debug(f"Flushed {len(rows)} slowmode timestamps")
+
+    async def flush(self):
+        "Write all timestamps that changed since the last flush in one transaction."
+        async with self.flush_lock:
+            await self.write_entries()
+
+    def is_expired(self, channel_id: int, timestamp: datetime, now: datetime) -> bool:
+        "Return if a post at `timestamp` can no longer get a following message deleted."
+        channel_config = self.configuration.get(channel_id)
+        return not channel_config or now - timestamp > timedelta(
+            seconds=channel_config[0]
+        )
+
+    async def prune_expired(self) -> int:
+        """Delete all entries that are older than their channel's slowmode or belong to channels
+        without slowmode, both from memory and the database. Return how many rows were deleted.
+        """
+        async with self.flush_lock:
+            await self.write_entries()
+
+            now = datetime.now(timezone.utc)
+            for (channel_id, user_id), timestamp in list(self.last_posts.items()):
+                if self.is_expired(channel_id, timestamp, now):
+                    del self.last_posts[(channel_id, user_id)]
+
+            cursor = await self.bot.db.execute(
+                """DELETE FROM slowmode_entries
+                WHERE rowid IN (
+                    SELECT slowmode_entries.rowid
+                    FROM slowmode_configuration JOIN slowmode_entries USING (channel_oid)
+                    WHERE slowmode_entries.timestamp < :now - slowmode_configuration.secs
+                )
+                OR channel_oid NOT IN (
+                    SELECT channel_oid FROM slowmode_configuration WHERE secs > 0
+                )""",
+                {"now": int(now.timestamp())},
+            )
+            return cursor.rowcount
+
+    @tasks.loop(seconds=30)
+    async def flush_entries(self):
+        "Periodically persist changed slowmode timestamps."
+        try:
+            await self.flush()
+        except Exception as exc:  # pylint: disable=broad-except
+            self.log.error("Failed to flush slowmode timestamps", exc_info=exc)
+
+    @tasks.loop(hours=1)
+    async def prune_entries(self):
+        "Periodically get rid of slowmode timestamps that don't matter anymore."
+        try:
+            if count := await self.prune_expired():
+                self.log.info(f"Pruned {count} expired slowmode timestamps")
+        except Exception as exc:  # pylint: disable=broad-except
+            self.log.error("Failed to prune slowmode timestamps", exc_info=exc)
 
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def slowmode(self, ctx: Blimp.Context):
@@ -46,16 +191,35 @@ class Slowmode(Blimp.Cog):
         secs = duration.total_seconds()
         await channel.edit(slowmode_delay=min(21600, secs), reason=str(ctx.author))
 
-        ctx.database.execute(
-            """INSERT OR REPLACE INTO
-            slowmode_configuration(channel_oid, secs, ignore_privileged_users)
-            VALUES(:oid, :secs, :ignore_privileged_users)""",
-            {
-                "oid": ctx.objects.make_object(tc=channel.id),
-                "secs": secs,
-                "ignore_privileged_users": ignore_mods,
-            },
-        )
+        if secs:
+            await ctx.db.execute(
+                """INSERT OR REPLACE INTO
+                slowmode_configuration(channel_oid, secs, ignore_privileged_users)
+                VALUES(:oid, :secs, :ignore_privileged_users)""",
+                {
+                    "oid": await ctx.objects.make_object(tc=channel.id),
+                    "secs": secs,
+                    "ignore_privileged_users": ignore_mods,
+                },
+            )
+            self.configuration[channel.id] = (secs, ignore_mods)
+        else:
+            async with self.flush_lock:
+                self.configuration.pop(channel.id, None)
+                for key in [key for key in self.last_posts if key[0] == channel.id]:
+                    del self.last_posts[key]
+                    self.dirty.discard(key)
+
+                async with ctx.db.transaction():
+                    channel_oid = await ctx.objects.by_data(tc=channel.id)
+                    await ctx.db.execute(
+                        "DELETE FROM slowmode_configuration WHERE channel_oid=:oid",
+                        {"oid": channel_oid},
+                    )
+                    await ctx.db.execute(
+                        "DELETE FROM slowmode_entries WHERE channel_oid=:oid",
+                        {"oid": channel_oid},
+                    )
 
         await ctx.bot.post_log(
             channel.guild,
@@ -86,61 +250,60 @@ class Slowmode(Blimp.Cog):
         if not ctx.privileged_modify(channel):
             raise Unauthorized()
 
-        ctx.database.execute(
-            "DELETE FROM slowmode_entries WHERE channel_oid=:channel_oid AND user_oid=:user_oid",
-            {
-                "channel_oid": ctx.objects.by_data(tc=channel.id),
-                "user_oid": ctx.objects.by_data(u=user.id),
-            },
-        )
+        async with self.flush_lock:
+            self.last_posts.pop((channel.id, user.id), None)
+            self.dirty.discard((channel.id, user.id))
+            await ctx.db.execute(
+                """DELETE FROM slowmode_entries
+                WHERE channel_oid=:channel_oid AND user_oid=:user_oid""",
+                {
+                    "channel_oid": await ctx.objects.by_data(tc=channel.id),
+                    "user_oid": await ctx.objects.by_data(u=user.id),
+                },
+            )
         await ctx.reply(f"Deleted stored timestamp for {user} in {channel.mention}.")
 
+    @commands.command(parent=slowmode, name="prune")
+    async def _prune(self, ctx: Blimp.Context):
+        """Delete all stored timestamps that are too old to matter for their channel's slowmode,
+        or belong to channels that don't have slowmode anymore. Only usable by the bot owner.
+        """
+
+        if not await ctx.bot.is_owner(ctx.author):
+            raise Unauthorized()
+
+        count = await self.prune_expired()
+        await ctx.reply(f"Pruned {count} expired slowmode timestamps.")
+
     @Blimp.Cog.listener()
     async def on_message(self, msg: discord.Message):
         "Handle slowmode enforcement"
-        channel_config = self.bot.database.execute(
-            "SELECT * FROM slowmode_configuration WHERE channel_oid=:oid",
-            {"oid": self.bot.objects.by_data(tc=msg.channel.id)},
-        ).fetchone()
+        channel_config = self.configuration.get(msg.channel.id)
         if not channel_config:
             return
 
         if msg.author.bot:
             return
 
-        last_message = self.bot.database.execute(
-            "SELECT * FROM slowmode_entries WHERE channel_oid=:channel_oid AND user_oid=:user_oid",
-            {
-                "channel_oid": self.bot.objects.by_data(tc=msg.channel.id),
-                "user_oid": self.bot.objects.by_data(u=msg.author.id),
-            },
-        ).fetchone()
-
-        if not last_message or (
-            msg.created_at - datetime.fromisoformat(last_message["timestamp"])
-            > timedelta(seconds=channel_config["secs"])
+        secs, ignore_privileged_users = channel_config
+        key = (msg.channel.id, msg.author.id)
+        last_timestamp = self.last_posts.get(key)
+
+        if not last_timestamp or (
+            msg.created_at - last_timestamp > timedelta(seconds=secs)
         ):
-            self.bot.database.execute(
-                """INSERT OR REPLACE INTO slowmode_entries(channel_oid, user_oid, timestamp)
-                VALUES(:channel_oid, :user_oid, :timestamp)""",
-                {
-                    "channel_oid": self.bot.objects.make_object(tc=msg.channel.id),
-                    "user_oid": self.bot.objects.make_object(u=msg.author.id),
-                    "timestamp": msg.created_at,
-                },
-            )
+            self.last_posts[key] = msg.created_at
+            self.dirty.add(key)
 
         else:
-            if channel_config["ignore_privileged_users"] and (
+            if ignore_privileged_users and (
                 await self.bot.get_context(msg, cls=Blimp.Context)
             ).privileged_modify(msg.channel):
                 return
 
             await msg.delete()
 
-            remaining = timedelta(seconds=channel_config["secs"]) - (
-                msg.created_at - datetime.fromisoformat(last_message["timestamp"])
-            )
+            remaining = timedelta(seconds=secs) - (msg.created_at - last_timestamp)
             remaining = remaining - timedelta(microseconds=remaining.microseconds)
             await msg.author.send(
                 None,
@@ -0,0 +1,220 @@
+import contextlib
+import sqlite3
+import tempfile
+from datetime import timedelta
+from typing import Dict, Optional
+
+import discord
+
+from ..customizations import Blimp
+from ..jobs import Job
+from ..transcript import Transcript, TranscriptSummary
+from .tickets import TicketCategory
+
+
+class TicketArchive(Blimp.Cog):
+    "Putting tickets to rest, with a transcript for the road."
+
+    async def cog_load(self):
+        self.bot.jobs.register("ticket_archive", self.archive)
+
+    async def transcript_channel(
+        self, category: Optional[TicketCategory]
+    ) -> Optional[discord.TextChannel]:
+        "Return the channel a ticket category's transcripts go to, if both still exist."
+        if not category:
+            return None
+
+        channel_obj = await self.bot.objects.by_oid(category.transcript_channel_oid)
+        return channel_obj and self.bot.get_channel(channel_obj["tc"])
+
+    async def archive(self, job: Job):
+        """Post the transcript of a ticket to its transcript channel and, if configured, its
+        participants, then delete it. Where the transcript has already been sent is kept in the
+        job, so retries don't send it twice."""
+
+        channel = self.bot.get_channel(job.payload["channel_id"])
+        channel_oid = await self.bot.objects.by_data(tc=job.payload["channel_id"])
+        ticket = await self.bot.db.fetchone(
+            "SELECT * FROM ticket_entries WHERE channel_oid = :channel_oid",
+            {"channel_oid": channel_oid},
+        )
+        if not ticket:
+            return
+
+        if not channel:
+            # deleted by hand, so there's nothing left to transcribe
+            await self.forget(ticket, job.payload["channel_id"])
+            return
+
+        category = await self.bot.get_cog("Tickets").category_config(
+            ticket["category_oid"]
+        )
+        transcript_channel = await self.transcript_channel(category)
+        if not transcript_channel:
+            # retrying won't bring either back, so leave the ticket be until that's sorted out
+            reason = (
+                "its transcript channel doesn't exist anymore"
+                if category
+                else "its category isn't a ticket category anymore"
+            )
+            self.log.warning(f"Not archiving ticket {channel.name}, {reason}")
+            await job.report(
+                f"Couldn't delete ticket {channel.mention}, {reason}. Fix the category and delete "
+                "the ticket again, or delete the channel by hand.",
+                color=Blimp.Context.Color.BAD,
+            )
+            return
+
+        archive_embed = self.archive_embed(job, channel, ticket)
+
+        # the parts stay open until every upload is done, so they're streamed from disk
+        with contextlib.ExitStack() as parts:
+            summary = await Transcript.write_transcript(
+                lambda: parts.enter_context(tempfile.TemporaryFile()),
+                channel,
+                max_size=channel.guild.filesize_limit,
+                concurrency=self.bot.config.getint(
+                    "transcripts", "concurrency", fallback=1
+                ),
+                pages_per_second=self.bot.config.getfloat(
+                    "transcripts", "pages_per_second", fallback=0
+                ),
+                messages=(
+                    self.bot.get_cog("TicketJournal").journal(channel_oid)
+                    if ticket["journal"]
+                    else None
+                ),
+            )
+
+            archive_embed.add_field(
+                name="Participants",
+                value="\n".join(user.mention for user in summary.participants),
+            )
+
+            # the transcript channel is the one place the transcript has to end up, so if that
+            # doesn't work, let the job fail and try again
+            if transcript_channel.id not in job.payload["sent"]:
+                await Transcript.send(
+                    transcript_channel,
+                    channel,
+                    summary,
+                    embed=archive_embed,
+                )
+                job.payload["sent"].append(transcript_channel.id)
+                await job.save()
+
+            failures = {}
+            if category.dm_transcript:
+                failures = await self.send_to_participants(
+                    job, channel, summary, archive_embed
+                )
+
+        await self.forget(ticket, channel.id)
+        await channel.delete()
+        log_embed = discord.Embed(
+            description=f"<@{job.payload['author_id']}> deleted ticket {channel.name} "
+            f"[{channel.mention}].",
+            color=Blimp.Context.Color.I_GUESS,
+        )
+        if failures:
+            undelivered = "\n".join(
+                f"{user.mention}: {getattr(ex, 'text', None) or ex}"
+                for user, ex in failures.items()
+            )
+            if len(undelivered) > 1024:
+                undelivered = undelivered[:1023] + "…"
+            log_embed.add_field(name="Transcript not delivered to", value=undelivered)
+        await job.report(embed=log_embed)
+
+    @staticmethod
+    def archive_embed(
+        job: Job, channel: discord.TextChannel, ticket: sqlite3.Row
+    ) -> discord.Embed:
+        "Return the embed that goes along with a ticket's transcript."
+        created_timestamp = channel.created_at - timedelta(
+            microseconds=channel.created_at.microsecond
+        )
+        return (
+            discord.Embed(
+                title=f"#{channel.name}",
+                color=Blimp.Context.Color.I_GUESS,
+            )
+            .add_field(
+                name="Created",
+                value=str(created_timestamp) + f"\n<@{ticket['creator_id']}>",
+            )
+            .add_field(
+                name="Deleted",
+                value=job.payload["deleted_at"] + f"\n<@{job.payload['author_id']}>",
+            )
+        )
+
+    async def send_to_participants(
+        self,
+        job: Job,
+        channel: discord.TextChannel,
+        summary: TranscriptSummary,
+        embed: discord.Embed,
+    ) -> Dict[discord.abc.User, Exception]:
+        """DM a ticket's transcript to everyone added to it that hasn't gotten it yet. Return who
+        couldn't be reached and why."""
+
+        channel_oid = await self.bot.objects.by_data(tc=channel.id)
+        recipients = [
+            user
+            for (user_id,) in await self.bot.db.fetchall(
+                "SELECT user_id FROM ticket_participants WHERE channel_oid=:channel_oid",
+                {"channel_oid": channel_oid},
+            )
+            if (user := self.bot.get_user(user_id))
+            and user.id not in job.payload["sent"]
+        ]
+        failures = await Transcript.fan_out(
+            recipients,
+            channel,
+            summary,
+            concurrency=self.bot.config.getint("transcripts", "fan_out", fallback=4),
+            embed=embed,
+        )
+        for user, ex in failures.items():
+            self.log.warning(
+                f"Couldn't send transcript of {channel.name} to {user}",
+                exc_info=ex,
+            )
+        job.payload["sent"].extend(
+            user.id for user in recipients if user not in failures
+        )
+        await job.save()
+        return failures
+
+    async def forget(self, ticket: sqlite3.Row, channel_id: int):
+        "Delete everything stored about a ticket, including the triggers on its messages."
+        async with self.bot.db.transaction():
+            await self.bot.db.execute(
+                "DELETE FROM ticket_participants WHERE channel_oid = :channel_oid",
+                {"channel_oid": ticket["channel_oid"]},
+            )
+            await self.bot.db.execute(
+                "DELETE FROM ticket_entries WHERE channel_oid = :channel_oid",
+                {"channel_oid": ticket["channel_oid"]},
+            )
+            await self.bot.db.execute(
+                "DELETE FROM ticket_journal WHERE channel_oid=:channel_oid",
+                {"channel_oid": ticket["channel_oid"]},
+            )
+            # whichever message the welcome trigger ended up on, it's in the ticket's channel
+            triggers = await self.bot.db.fetchall(
+                """SELECT DISTINCT message.secondary_id AS message_id FROM trigger_entries
+                JOIN objects AS message ON message.oid = trigger_entries.message_oid
+                WHERE message.kind = 'm' AND message.primary_id = :channel_id""",
+                {"channel_id": channel_id},
+            )
+            await self.bot.db.execute(
+                """DELETE FROM trigger_entries WHERE message_oid IN
+                (SELECT oid FROM objects WHERE kind = 'm' AND primary_id = :channel_id)""",
+                {"channel_id": channel_id},
+            )
+        for row in triggers:
+            self.bot.reactions.unwatch("trigger", row["message_id"])
+        self.bot.get_cog("TicketJournal").journaled.discard(channel_id)
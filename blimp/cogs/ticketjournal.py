@@ -0,0 +1,123 @@
+import itertools
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional, Set
+
+import discord
+
+from ..customizations import Blimp
+from ..transcript import JournalMessage
+
+
+class TicketJournal(Blimp.Cog):
+    "Writing down everything said in tickets that want it, as it's said."
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        # channel IDs of open tickets whose messages are journaled
+        self.journaled: Set[int] = set()
+
+    async def cog_load(self):
+        for row in await self.bot.db.fetchall(
+            """SELECT channel.primary_id AS channel_id FROM ticket_entries
+            JOIN objects AS channel ON channel.oid = ticket_entries.channel_oid
+            WHERE journal""",
+            readonly=True,
+        ):
+            self.journaled.add(row["channel_id"])
+
+    async def record(
+        self, channel_id: int, timestamp: datetime, revisions: Dict[int, Optional[str]]
+    ):
+        """Append revisions of messages, keyed by message ID, to a ticket's journal. A revision is
+        the output of JournalMessage.dump(), or None if the message was deleted. Deletions of
+        messages that were never journaled and revisions identical to the previous one (e.g. when
+        a message gets pinned) are ignored."""
+
+        channel_oid = await self.bot.objects.by_data(tc=channel_id)
+        await self.bot.db.executemany(
+            """INSERT INTO ticket_journal(channel_oid, message_id, revision, timestamp, data)
+            SELECT :channel_oid, :message_id, coalesce(max(revision) + 1, 0), :timestamp, :data
+            FROM ticket_journal WHERE channel_oid=:channel_oid AND message_id=:message_id
+            HAVING (:data IS NOT NULL OR count(*) > 0) AND :data IS NOT (
+                SELECT data FROM ticket_journal
+                WHERE channel_oid=:channel_oid AND message_id=:message_id
+                ORDER BY revision DESC LIMIT 1
+            )""",
+            [
+                {
+                    "channel_oid": channel_oid,
+                    "message_id": message_id,
+                    "timestamp": int(timestamp.timestamp()),
+                    "data": data,
+                }
+                for message_id, data in revisions.items()
+            ],
+        )
+
+    async def journal(self, channel_oid: int) -> AsyncIterator[JournalMessage]:
+        "Read a ticket's journal back as messages, oldest first, a page of messages at a time."
+        last_id = 0
+        while True:
+            rows = await self.bot.db.fetchall(
+                """SELECT message_id, timestamp, data FROM ticket_journal
+                WHERE channel_oid=:channel_oid AND message_id IN (
+                    SELECT DISTINCT message_id FROM ticket_journal
+                    WHERE channel_oid=:channel_oid AND message_id>:last_id
+                    ORDER BY message_id LIMIT 100
+                )
+                ORDER BY message_id, revision""",
+                {"channel_oid": channel_oid, "last_id": last_id},
+                readonly=True,
+            )
+            if not rows:
+                return
+
+            for message_id, revisions in itertools.groupby(
+                rows, key=lambda row: row["message_id"]
+            ):
+                yield JournalMessage(
+                    message_id, [(row["timestamp"], row["data"]) for row in revisions]
+                )
+            last_id = rows[-1]["message_id"]
+
+    @Blimp.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        "Journal new messages in tickets that want it."
+        if message.channel.id in self.journaled and not message.is_system():
+            await self.record(
+                message.channel.id,
+                message.created_at,
+                {message.id: JournalMessage.dump(message)},
+            )
+
+    @Blimp.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        "Journal edits in tickets that want it. Embeds being added to links don't count."
+        if payload.channel_id in self.journaled and payload.message.edited_at:
+            await self.record(
+                payload.channel_id,
+                payload.message.edited_at,
+                {payload.message_id: JournalMessage.dump(payload.message)},
+            )
+
+    @Blimp.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        "Journal deletions in tickets that want it."
+        if payload.channel_id in self.journaled:
+            await self.record(
+                payload.channel_id,
+                datetime.now(timezone.utc),
+                {payload.message_id: None},
+            )
+
+    @Blimp.Cog.listener()
+    async def on_raw_bulk_message_delete(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ):
+        "Journal bulk deletions in tickets that want it."
+        if payload.channel_id in self.journaled:
+            await self.record(
+                payload.channel_id,
+                datetime.now(timezone.utc),
+                dict.fromkeys(payload.message_ids),
+            )
@@ -1,15 +1,16 @@
-import sqlite3
-import tempfile
-from datetime import timedelta
-from typing import Optional
+import asyncio
+import contextlib
+import statistics
+import time
+from collections import Counter, deque
+from typing import AsyncIterator, Deque, Dict, NamedTuple, Optional, Tuple
 
 import discord
 import toml
 from discord.ext import commands
 
-from ..customizations import Blimp
-from ..message_formatter import create_message_dict
-from ..transcript import Transcript
+from ..customizations import Blimp, clean_timestamp
+from ..message_formatter import message_dict_from_toml
 from .alias import (
     MaybeAliasedCategoryChannel,
     MaybeAliasedTextChannel,
@@ -18,9 +19,98 @@ from .alias import (
 )
 
 
+class TicketClass(NamedTuple):
+    "A ticket class, with its description already parsed if it's TOML."
+
+    name: str
+    description: str
+    template: Optional[dict]
+
+    def message_dict(self, channel: discord.TextChannel) -> dict:
+        "Return the description as a dict for a message create call, like create_message_dict()."
+        if self.template is None:
+            return {"content": self.description}
+
+        return message_dict_from_toml(self.template, channel)
+
+
+class TicketCategory(NamedTuple):
+    """The configuration of a ticket category and its classes. The ticket counter isn't part of
+    it, as it changes with every ticket."""
+
+    category_oid: int
+    transcript_channel_oid: int
+    per_user_limit: Optional[int]
+    can_creator_close: bool
+    dm_transcript: bool
+    journal: bool
+    classes: Tuple[TicketClass, ...]
+
+
 class Tickets(Blimp.Cog):
     "Honorary citizen #23687, please! Don't push."
 
+    def __init__(self, bot):
+        super().__init__(bot)
+        # seconds from `ticket open` until each stage was reached, for the most recent tickets
+        self.open_latencies: Dict[str, Deque[float]] = {
+            stage: deque(maxlen=1000) for stage in ("channel", "welcome", "ready")
+        }
+        # (category OID, user ID) to how many tickets the user is opening there right now, which
+        # count towards the per-user limit until their row is saved
+        self.opening: Counter = Counter()
+        # category OIDs to their configuration, dropped whenever it's updated
+        self.categories: Dict[int, TicketCategory] = {}
+        # bumped whenever a configuration is dropped, so a lookup that was already reading the
+        # database doesn't put back what was there before the update
+        self.categories_generation = 0
+
+    async def category_config(self, category_oid: int) -> Optional[TicketCategory]:
+        "Return the configuration of a ticket category, or None if it isn't one."
+        if config := self.categories.get(category_oid):
+            return config
+
+        generation = self.categories_generation
+        row = await self.bot.db.fetchone(
+            "SELECT * FROM ticket_categories WHERE category_oid=:category_oid",
+            {"category_oid": category_oid},
+            readonly=True,
+        )
+        if not row:
+            return None
+
+        classes = []
+        for class_row in await self.bot.db.fetchall(
+            "SELECT * FROM ticket_classes WHERE category_oid=:category_oid",
+            {"category_oid": category_oid},
+            readonly=True,
+        ):
+            try:
+                template = toml.loads(class_row["description"])
+            except toml.TomlDecodeError:
+                template = None
+            classes.append(
+                TicketClass(class_row["name"], class_row["description"], template)
+            )
+
+        config = TicketCategory(
+            category_oid=category_oid,
+            transcript_channel_oid=row["transcript_channel_oid"],
+            per_user_limit=row["per_user_limit"],
+            can_creator_close=bool(row["can_creator_close"]),
+            dm_transcript=bool(row["dm_transcript"]),
+            journal=bool(row["journal"]),
+            classes=tuple(classes),
+        )
+        if generation == self.categories_generation:
+            self.categories[category_oid] = config
+        return config
+
+    def invalidate_category(self, category_oid: int):
+        "Drop the cached configuration of a ticket category after it was updated."
+        self.categories.pop(category_oid, None)
+        self.categories_generation += 1
+
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def ticket(self, ctx: Blimp.Context):
         """Tickets are temporary private channels created by a user to, for example, request
@@ -78,12 +168,12 @@ class Tickets(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM ticket_categories WHERE category_oid=:category_oid",
-            {"category_oid": ctx.objects.by_data(cc=category.id)},
-        ).fetchone()
+            {"category_oid": await ctx.objects.by_data(cc=category.id)},
+        )
         if old:
-            transcript_obj = ctx.objects.by_oid(old["transcript_channel_oid"])
+            transcript_obj = await ctx.objects.by_oid(old["transcript_channel_oid"])
             log_embed.add_field(
                 name="Old",
                 value=f"Last Ticket: {old['count']}\n"
@@ -93,26 +183,29 @@ class Tickets(Blimp.Cog):
                 f"Per-User Limit: {old['per_user_limit']}",
             )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT OR REPLACE INTO
             ticket_categories(category_oid, guild_oid, count, transcript_channel_oid,
-                per_user_limit, can_creator_close, dm_transcript)
+                per_user_limit, can_creator_close, dm_transcript, journal)
 
             VALUES(:category_oid, :guild_oid, :count, :transcript_channel_oid, :per_user_limit,
-                :can_creator_close, :dm_transcript)""",
+                :can_creator_close, :dm_transcript, :journal)""",
             {
-                "category_oid": ctx.objects.make_object(cc=category.id),
-                "guild_oid": ctx.objects.make_object(g=category.guild.id),
+                "category_oid": await ctx.objects.make_object(cc=category.id),
+                "guild_oid": await ctx.objects.make_object(g=category.guild.id),
                 "count": last_ticket_number,
-                "transcript_channel_oid": ctx.objects.make_object(
+                "transcript_channel_oid": await ctx.objects.make_object(
                     tc=transcript_channel.id
                 ),
                 "per_user_limit": per_user_limit,
                 "can_creator_close": is_creator_staff,
                 "dm_transcript": dm_transcript_to_users,
+                "journal": bool(old and old["journal"]),
             },
         )
 
+        self.invalidate_category(await ctx.objects.by_data(cc=category.id))
+
         log_embed.add_field(
             name="New",
             value=f"Last Ticket: {last_ticket_number}\n"
@@ -126,6 +219,47 @@ class Tickets(Blimp.Cog):
 
         await ctx.reply(f"Updated ticket category {category.name}.")
 
+    @commands.command(parent=ticket, name="journal")
+    async def _journal(
+        self,
+        ctx: Blimp.Context,
+        category: MaybeAliasedCategoryChannel,
+        enabled: bool,
+    ):
+        """Set whether new Tickets in a category keep a journal of their messages.
+
+        `category` is the Ticket category to configure.
+
+        `enabled` determines if messages sent in new Tickets, including later edits and deletions,
+        are recorded by BLIMP as they happen. Transcripts of such Tickets are created from that
+        record, which is faster and includes edited and deleted messages. Tickets that are already
+        open aren't affected."""
+
+        if not ctx.privileged_modify(category.guild):
+            raise Unauthorized()
+
+        cursor = await ctx.db.execute(
+            "UPDATE ticket_categories SET journal=:journal WHERE category_oid=:category_oid",
+            {
+                "journal": enabled,
+                "category_oid": await ctx.objects.by_data(cc=category.id),
+            },
+        )
+        if not cursor.rowcount:
+            raise UnableToComply(f"{category.name} isn't a ticket category.")
+        self.invalidate_category(await ctx.objects.by_data(cc=category.id))
+
+        await self.bot.post_log(
+            category.guild,
+            f"{ctx.author} {'enabled' if enabled else 'disabled'} journaling "
+            f"for ticket category {category.name}.",
+            color=ctx.Color.I_GUESS,
+        )
+        await ctx.reply(
+            f"{'Enabled' if enabled else 'Disabled'} journaling for new tickets "
+            f"in {category.name}."
+        )
+
     @commands.command(parent=ticket)
     async def updateclass(
         self,
@@ -158,27 +292,29 @@ class Tickets(Blimp.Cog):
         except toml.TomlDecodeError:
             pass
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM ticket_classes WHERE category_oid=:category_oid and name=:name",
-            {"category_oid": ctx.objects.by_data(cc=category.id), "name": name},
-        ).fetchone()
+            {"category_oid": await ctx.objects.by_data(cc=category.id), "name": name},
+        )
         if old:
             log_embed.add_field(
                 name="Old Description",
                 value=old["description"],
             )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT OR REPLACE INTO
         ticket_classes(category_oid, name, description)
         VALUES(:category_oid, :name, :description)""",
             {
-                "category_oid": ctx.objects.make_object(cc=category.id),
+                "category_oid": await ctx.objects.make_object(cc=category.id),
                 "name": name,
                 "description": description,
             },
         )
 
+        self.invalidate_category(await ctx.objects.by_data(cc=category.id))
+
         log_embed.add_field(
             name="New Description",
             value=description,
@@ -203,6 +339,8 @@ class Tickets(Blimp.Cog):
         `ticket_class` is the class the new ticket should have. If the category only has one, this
         can be left out."""
 
+        started = time.perf_counter()
+
         # Since we can't actually change the perms *on the category*, since all ticket channels
         # would inherit them, check if they're able to see the category with an unmodified client by
         # checking if they can see any channel in it
@@ -212,138 +350,287 @@ class Tickets(Blimp.Cog):
         ) and not ctx.privileged_modify(category):
             raise Unauthorized()
 
-        with ctx.database as trans:
-            ticket_category = trans.execute(
-                "SELECT * FROM ticket_categories WHERE category_oid=:category_oid",
-                {"category_oid": ctx.objects.by_data(cc=category.id)},
-            ).fetchone()
-            if not ticket_category:
+        ticket_category = await self.category_config(
+            await ctx.objects.by_data(cc=category.id)
+        )
+        if not ticket_category:
+            return
+
+        actual_class = None
+        ticket_classes = ticket_category.classes
+        if len(ticket_classes) == 1:
+            actual_class = ticket_classes[0]
+        else:
+            actual_class_candidates = [
+                cl for cl in ticket_classes if cl.name == ticket_class
+            ]
+            if len(actual_class_candidates) != 1:
                 return
 
-            actual_class = None
-            ticket_classes = trans.execute(
-                "SELECT * FROM ticket_classes WHERE category_oid=:category_oid",
-                {"category_oid": ctx.objects.by_data(cc=category.id)},
-            ).fetchall()
-            if len(ticket_classes) == 1:
-                actual_class = ticket_classes[0]
-            else:
-                actual_class_candidates = [
-                    cl for cl in ticket_classes if cl["name"] == ticket_class
-                ]
-                if len(actual_class_candidates) != 1:
-                    return
-
-                actual_class = actual_class_candidates[0]
-
-            if ticket_category["per_user_limit"] and not ctx.privileged_modify(
-                category
-            ):
-                count = trans.execute(
+            actual_class = actual_class_candidates[0]
+
+        async with self.reserve_number(ctx, category, ticket_category) as number:
+            ticket_channel = await self.create_channel(
+                ctx, category, ticket_category, actual_class, number
+            )
+
+        if ticket_category.journal:
+            self.bot.get_cog("TicketJournal").journaled.add(ticket_channel.id)
+        self.open_latencies["channel"].append(time.perf_counter() - started)
+
+        await self.announce(
+            ctx, ticket_category, actual_class, ticket_channel, number, started=started
+        )
+        self.open_latencies["ready"].append(time.perf_counter() - started)
+
+    @contextlib.asynccontextmanager
+    async def reserve_number(
+        self,
+        ctx: Blimp.Context,
+        category: discord.CategoryChannel,
+        ticket_category: TicketCategory,
+    ) -> AsyncIterator[int]:
+        """Reserve the next ticket number in a category, enforcing the per-user limit, and count
+        the ticket towards that limit until the block is done."""
+
+        # reserve a ticket number without waiting on Discord, so other writes aren't held up by
+        # the channel creation. If that fails, create_channel() hands the number back.
+        opening = (ticket_category.category_oid, ctx.author.id)
+        async with ctx.db.transaction():
+            if ticket_category.per_user_limit and not ctx.privileged_modify(category):
+                count = await ctx.db.fetchone(
                     """SELECT count(*) FROM ticket_entries WHERE
                     creator_id=:creator_id AND category_oid=:category_oid""",
                     {
                         "creator_id": ctx.author.id,
-                        "category_oid": ctx.objects.by_data(cc=category.id),
+                        "category_oid": ticket_category.category_oid,
                     },
-                ).fetchone()
-                if count[0] >= ticket_category["per_user_limit"]:
+                )
+                if count[0] + self.opening[opening] >= ticket_category.per_user_limit:
                     raise Unauthorized(
-                        f"You can only open {ticket_category['per_user_limit']} tickets in this"
+                        f"You can only open {ticket_category.per_user_limit} tickets in this"
                         "category at once."
                     )
 
-            ticket_channel = None
-
-            try:
-                ticket_channel = await category.create_text_channel(
-                    f"{actual_class['name']}-{(ticket_category['count'] + 1)}",
-                    reason=f"Ticket in {category.name} for {ctx.author}",
-                    overwrites={
-                        **category.overwrites,
-                        ctx.author: discord.PermissionOverwrite(
-                            read_messages=True, send_messages=True
-                        ),
-                    },
+            number = (
+                await ctx.db.fetchall(
+                    """UPDATE ticket_categories SET count=count + 1
+                    WHERE category_oid=:category_oid RETURNING count""",
+                    {"category_oid": ticket_category.category_oid},
                 )
-            except discord.HTTPException as ex:
-                if "Maximum number of channels in category reached" in ex.text:
-                    raise UnableToComply(
-                        "The channel limit for this category has been reached.\nThis is a Discord "
-                        "limitation, please contact server staff."
-                    ) from ex
+            )[0]["count"]
+            self.opening[opening] += 1
 
-                raise ex
-
-            trans.execute(
-                "UPDATE ticket_categories SET count=:count WHERE category_oid=:category_oid",
-                {
-                    "count": ticket_category["count"] + 1,
-                    "category_oid": ticket_category["category_oid"],
-                },
-            )
-
-            trans.execute(
-                """INSERT INTO ticket_entries(channel_oid, category_oid, creator_id, open)
-            VALUES(:channel_oid, :category_oid, :creator_id, 1)""",
-                {
-                    "category_oid": ticket_category["category_oid"],
-                    "channel_oid": ctx.objects.make_object(tc=ticket_channel.id),
-                    "creator_id": ctx.author.id,
-                },
-            )
+        try:
+            yield number
+        finally:
+            self.opening[opening] -= 1
+            if not self.opening[opening]:
+                del self.opening[opening]
 
-            trans.execute(
-                """INSERT INTO ticket_participants(channel_oid, user_id)
-                VALUES(:channel_oid, :user_id)""",
-                {
-                    "channel_oid": ctx.objects.make_object(tc=ticket_channel.id),
-                    "user_id": ctx.author.id,
-                },
-            )
+    async def announce(  # pylint: disable=too-many-arguments
+        self,
+        ctx: Blimp.Context,
+        ticket_category: TicketCategory,
+        ticket_class: TicketClass,
+        ticket_channel: discord.TextChannel,
+        number: int,
+        *,
+        started: float,
+    ):
+        """Post the welcome of a new ticket, log it, and set up the pinned message's reaction to
+        delete it."""
 
-            await ctx.bot.post_log(
+        first_message, *other_messages = self.welcome_messages(
+            ctx, ticket_category, ticket_class, ticket_channel, number
+        )
+        initial_message, _ = await asyncio.gather(
+            ticket_channel.send(**first_message),
+            ctx.bot.post_log(
                 ticket_channel.guild,
                 f"{ctx.author} opened ticket {ticket_channel.name} [{ticket_channel.mention}].",
                 color=ctx.Color.I_GUESS,
-            )
-
-        initial_message = await ticket_channel.send(
-            ctx.author.mention,
-            embed=discord.Embed(
-                title=f"Welcome to {actual_class['name']}-{ticket_category['count'] + 1}!\n",
-                description=(
-                    f"Delete this ticket using :x: or `ticket{ctx.bot.suffix} delete`\n"
-                    + "Add or remove participants using "
-                    + f"`ticket{ctx.bot.suffix} add` and `ticket{ctx.bot.suffix} remove`\n\n"
-                    + "These commands are restricted to Staff members"
-                    + (
-                        " and the ticket creator."
-                        if ticket_category["can_creator_close"]
-                        else "."
-                    )
-                ),
-                color=ctx.Color.AUTOMATIC_BLUE,
-            ).set_footer(text="BLIMP Tickets", icon_url=ctx.bot.user.avatar),
-        )
-        await initial_message.pin()
-        await ticket_channel.purge(limit=1, check=lambda m: m.author == self.bot.user)
-        await ticket_channel.send(
-            **create_message_dict(actual_class["description"], ticket_channel)
+            ),
         )
-        ctx.database.execute(
+        self.open_latencies["welcome"].append(time.perf_counter() - started)
+
+        # the trigger goes first, so the reaction works as soon as it's there
+        await ctx.db.execute(
             """INSERT INTO
             trigger_entries(message_oid, emoji, command)
             VALUES(:message_oid, :emoji, :command)""",
             {
-                "message_oid": ctx.objects.make_object(
+                "message_oid": await ctx.objects.make_object(
                     m=[initial_message.channel.id, initial_message.id]
                 ),
                 "emoji": "\N{CROSS MARK}",
                 "command": f"ticket{self.bot.suffix} delete",
             },
         )
-        await initial_message.add_reaction("\N{CROSS MARK}")
+        self.bot.reactions.watch("trigger", initial_message.id)
+
+        async def pin():
+            # wait for the notice about this very pin instead of deleting whatever came last
+            notice = asyncio.create_task(
+                self.bot.wait_for(
+                    "message",
+                    check=lambda m: m.channel == ticket_channel
+                    and m.type == discord.MessageType.pins_add,
+                    timeout=10,
+                )
+            )
+            try:
+                await initial_message.pin()
+                await (await notice).delete()
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                notice.cancel()
+
+        await asyncio.gather(
+            pin(),
+            *(ticket_channel.send(**message) for message in other_messages),
+            initial_message.add_reaction("\N{CROSS MARK}"),
+        )
+
+    @staticmethod
+    def welcome_messages(  # pylint: disable=too-many-arguments
+        ctx: Blimp.Context,
+        ticket_category: TicketCategory,
+        ticket_class: TicketClass,
+        ticket_channel: discord.TextChannel,
+        number: int,
+    ) -> Tuple[dict, ...]:
+        """Return the messages a new ticket starts with, as dicts for message create calls. The
+        welcome and the class description go out as one message, unless their text together is
+        too long for that."""
+
+        welcome = discord.Embed(
+            title=f"Welcome to {ticket_class.name}-{number}!\n",
+            description=(
+                f"Delete this ticket using :x: or `ticket{ctx.bot.suffix} delete`\n"
+                + "Add or remove participants using "
+                + f"`ticket{ctx.bot.suffix} add` and `ticket{ctx.bot.suffix} remove`\n\n"
+                + "These commands are restricted to Staff members"
+                + (
+                    " and the ticket creator."
+                    if ticket_category.can_creator_close
+                    else "."
+                )
+            ),
+            color=ctx.Color.AUTOMATIC_BLUE,
+        ).set_footer(text="BLIMP Tickets", icon_url=ctx.bot.user.avatar)
+
+        description = ticket_class.message_dict(ticket_channel)
+        content = "\n".join(filter(None, (ctx.author.mention, description["content"])))
+        if len(content) > 2000:
+            return {"content": ctx.author.mention, "embed": welcome}, description
+
+        combined = {key: value for key, value in description.items() if key != "embed"}
+        combined["content"] = content
+        combined["embeds"] = [welcome] + (
+            [description["embed"]] if description.get("embed") else []
+        )
+        return (combined,)
+
+    async def create_channel(  # pylint: disable=too-many-arguments
+        self,
+        ctx: Blimp.Context,
+        category: discord.CategoryChannel,
+        ticket_category: TicketCategory,
+        ticket_class: TicketClass,
+        number: int,
+    ) -> discord.TextChannel:
+        """Create the channel of a ticket with a reserved number and save the ticket. If the
+        channel can't be created, the number is handed back if possible."""
+
+        try:
+            ticket_channel = await category.create_text_channel(
+                f"{ticket_class.name}-{number}",
+                reason=f"Ticket in {category.name} for {ctx.author}",
+                overwrites={
+                    **category.overwrites,
+                    ctx.author: discord.PermissionOverwrite(
+                        read_messages=True, send_messages=True
+                    ),
+                },
+            )
+        except discord.HTTPException as ex:
+            # only possible if nobody reserved a number in the meantime, otherwise leave a gap
+            await ctx.db.execute(
+                """UPDATE ticket_categories SET count=count - 1
+                WHERE category_oid=:category_oid AND count=:number""",
+                {"category_oid": ticket_category.category_oid, "number": number},
+            )
+            if "Maximum number of channels in category reached" in ex.text:
+                raise UnableToComply(
+                    "The channel limit for this category has been reached.\nThis is a Discord "
+                    "limitation, please contact server staff."
+                ) from ex
+
+            raise ex
+
+        try:
+            async with ctx.db.transaction():
+                channel_oid = await ctx.objects.make_object(tc=ticket_channel.id)
+                await ctx.db.execute(
+                    """INSERT INTO ticket_entries(channel_oid, category_oid, creator_id, open,
+                        journal)
+                    VALUES(:channel_oid, :category_oid, :creator_id, 1, :journal)""",
+                    {
+                        "category_oid": ticket_category.category_oid,
+                        "channel_oid": channel_oid,
+                        "creator_id": ctx.author.id,
+                        "journal": ticket_category.journal,
+                    },
+                )
+                await ctx.db.execute(
+                    """INSERT INTO ticket_participants(channel_oid, user_id)
+                    VALUES(:channel_oid, :user_id)""",
+                    {"channel_oid": channel_oid, "user_id": ctx.author.id},
+                )
+        except Exception:
+            await ticket_channel.delete(reason="Couldn't save ticket")
+            raise
+
+        return ticket_channel
+
+    def open_latency_info(self) -> dict:
+        """Return the median and 99th percentile of how many seconds recent tickets took until
+        their channel existed, their welcome message was posted, and they were fully set up.
+        """
+        info = {}
+        for stage, samples in self.open_latencies.items():
+            if len(samples) < 2:
+                continue
+
+            percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+            info[stage] = {
+                "count": len(samples),
+                "p50": percentiles[49],
+                "p99": percentiles[98],
+            }
+
+        return info
+
+    @commands.command(parent=ticket)
+    async def latency(self, ctx: Blimp.Context):
+        """Show how long recent tickets took to open, until their channel existed, their welcome
+        message was posted and they were fully set up. Only usable by the bot owner."""
+
+        if not await ctx.bot.is_owner(ctx.author):
+            raise Unauthorized()
+
+        info = self.open_latency_info()
+        await ctx.reply(
+            "\n".join(
+                f"**{stage}**: p50 {stats['p50']:.2f}s, p99 {stats['p99']:.2f}s "
+                f"({stats['count']} tickets)"
+                for stage, stats in info.items()
+            )
+            or "Not enough tickets have been opened yet.",
+            subtitle="Ticket open latency",
+        )
 
     @commands.command(parent=ticket)
     async def delete(
@@ -359,106 +646,47 @@ class Tickets(Blimp.Cog):
         if not channel:
             channel = ctx.channel
 
-        ticket = ctx.database.execute(
+        ticket = await ctx.db.fetchone(
             "SELECT * FROM ticket_entries WHERE channel_oid = :channel_oid",
-            {"channel_oid": ctx.objects.by_data(tc=channel.id)},
-        ).fetchone()
+            {"channel_oid": await ctx.objects.by_data(tc=channel.id)},
+        )
         if not ticket:
             return
 
-        category = ctx.database.execute(
-            "SELECT * from ticket_categories WHERE category_oid=:category_oid",
-            {"category_oid": ticket["category_oid"]},
-        ).fetchone()
+        category = await self.category_config(ticket["category_oid"])
 
         if not (
             ctx.privileged_modify(channel)
-            or (category["can_creator_close"] and ctx.author.id == ticket["creator_id"])
+            or (category.can_creator_close and ctx.author.id == ticket["creator_id"])
         ):
             raise Unauthorized(
                 "Only Staff "
-                + ("and the ticket owner " if category["can_creator_close"] else "")
+                + ("and the ticket owner " if category.can_creator_close else "")
                 + "can close this ticket."
             )
 
-        await ctx.reply("Saving transcript…")
-        transcript_channel_obj = ctx.objects.by_oid(category["transcript_channel_oid"])
-        transcript_channel = self.bot.get_channel(transcript_channel_obj["tc"])
-
-        created_timestamp = channel.created_at - timedelta(
-            microseconds=channel.created_at.microsecond
-        )
-        deleted_timestamp = ctx.message.created_at - timedelta(
-            microseconds=ctx.message.created_at.microsecond
-        )
-        archive_embed = (
-            discord.Embed(
-                title=f"#{channel.name}",
-                color=ctx.Color.I_GUESS,
-            )
-            .add_field(
-                name="Created",
-                value=str(created_timestamp) + f"\n<@{ticket['creator_id']}>",
-            )
-            .add_field(
-                name="Deleted", value=str(deleted_timestamp) + "\n" + ctx.author.mention
-            )
-        )
-
-        added_users = ctx.database.execute(
-            """SELECT user_id FROM ticket_participants WHERE channel_oid=:channel_oid""",
-            {
-                "channel_oid": ctx.objects.make_object(tc=channel.id),
-            },
-        ).fetchall()
-
-        added_users = [ctx.bot.get_user(uid) for (uid,) in added_users]
-
-        with tempfile.TemporaryFile(mode="r+") as temp:
-            messages = await Transcript.write_transcript(temp, channel)
-
-            participants = {message.author for message in messages}
-            archive_embed.add_field(
-                name="Participants",
-                value="\n".join(user.mention for user in participants),
-            )
-
-            targets = [transcript_channel]
-            if category["dm_transcript"]:
-                targets.extend(added_users)
+        async with ctx.db.transaction():
+            if await ctx.db.fetchone(
+                """SELECT id FROM jobs WHERE kind='ticket_archive'
+                AND json_extract(payload, '$.channel_id')=:channel_id""",
+                {"channel_id": channel.id},
+            ):
+                raise UnableToComply("This ticket is already being deleted.")
 
-            for target in targets:
-                try:
-                    temp.seek(0)
-                    await target.send(
-                        embed=archive_embed,
-                        file=discord.File(fp=temp, filename=f"{channel.name}.html"),
-                    )
-                except discord.HTTPException as ex:
-                    if isinstance(target, discord.TextChannel):
-                        raise ex
-
-        with ctx.database as trans:
-            trans.execute(
-                "DELETE FROM ticket_participants WHERE channel_oid = :channel_oid",
-                {"channel_oid": ctx.objects.by_data(tc=channel.id)},
-            )
-            trans.execute(
-                "DELETE FROM ticket_entries WHERE channel_oid = :channel_oid",
-                {"channel_oid": ctx.objects.by_data(tc=channel.id)},
-            )
-            first_message = await anext(channel.history(limit=1, oldest_first=True))
-            trans.execute(
-                "DELETE FROM trigger_entries WHERE message_oid=:message_oid",
-                {"message_oid": ctx.objects.by_data(m=[channel.id, first_message.id])},
+            await ctx.bot.jobs.enqueue(
+                "ticket_archive",
+                {
+                    "channel_id": channel.id,
+                    "author_id": ctx.author.id,
+                    "deleted_at": str(clean_timestamp(ctx.message)),
+                    "sent": [],
+                },
+                guild_id=channel.guild.id,
             )
 
-            await channel.delete()
-            await ctx.bot.post_log(
-                channel.guild,
-                f"{ctx.author} deleted ticket {channel.name} [{channel.mention}].",
-                color=ctx.Color.I_GUESS,
-            )
+        await ctx.reply(
+            "Saving transcript, this ticket will be deleted once that's done."
+        )
 
     @commands.command(parent=ticket)
     async def add(
@@ -474,28 +702,28 @@ class Tickets(Blimp.Cog):
 
         `members` is a list of members that you want to add."""
 
+        if not members:
+            raise UnableToComply("You need to name at least one member to add.")
+
         if not channel:
             channel = ctx.channel
 
-        ticket = ctx.database.execute(
+        ticket = await ctx.db.fetchone(
             "SELECT * FROM ticket_entries WHERE channel_oid = :channel_oid",
-            {"channel_oid": ctx.objects.by_data(tc=channel.id)},
-        ).fetchone()
+            {"channel_oid": await ctx.objects.by_data(tc=channel.id)},
+        )
         if not ticket:
             return
 
-        category = ctx.database.execute(
-            "SELECT * from ticket_categories WHERE category_oid=:category_oid",
-            {"category_oid": ticket["category_oid"]},
-        ).fetchone()
+        category = await self.category_config(ticket["category_oid"])
 
         if not (
             ctx.privileged_modify(channel)
-            or (category["can_creator_close"] and ctx.author.id == ticket["creator_id"])
+            or (category.can_creator_close and ctx.author.id == ticket["creator_id"])
         ):
             raise Unauthorized(
                 "Only Staff "
-                + ("and the ticket owner " if category["can_creator_close"] else "")
+                + ("and the ticket owner " if category.can_creator_close else "")
                 + "can add members to this ticket."
             )
 
@@ -506,31 +734,51 @@ class Tickets(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        for member in members:
-            try:
-                await channel.edit(
-                    overwrites={
-                        **channel.overwrites,
-                        member: discord.PermissionOverwrite(
-                            read_messages=True, send_messages=True
-                        ),
-                    },
-                    reason=str(ctx.author),
-                )
-                ctx.database.execute(
-                    """INSERT INTO ticket_participants(channel_oid, user_id)
-                    VALUES(:channel_oid, :user_id)""",
-                    {
-                        "channel_oid": ctx.objects.make_object(tc=channel.id),
-                        "user_id": member.id,
-                    },
-                )
-                await ctx.reply(f"Added {member.mention}.")
-            except sqlite3.IntegrityError:
-                await ctx.reply(
-                    f"{member.mention} has already been added.",
-                    color=ctx.Color.I_GUESS,
-                )
+        channel_oid = await ctx.objects.make_object(tc=channel.id)
+        participants = {
+            row["user_id"]
+            for row in await ctx.db.fetchall(
+                "SELECT user_id FROM ticket_participants WHERE channel_oid=:channel_oid",
+                {"channel_oid": channel_oid},
+            )
+        }
+        members = list(dict.fromkeys(members))
+        new_members = [member for member in members if member.id not in participants]
+
+        # everyone gets their overwrite (back), but in a single request
+        await channel.edit(
+            overwrites={
+                **channel.overwrites,
+                **{
+                    member: discord.PermissionOverwrite(
+                        read_messages=True, send_messages=True
+                    )
+                    for member in members
+                },
+            },
+            reason=str(ctx.author),
+        )
+        await ctx.db.executemany(
+            """INSERT OR IGNORE INTO ticket_participants(channel_oid, user_id)
+            VALUES(:channel_oid, :user_id)""",
+            [
+                {"channel_oid": channel_oid, "user_id": member.id}
+                for member in new_members
+            ],
+        )
+
+        if new_members:
+            await ctx.reply(
+                f"Added {' '.join(member.mention for member in new_members)}."
+            )
+        if len(new_members) < len(members):
+            already_added = [member for member in members if member not in new_members]
+            await ctx.reply(
+                f"{' '.join(member.mention for member in already_added)} "
+                + ("has" if len(already_added) == 1 else "have")
+                + " already been added.",
+                color=ctx.Color.I_GUESS,
+            )
 
     @commands.command(parent=ticket)
     async def remove(
@@ -546,28 +794,28 @@ class Tickets(Blimp.Cog):
 
         `members` is a list of members that you want to remove."""
 
+        if not members:
+            raise UnableToComply("You need to name at least one member to remove.")
+
         if not channel:
             channel = ctx.channel
 
-        ticket = ctx.database.execute(
+        ticket = await ctx.db.fetchone(
             "SELECT * FROM ticket_entries WHERE channel_oid = :channel_oid",
-            {"channel_oid": ctx.objects.by_data(tc=channel.id)},
-        ).fetchone()
+            {"channel_oid": await ctx.objects.by_data(tc=channel.id)},
+        )
         if not ticket:
             return
 
-        category = ctx.database.execute(
-            "SELECT * from ticket_categories WHERE category_oid=:category_oid",
-            {"category_oid": ticket["category_oid"]},
-        ).fetchone()
+        category = await self.category_config(ticket["category_oid"])
 
         if not (
             ctx.privileged_modify(channel)
-            or (category["can_creator_close"] and ctx.author.id == ticket["creator_id"])
+            or (category.can_creator_close and ctx.author.id == ticket["creator_id"])
         ):
             raise Unauthorized(
                 "Only Staff "
-                + ("and the ticket owner " if category["can_creator_close"] else "")
+                + ("and the ticket owner " if category.can_creator_close else "")
                 + "can remove members from this ticket."
             )
 
@@ -578,28 +826,26 @@ class Tickets(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
+        overwrites_without_members = channel.overwrites
         for member in members:
-            overwrites_without_member = channel.overwrites
-            overwrites_without_member.pop(member, None)
-            await channel.edit(
-                overwrites=overwrites_without_member,
-                reason=str(ctx.author),
-            )
-            ctx.database.execute(
-                """DELETE FROM ticket_participants WHERE channel_oid = :channel_oid
-                AND user_id = :user_id""",
-                {
-                    "channel_oid": ctx.objects.make_object(tc=channel.id),
-                    "user_id": member.id,
-                },
-            )
-            await ctx.reply(f"Removed {member.mention}.")
+            overwrites_without_members.pop(member, None)
+        await channel.edit(
+            overwrites=overwrites_without_members,
+            reason=str(ctx.author),
+        )
+        channel_oid = await ctx.objects.make_object(tc=channel.id)
+        await ctx.db.executemany(
+            """DELETE FROM ticket_participants WHERE channel_oid = :channel_oid
+            AND user_id = :user_id""",
+            [{"channel_oid": channel_oid, "user_id": member.id} for member in members],
+        )
+        await ctx.reply(f"Removed {' '.join(member.mention for member in members)}.")
 
     @Blimp.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
         "Look up if we have the member leave any tickets behind."
 
-        tickets = self.bot.database.execute(
+        tickets = await self.bot.db.fetchall(
             """
             SELECT ticket_entries.channel_oid, ticket_entries.category_oid
             FROM ticket_participants
@@ -609,11 +855,11 @@ class Tickets(Blimp.Cog):
             {"user_id": member.id},
         )
         for ticket in tickets:
-            category_obj = self.bot.objects.by_oid(ticket["category_oid"])
+            category_obj = await self.bot.objects.by_oid(ticket["category_oid"])
             if not self.bot.get_channel(category_obj["cc"]).guild == member.guild:
                 continue
 
-            channel_obj = self.bot.objects.by_oid(ticket["channel_oid"])
+            channel_obj = await self.bot.objects.by_oid(ticket["channel_oid"])
             channel = self.bot.get_channel(channel_obj["tc"])
             await Blimp.Context.reply(
                 channel, f"{member.mention} left.", color=Blimp.Context.Color.I_GUESS
@@ -623,31 +869,31 @@ class Tickets(Blimp.Cog):
     async def on_member_join(self, member: discord.Member):
         "Look up if the member was in any tickets."
 
-        tickets = self.bot.database.execute(
+        tickets = await self.bot.db.fetchall(
             """
-            SELECT ticket_entries.channel_oid, ticket_entries.category_oid
+            SELECT channel.primary_id AS channel_id
             FROM ticket_participants
-            LEFT JOIN ticket_entries ON ticket_participants.channel_oid = ticket_entries.channel_oid
+            JOIN objects AS channel ON channel.oid = ticket_participants.channel_oid
             WHERE user_id=:user_id
             """,
             {"user_id": member.id},
+            readonly=True,
         )
-        for ticket in tickets:
-            category_obj = self.bot.objects.by_oid(ticket["category_oid"])
-            if not self.bot.get_channel(category_obj["cc"]).guild == member.guild:
-                continue
+        channels = [
+            channel
+            for channel in map(self.bot.get_channel, (t["channel_id"] for t in tickets))
+            if channel and channel.guild == member.guild
+        ]
 
-            channel_obj = self.bot.objects.by_oid(ticket["channel_oid"])
-            channel = self.bot.get_channel(channel_obj["tc"])
+        async def readd(channel: discord.TextChannel):
             await Blimp.Context.reply(
                 channel,
                 f"Added {member.mention} after rejoin.",
                 color=Blimp.Context.Color.AUTOMATIC_BLUE,
             )
-            await channel.edit(
-                overwrites={
-                    **channel.overwrites,
-                    member: discord.PermissionOverwrite(read_messages=True),
-                },
-                reason="added to ticket on rejoin",
+            # only sends the member's overwrite instead of all of them
+            await channel.set_permissions(
+                member, read_messages=True, reason="added to ticket on rejoin"
             )
+
+        await asyncio.gather(*map(readd, channels))
@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import pprint
 import tempfile
 import traceback
@@ -13,7 +14,6 @@ from ..customizations import (
     ParseableTimedelta,
     UnableToComply,
     Unauthorized,
-    clean_timestamp,
 )
 from ..message_formatter import create_message_dict
 from ..transcript import Transcript
@@ -263,10 +263,12 @@ class Tools(Blimp.Cog):
 
         if isinstance(where, discord.TextChannel):
             message = await where.send(**create_message_dict(text, where))
-            ctx.database.execute(
+            await ctx.db.execute(
                 "INSERT INTO post_entries(message_oid, text) VALUES(:oid, :text)",
                 {
-                    "oid": ctx.objects.make_object(m=[message.channel.id, message.id]),
+                    "oid": await ctx.objects.make_object(
+                        m=[message.channel.id, message.id]
+                    ),
                     "text": text,
                 },
             )
@@ -279,18 +281,18 @@ class Tools(Blimp.Cog):
                 ).add_field(name="New", value=text),
             )
         else:
-            old = ctx.database.execute(
+            old = await ctx.db.fetchone(
                 "SELECT * FROM post_entries WHERE message_oid=:oid",
-                {"oid": ctx.objects.by_data(m=[where.channel.id, where.id])},
-            ).fetchone()
+                {"oid": await ctx.objects.by_data(m=[where.channel.id, where.id])},
+            )
             if not old:
                 raise UnableToComply("That message can't be edited.")
 
-            ctx.database.execute(
+            await ctx.db.execute(
                 "UPDATE post_entries SET text=:text WHERE message_oid=:oid",
                 {
                     "text": text,
-                    "oid": ctx.objects.by_data(m=[where.channel.id, where.id]),
+                    "oid": await ctx.objects.by_data(m=[where.channel.id, where.id]),
                 },
             )
             await where.edit(**create_message_dict(text, where.channel))
@@ -326,7 +328,8 @@ class Tools(Blimp.Cog):
 
         `end_with` is the last message that should appear in the transcript.
 
-        There is a hard limit of 5000 messages getting transcribed at once."""
+        Long transcripts are split into several files, each small enough to be uploaded here.
+        """
 
         if not channel:
             channel = ctx.channel
@@ -335,32 +338,36 @@ class Tools(Blimp.Cog):
             raise Unauthorized()
 
         async with ctx.typing():
-            with tempfile.TemporaryFile(mode="r+") as temp:
-                messages = await Transcript.write_transcript(
-                    temp,
+            with contextlib.ExitStack() as parts:
+                summary = await Transcript.write_transcript(
+                    lambda: parts.enter_context(tempfile.TemporaryFile()),
                     channel,
                     first_message_id=None if not start_with else start_with.id,
                     last_message_id=None if not end_with else end_with.id,
+                    max_size=(ctx.guild or channel.guild).filesize_limit,
+                    concurrency=ctx.bot.config.getint(
+                        "transcripts", "concurrency", fallback=1
+                    ),
+                    pages_per_second=ctx.bot.config.getfloat(
+                        "transcripts", "pages_per_second", fallback=0
+                    ),
                 )
-                temp.seek(0)
 
                 archive_embed = discord.Embed(
                     title=f"#{channel.name}",
                     color=ctx.Color.I_GUESS,
                 ).add_field(
                     name="Transcript",
-                    value=f"From {clean_timestamp(messages[0])}\n"
-                    + f"To {clean_timestamp(messages[-1])}\n"
-                    + f"{len(messages)} messages",
+                    value=f"From {summary.first_timestamp}\n"
+                    + f"To {summary.last_timestamp}\n"
+                    + f"{summary.count} messages",
                 )
 
-                participants = {message.author for message in messages}
                 archive_embed.add_field(
                     name="Participants",
-                    value="\n".join(user.mention for user in participants),
+                    value="\n".join(user.mention for user in summary.participants),
                 )
 
-                await ctx.channel.send(
-                    embed=archive_embed,
-                    file=discord.File(fp=temp, filename=f"{channel.name}.html"),
+                await Transcript.send(
+                    ctx.channel, channel, summary, embed=archive_embed
                 )
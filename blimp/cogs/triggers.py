@@ -10,6 +10,18 @@ from .alias import MaybeAliasedMessage
 class Triggers(Blimp.Cog):
     "The Big Red Button."
 
+    async def cog_load(self):
+        rows = await self.bot.db.fetchall(
+            """SELECT DISTINCT message.secondary_id AS message_id FROM trigger_entries
+            JOIN objects AS message ON message.oid = trigger_entries.message_oid""",
+            readonly=True,
+        )
+        self.bot.reactions.register("trigger", on_add=self.on_raw_reaction_add)
+        self.bot.reactions.watch("trigger", *(row["message_id"] for row in rows))
+
+    async def cog_unload(self):
+        self.bot.reactions.unregister("trigger")
+
     @commands.group(invoke_without_command=True, case_insensitive=True)
     async def trigger(self, ctx: Blimp.Context):
         """Triggers allow your users to invoke pre-set commands by reacting to a specific message.
@@ -40,13 +52,13 @@ class Triggers(Blimp.Cog):
             color=ctx.Color.I_GUESS,
         )
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM trigger_entries WHERE message_oid=:message_oid AND emoji=:emoji",
             {
-                "message_oid": ctx.objects.by_data(m=[msg.channel.id, msg.id]),
+                "message_oid": await ctx.objects.by_data(m=[msg.channel.id, msg.id]),
                 "emoji": emoji,
             },
-        ).fetchone()
+        )
         if old:
             log_embed.add_field(
                 name="Old",
@@ -60,16 +72,19 @@ class Triggers(Blimp.Cog):
 
         await msg.add_reaction(emoji)
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT OR REPLACE INTO
             trigger_entries(message_oid, emoji, command)
             VALUES(:message_oid, :emoji, :command)""",
             {
-                "message_oid": ctx.objects.make_object(m=[msg.channel.id, msg.id]),
+                "message_oid": await ctx.objects.make_object(
+                    m=[msg.channel.id, msg.id]
+                ),
                 "emoji": emoji,
                 "command": command,
             },
         )
+        ctx.bot.reactions.watch("trigger", msg.id)
 
         await ctx.bot.post_log(msg.guild, embed=log_embed)
 
@@ -88,12 +103,10 @@ class Triggers(Blimp.Cog):
         if not ctx.privileged_modify(msg.guild):
             raise Unauthorized()
 
-        cursor = ctx.database.execute(
+        message_oid = await ctx.objects.by_data(m=[msg.channel.id, msg.id])
+        cursor = await ctx.db.execute(
             "DELETE FROM trigger_entries WHERE message_oid=:message_oid AND emoji=:emoji",
-            {
-                "message_oid": ctx.objects.by_data(m=[msg.channel.id, msg.id]),
-                "emoji": emoji,
-            },
+            {"message_oid": message_oid, "emoji": emoji},
         )
         if cursor.rowcount == 0:
             raise UnableToComply(
@@ -101,28 +114,33 @@ class Triggers(Blimp.Cog):
                 "as it doesn't exist."
             )
 
+        if not await ctx.db.fetchone(
+            "SELECT 1 FROM trigger_entries WHERE message_oid=:message_oid",
+            {"message_oid": message_oid},
+        ):
+            ctx.bot.reactions.unwatch("trigger", msg.id)
+
         await msg.remove_reaction(emoji, ctx.guild.me)
 
         await ctx.reply(
             f"*Deleted [trigger {emoji} in #{msg.channel.name}]({msg.jump_url}).*"
         )
 
-    @Blimp.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        "On reaction creation, check if we should invoke a command and do so."
+        "On reaction creation on a trigger, check if we should invoke a command and do so."
         if not payload.guild_id or payload.user_id == self.bot.user.id:
             return
 
         channel = self.bot.get_channel(payload.channel_id)
-        trigger = self.bot.database.execute(
+        trigger = await self.bot.db.fetchone(
             "SELECT * FROM trigger_entries WHERE message_oid=:message_oid AND emoji=:emoji",
             {
-                "message_oid": self.bot.objects.by_data(
+                "message_oid": await self.bot.objects.by_data(
                     m=[payload.channel_id, payload.message_id]
                 ),
                 "emoji": str(payload.emoji),
             },
-        ).fetchone()
+        )
         if not trigger:
             return
 
@@ -60,23 +60,25 @@ class WelcomeLog(Blimp.Cog):
         except toml.TomlDecodeError:
             pass
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM welcome_configuration WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(g=channel.guild.id)},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(g=channel.guild.id)},
+        )
         if old and old["join_data"]:
             data = json.loads(old["join_data"])
-            old_channel = ctx.objects.by_oid(data[0])["tc"]
+            old_channel = (await ctx.objects.by_oid(data[0]))["tc"]
             logging_embed.add_field(
                 name="Old", value=f"<#{old_channel}>```toml\n{data[1]}```"
             )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT INTO welcome_configuration(oid, join_data) VALUES(:oid, json(:data))
             ON CONFLICT(oid) DO UPDATE SET join_data=excluded.join_data""",
             {
-                "oid": ctx.objects.make_object(g=channel.guild.id),
-                "data": json.dumps([ctx.objects.make_object(tc=channel.id), greeting]),
+                "oid": await ctx.objects.make_object(g=channel.guild.id),
+                "data": json.dumps(
+                    [await ctx.objects.make_object(tc=channel.id), greeting]
+                ),
             },
         )
 
@@ -102,15 +104,15 @@ class WelcomeLog(Blimp.Cog):
         if not ctx.privileged_modify(ctx.guild):
             raise Unauthorized()
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM welcome_configuration WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(g=ctx.guild.id)},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(g=ctx.guild.id)},
+        )
         if not old or not old["join_data"]:
             raise UnableToComply("Welcome isn't configured for this guild.")
 
         data = json.loads(old["join_data"])
-        old_channel = ctx.objects.by_oid(data[0])["tc"]
+        old_channel = (await ctx.objects.by_oid(data[0]))["tc"]
         await ctx.reply(
             f"Welcome messages are posted into <#{old_channel}>, using this configuration:```toml\n"
             + data[1]
@@ -130,9 +132,9 @@ class WelcomeLog(Blimp.Cog):
         if not ctx.privileged_modify(ctx.guild):
             raise Unauthorized()
 
-        cursor = ctx.database.execute(
+        cursor = await ctx.db.execute(
             "UPDATE welcome_configuration SET join_data=NULL WHERE oid=:oid",
-            {"oid": ctx.objects.make_object(g=ctx.guild.id)},
+            {"oid": await ctx.objects.make_object(g=ctx.guild.id)},
         )
         if cursor.rowcount == 0:
             raise UnableToComply(
@@ -149,16 +151,15 @@ class WelcomeLog(Blimp.Cog):
 
         objects = self.bot.objects
 
-        cursor = self.bot.database.execute(
+        row = await self.bot.db.fetchone(
             "SELECT * FROM welcome_configuration WHERE oid=:oid",
-            {"oid": objects.by_data(g=member.guild.id)},
+            {"oid": await objects.by_data(g=member.guild.id)},
         )
-        row = cursor.fetchone()
         if not row or not row["join_data"]:
             return
 
         data = json.loads(row["join_data"])
-        channel = self.bot.get_channel(objects.by_oid(data[0])["tc"])
+        channel = self.bot.get_channel((await objects.by_oid(data[0]))["tc"])
 
         await channel.send(
             **create_message_dict(
@@ -204,23 +205,25 @@ class WelcomeLog(Blimp.Cog):
         except toml.TomlDecodeError:
             pass
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM welcome_configuration WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(g=channel.guild.id)},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(g=channel.guild.id)},
+        )
         if old and old["leave_data"]:
             data = json.loads(old["leave_data"])
-            old_channel = ctx.objects.by_oid(data[0])["tc"]
+            old_channel = (await ctx.objects.by_oid(data[0]))["tc"]
             logging_embed.add_field(
                 name="Old", value=f"<#{old_channel}>```toml\n{data[1]}```"
             )
 
-        ctx.database.execute(
+        await ctx.db.execute(
             """INSERT INTO welcome_configuration(oid, leave_data) VALUES(:oid, json(:data))
             ON CONFLICT(oid) DO UPDATE SET leave_data=excluded.leave_data""",
             {
-                "oid": ctx.objects.make_object(g=channel.guild.id),
-                "data": json.dumps([ctx.objects.make_object(tc=channel.id), greeting]),
+                "oid": await ctx.objects.make_object(g=channel.guild.id),
+                "data": json.dumps(
+                    [await ctx.objects.make_object(tc=channel.id), greeting]
+                ),
             },
         )
 
@@ -246,15 +249,15 @@ class WelcomeLog(Blimp.Cog):
         if not ctx.privileged_modify(ctx.guild):
             raise Unauthorized()
 
-        old = ctx.database.execute(
+        old = await ctx.db.fetchone(
             "SELECT * FROM welcome_configuration WHERE oid=:oid",
-            {"oid": ctx.objects.by_data(g=ctx.guild.id)},
-        ).fetchone()
+            {"oid": await ctx.objects.by_data(g=ctx.guild.id)},
+        )
         if not old or not old["leave_data"]:
             raise UnableToComply("Goodbye isn't configured for this guild.")
 
         data = json.loads(old["leave_data"])
-        old_channel = ctx.objects.by_oid(data[0])["tc"]
+        old_channel = (await ctx.objects.by_oid(data[0]))["tc"]
         await ctx.reply(
             f"Goodbye messages are posted into <#{old_channel}>, using this configuration:```toml\n"
             + data[1]
@@ -274,9 +277,9 @@ class WelcomeLog(Blimp.Cog):
         if not ctx.privileged_modify(ctx.guild):
             raise Unauthorized()
 
-        cursor = ctx.database.execute(
+        cursor = await ctx.db.execute(
             "UPDATE welcome_configuration SET leave_data=NULL WHERE oid=:oid",
-            {"oid": ctx.objects.make_object(g=ctx.guild.id)},
+            {"oid": await ctx.objects.make_object(g=ctx.guild.id)},
         )
         if cursor.rowcount == 0:
             raise UnableToComply(
@@ -292,16 +295,15 @@ class WelcomeLog(Blimp.Cog):
         "Look up if we have a configuration for this guild and say goodbye if so."
         objects = self.bot.objects
 
-        cursor = self.bot.database.execute(
+        row = await self.bot.db.fetchone(
             "SELECT * FROM welcome_configuration WHERE oid=:oid",
-            {"oid": objects.by_data(g=member.guild.id)},
+            {"oid": await objects.by_data(g=member.guild.id)},
         )
-        row = cursor.fetchone()
         if not row or not row["leave_data"]:
             return
 
         data = json.loads(row["leave_data"])
-        channel = self.bot.get_channel(objects.by_oid(data[0])["tc"])
+        channel = self.bot.get_channel((await objects.by_oid(data[0]))["tc"])
 
         await channel.send(
             **create_message_dict(
@@ -40,10 +40,10 @@ class Wizard(Blimp.Cog):
                 None,
             )
 
-            old = ctx.database.execute(
+            old = await ctx.db.fetchone(
                 "SELECT * FROM board_configuration WHERE oid=:oid",
-                {"oid": ctx.objects.by_data(tc=channel.id)},
-            ).fetchone()
+                {"oid": await ctx.objects.by_data(tc=channel.id)},
+            )
             data = None
             if old:
                 data = json.loads(old["data"])
@@ -121,10 +121,10 @@ class Wizard(Blimp.Cog):
             )
             cid_mid = [message.channel.id, message.id]
 
-            old = ctx.database.execute(
+            old = await ctx.db.fetchone(
                 "SELECT * FROM rolekiosk_entries WHERE oid=:oid",
-                {"oid": ctx.objects.by_data(m=cid_mid)},
-            ).fetchone()
+                {"oid": await ctx.objects.by_data(m=cid_mid)},
+            )
             data = None
             if old:
                 data = json.loads(old["data"])
@@ -141,6 +141,16 @@ class Wizard(Blimp.Cog):
                 None,
             )
 
+            mode = await progress.input_choice(
+                "Mode",
+                "Please type whether the Kiosk should offer its roles as `reactions` or in select "
+                "`menus`. Menus allow more roles and picking several at once, but only work on "
+                f"messages BLIMP posted, for example with `post{ctx.bot.suffix}`.",
+                ("reactions", "menus"),
+                "menus" if old and old["menu"] else "reactions",
+            )
+            limit = 125 if mode == "menus" else 20
+
             role_pairs = []
 
             if old:
@@ -164,10 +174,13 @@ class Wizard(Blimp.Cog):
             await progress.update()
 
             while True:
-                if len(role_pairs) == 20:
+                if len(role_pairs) >= limit:
                     await ctx.reply(
                         "Discord doesn't support more than twenty reactions per message, no "
                         "further pairs will be accepted."
+                        if mode == "reactions"
+                        else "Discord doesn't support more than five menus of 25 options per "
+                        "message, no further pairs will be accepted."
                     )
                     break
 
@@ -223,7 +236,8 @@ class Wizard(Blimp.Cog):
             progress.edit_last_field("✅ Pending Configuration", None, None)
 
             await progress.confirm_execute(
-                f"kiosk{ctx.bot.suffix} update {message.channel.id}-{message.id} "
+                f"kiosk{ctx.bot.suffix} {'menu' if mode == 'menus' else 'update'} "
+                f"{message.channel.id}-{message.id} "
                 + (ctx.bot.get_cog("Kiosk").render_emoji_pairs(role_pairs, " "))
             )
 
@@ -253,10 +267,10 @@ class Wizard(Blimp.Cog):
                 None,
             )
 
-            old = ctx.database.execute(
+            old = await ctx.db.fetchone(
                 "SELECT * FROM ticket_categories WHERE category_oid=:category_oid",
-                {"category_oid": ctx.objects.by_data(cc=category.id)},
-            ).fetchone()
+                {"category_oid": await ctx.objects.by_data(cc=category.id)},
+            )
 
             progress.edit_last_field(
                 None,
@@ -295,7 +309,7 @@ class Wizard(Blimp.Cog):
                     "is deleted.",
                     ProgressII.InputKindOption.CHANNEL,
                     ctx.bot.get_channel(
-                        ctx.objects.by_oid(old["transcript_channel_oid"])["tc"]
+                        (await ctx.objects.by_oid(old["transcript_channel_oid"]))["tc"]
                     )
                     if old
                     else None,
@@ -333,10 +347,10 @@ class Wizard(Blimp.Cog):
                     f"{per_user_limit}"
                 )
 
-            rows = ctx.database.execute(
+            rows = await ctx.db.fetchall(
                 "SELECT * FROM ticket_classes WHERE category_oid=:category_oid",
-                {"category_oid": ctx.objects.by_data(cc=category.id)},
-            ).fetchall()
+                {"category_oid": await ctx.objects.by_data(cc=category.id)},
+            )
 
             ticket_classes = {}
             for row in rows:
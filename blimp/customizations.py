@@ -2,18 +2,19 @@ import enum
 import logging
 import random
 import re
-import sqlite3
 from copy import copy
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
 from string import Template
-from typing import Any, Callable, Optional, Tuple, TypeVar, Union
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar, Union
 
 import discord
 from discord import Activity, ActivityType
 from discord.ext import commands
 
+from .database import Database
+from .jobs import JobQueue
 from .objects import BlimpObjects
+from .reactions import ReactionRouter
 
 
 class AnticipatedError(Exception):
@@ -53,6 +54,20 @@ def maybe(
         return instead
 
 
+async def maybe_async(
+    the_letter_after_kappa: Awaitable[Ret],
+    acceptable_error: Any = Exception,
+    instead: Optional[Ret] = None,
+) -> Optional[Ret]:
+    """Like maybe(), but for an awaitable instead of a function. The endofunctors are now
+    asynchronous."""
+
+    try:
+        return await the_letter_after_kappa
+    except acceptable_error as _ex:  # pylint: disable=broad-except
+        return instead
+
+
 class Blimp(commands.Bot):
     """
     Instead of using a prefix like... normal bots, Blimp checks if the first
@@ -85,9 +100,9 @@ class Blimp(commands.Bot):
             return self.cog.log.getChild(name)
 
         @property
-        def database(self) -> sqlite3.Connection:
-            """Return the bot's database connection."""
-            return self.bot.database
+        def db(self) -> Database:
+            """Return the bot's database."""
+            return self.bot.db
 
         @property
         def objects(self) -> BlimpObjects:
@@ -196,34 +211,31 @@ class Blimp(commands.Bot):
         self.log = logging.getLogger("blimp")
         self.log.setLevel(logging.INFO)
 
-        self.database = sqlite3.connect(
-            config["database"]["path"], isolation_level=None
+        self.db = Database(
+            config["database"]["path"],
+            journal_mode=config["database"].get("journal_mode", fallback="wal"),
+            synchronous=config["database"].get("synchronous", fallback="normal"),
+            cache_size=config["database"].getint("cache_size", fallback=-16000),
+            mmap_size=config["database"].getint("mmap_size", fallback=0),
+            busy_timeout=config["database"].getint("busy_timeout", fallback=5000),
+            readers=config["database"].getint("readers", fallback=4),
         )
-        self.database.row_factory = sqlite3.Row
-
-        last_migration_number = 0
-        try:
-            last_migration_number = self.database.execute(
-                "SELECT * FROM applied_migrations ORDER BY number DESC LIMIT 1;"
-            ).fetchone()[0]
-        except sqlite3.DatabaseError:
-            pass
-
-        for path in sorted(Path(config["database"]["migrations"]).glob("*.sql")):
-            number = int(path.stem)
-            if number > last_migration_number:
-                self.database.executescript(
-                    f"""
-                    BEGIN TRANSACTION;
-                    {path.read_text()}
-                    INSERT INTO applied_migrations VALUES({number});
-                    COMMIT;
-                    """
-                )
-                self.log.info(f"Applied migration {number}")
+        for number in self.db.migrate(config["database"]["migrations"]):
+            self.log.info(f"Applied migration {number}")
 
-        self.objects = BlimpObjects(self.database)
+        self.objects = BlimpObjects(
+            self.db,
+            config["database"].getint("object_cache_size", fallback=4096),
+        )
+        self.jobs = JobQueue(
+            self,
+            self.db,
+            workers=config.getint("jobs", "workers", fallback=4),
+            max_attempts=config.getint("jobs", "max_attempts", fallback=5),
+            backoff=config.getfloat("jobs", "backoff", fallback=30.0),
+        )
         super().__init__(self.dynamic_prefix, **kwargs)
+        self.reactions = ReactionRouter(self)
 
     def add_command(self, command: commands.Command):
         command.name = command.name + self.suffix
@@ -232,6 +244,14 @@ class Blimp(commands.Bot):
     def remove_command(self, name):
         super().remove_command(name + self.suffix)
 
+    async def setup_hook(self):
+        await self.jobs.start()
+
+    async def close(self):
+        await super().close()
+        await self.jobs.stop()
+        await self.db.close()
+
     async def get_context(self, message, *, cls=Context):
         return await super().get_context(message, cls=cls)
 
@@ -322,14 +342,14 @@ class Blimp(commands.Bot):
 
     async def post_log(self, guild: discord.Guild, *args, **kwargs):
         "Post a log entry to a guild, usage same as ctx.reply"
-        configuration = self.database.execute(
+        configuration = await self.db.fetchone(
             "SELECT * FROM logging_configuration WHERE guild_oid=:guild_oid",
-            {"guild_oid": self.objects.by_data(g=guild.id)},
-        ).fetchone()
+            {"guild_oid": await self.objects.by_data(g=guild.id)},
+        )
         if not configuration:
             return
 
-        channel = self.objects.by_oid(configuration["channel_oid"])["tc"]
+        channel = (await self.objects.by_oid(configuration["channel_oid"]))["tc"]
         await self.Context.reply(self.get_channel(channel), *args, **kwargs)
 
 
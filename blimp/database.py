@@ -0,0 +1,213 @@
+import asyncio
+import contextvars
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+Ret = TypeVar("Ret")
+
+IN_TRANSACTION = contextvars.ContextVar("IN_TRANSACTION", default=False)
+
+
+class Database:
+    """
+    Asynchronous facade for BLIMP's SQLite database. Every statement runs on a dedicated worker
+    thread that owns the connection, so slow queries, fsyncs or lock waits never stall the event
+    loop and with it gateway heartbeats and every other guild.
+
+    Statements are serialized with a lock, which transaction() holds across awaits for its whole
+    duration. Code running inside a transaction (including BlimpObjects calls) keeps using the
+    same methods and automatically becomes part of it.
+
+    Queries passed readonly=True instead go to a pool of read-only connections on their own
+    threads. In WAL mode they read the last committed state without waiting for the writer.
+    """
+
+    JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+    SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        path: str,
+        journal_mode: str = "wal",
+        synchronous: str = "normal",
+        cache_size: int = -16000,
+        mmap_size: int = 0,
+        busy_timeout: int = 5000,
+        readers: int = 4,
+    ):
+        journal_mode = journal_mode.lower()
+        if journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode {journal_mode!r}.")
+        synchronous = synchronous.lower()
+        if synchronous not in self.SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown synchronous level {synchronous!r}.")
+
+        self.pragmas = (
+            f"PRAGMA synchronous={synchronous};"
+            f"PRAGMA cache_size={int(cache_size)};"
+            f"PRAGMA mmap_size={int(mmap_size)};"
+            f"PRAGMA busy_timeout={int(busy_timeout)};"
+        )
+
+        self.connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(f"PRAGMA journal_mode={journal_mode};")
+        self.connection.executescript(self.pragmas)
+
+        self.worker = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="blimp-database"
+        )
+        self.lock = asyncio.Lock()
+
+        # an in-memory database is private to its connection, so there's nothing to pool
+        self.readers: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+        self.reader_count = readers if path != ":memory:" else 0
+        for _ in range(self.reader_count):
+            reader = sqlite3.connect(
+                f"{Path(path).absolute().as_uri()}?mode=ro",
+                uri=True,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            reader.row_factory = sqlite3.Row
+            reader.executescript(self.pragmas + "PRAGMA query_only=1;")
+            self.readers.put(reader)
+
+        self.reader_worker = (
+            ThreadPoolExecutor(
+                max_workers=self.reader_count, thread_name_prefix="blimp-database-read"
+            )
+            if self.reader_count
+            else None
+        )
+
+    def migrate(self, directory: str) -> List[int]:
+        """Apply all migrations from `directory` that haven't been applied yet and return their
+        numbers. This blocks and is meant to be run once, before the event loop starts.
+        """
+
+        last_migration_number = 0
+        try:
+            last_migration_number = self.connection.execute(
+                "SELECT * FROM applied_migrations ORDER BY number DESC LIMIT 1;"
+            ).fetchone()[0]
+        except sqlite3.DatabaseError:
+            pass
+
+        applied = []
+        for path in sorted(Path(directory).glob("*.sql")):
+            number = int(path.stem)
+            if number > last_migration_number:
+                self.connection.executescript(
+                    f"""
+                    BEGIN TRANSACTION;
+                    {path.read_text()}
+                    INSERT INTO applied_migrations VALUES({number});
+                    COMMIT;
+                    """
+                )
+                applied.append(number)
+
+        return applied
+
+    @property
+    def in_transaction(self) -> bool:
+        "Return if the current task is inside a transaction()."
+        return IN_TRANSACTION.get()
+
+    async def run(self, function: Callable[..., Ret], *args) -> Ret:
+        "Run function(*args) on the worker thread, waiting for other tasks' transactions."
+        loop = asyncio.get_running_loop()
+        if self.in_transaction:
+            return await loop.run_in_executor(self.worker, partial(function, *args))
+
+        async with self.lock:
+            return await loop.run_in_executor(self.worker, partial(function, *args))
+
+    async def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        """Execute a statement that doesn't return rows. The returned cursor is only good for its
+        rowcount and lastrowid."""
+        return await self.run(self.connection.execute, sql, parameters)
+
+    async def executemany(self, sql: str, parameters: Iterable[Any]) -> sqlite3.Cursor:
+        "Execute a statement once for every item of `parameters`."
+        return await self.run(self.connection.executemany, sql, list(parameters))
+
+    def read(self, sql: str, parameters: Any, method: str):
+        "Run a query on a pooled read-only connection. Called on a reader thread."
+        reader = self.readers.get()
+        try:
+            return getattr(reader.execute(sql, parameters), method)()
+        finally:
+            self.readers.put(reader)
+
+    def _execute(self, sql: str, parameters: Any, method: str):
+        "Run a query on the writer connection. Called on the worker thread."
+        return getattr(self.connection.execute(sql, parameters), method)()
+
+    async def query(self, sql: str, parameters: Any, method: str, readonly: bool):
+        """Execute a statement and call `method` on the resulting cursor, either on a reader or
+        the writer. Transactions always read from the writer so they see their own changes.
+        """
+        if readonly and self.reader_worker and not self.in_transaction:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.reader_worker, self.read, sql, parameters, method
+            )
+
+        return await self.run(self._execute, sql, parameters, method)
+
+    async def fetchone(
+        self, sql: str, parameters: Any = (), readonly: bool = False
+    ) -> Optional[sqlite3.Row]:
+        """Execute a statement and return its first row or None. With `readonly`, a pooled reader
+        connection is used, which doesn't wait for writes or transactions in progress.
+        """
+        return await self.query(sql, parameters, "fetchone", readonly)
+
+    async def fetchall(
+        self, sql: str, parameters: Any = (), readonly: bool = False
+    ) -> List[sqlite3.Row]:
+        """Execute a statement and return all of its rows. With `readonly`, a pooled reader
+        connection is used, which doesn't wait for writes or transactions in progress.
+        """
+        return await self.query(sql, parameters, "fetchall", readonly)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the enclosed statements as one transaction that gets rolled back if an exception is
+        raised. Nested transactions simply become part of the outer one."""
+
+        if self.in_transaction:
+            yield self
+            return
+
+        async with self.lock:
+            token = IN_TRANSACTION.set(True)
+            try:
+                await self.execute("BEGIN TRANSACTION;")
+                try:
+                    yield self
+                except BaseException:
+                    await self.execute("ROLLBACK;")
+                    raise
+                await self.execute("COMMIT;")
+            finally:
+                IN_TRANSACTION.reset(token)
+
+    async def close(self):
+        "Finish all pending statements and close the connection."
+        if self.reader_worker:
+            self.reader_worker.shutdown()
+        while not self.readers.empty():
+            self.readers.get().close()
+
+        await self.run(self.connection.close)
+        self.worker.shutdown()
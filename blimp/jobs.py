@@ -0,0 +1,229 @@
+import asyncio
+import json
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from .database import Database
+
+
+class Job:
+    "A job taken from the queue to be worked on."
+
+    def __init__(self, queue: "JobQueue", row: sqlite3.Row):
+        self.queue = queue
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.payload = json.loads(row["payload"])
+        self.guild_id = row["guild_id"]
+        self.attempts = row["attempts"]
+
+    async def save(self):
+        """Store the payload as it is now, so a retry of this job can pick up where this attempt
+        left off."""
+        await self.queue.database.execute(
+            "UPDATE jobs SET payload=:payload WHERE id=:id",
+            {"payload": json.dumps(self.payload), "id": self.id},
+        )
+
+    async def report(self, *args, **kwargs):
+        "Post a progress update to the job's guild log, usage same as ctx.reply."
+        await self.queue.report(self, *args, **kwargs)
+
+
+Handler = Callable[[Job], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Persistent queue of background jobs. Jobs are rows in the jobs table, so they survive restarts.
+    Each has a kind, which decides the handler that runs it, and a JSON payload.
+
+    A dispatcher claims due jobs of registered kinds and runs up to `workers` of them at once. A
+    job is deleted once its handler returns. If the handler raises, the job is tried again after
+    exponential backoff, up to `max_attempts` times. Jobs that were running when BLIMP stopped are
+    picked up again on the next start, so handlers need to cope with running more than once.
+    """
+
+    def __init__(
+        self,
+        bot,
+        database: Database,
+        workers: int = 4,
+        max_attempts: int = 5,
+        backoff: float = 30.0,
+    ):  # pylint: disable=too-many-arguments
+        self.bot = bot
+        self.database = database
+        self.log = bot.log.getChild("JobQueue")
+
+        self.slots = asyncio.Semaphore(max(1, workers))
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+
+        self.handlers: Dict[str, Handler] = {}
+        self.running: Dict[int, asyncio.Task] = {}
+        self.wakeup = asyncio.Event()
+        self.dispatcher: Optional[asyncio.Task] = None
+
+    def register(self, kind: str, handler: Handler):
+        "Make jobs of a kind run with handler(job). Jobs wait in the queue until this happens."
+        self.handlers[kind] = handler
+        self.wakeup.set()
+
+    async def enqueue(
+        self, kind: str, payload: dict, guild_id: Optional[int] = None, delay: float = 0
+    ) -> int:
+        """Add a job to the queue and return its ID. Progress reports go to the log of the guild
+        with guild_id, if given."""
+        cursor = await self.database.execute(
+            """INSERT INTO jobs(kind, payload, guild_id, not_before)
+            VALUES(:kind, :payload, :guild_id, :not_before)""",
+            {
+                "kind": kind,
+                "payload": json.dumps(payload),
+                "guild_id": guild_id,
+                "not_before": int(time.time() + delay),
+            },
+        )
+        self.wakeup.set()
+        return cursor.lastrowid
+
+    async def start(self):
+        "Release the jobs that were running when we last stopped and start dispatching."
+        await self.database.execute("UPDATE jobs SET claimed=FALSE WHERE claimed")
+        self.dispatcher = asyncio.create_task(self.dispatch())
+
+    async def stop(self):
+        "Stop dispatching and cancel running jobs. They'll run again after the next start."
+        if self.dispatcher:
+            self.dispatcher.cancel()
+        for task in list(self.running.values()):
+            task.cancel()
+        await asyncio.gather(*self.running.values(), return_exceptions=True)
+
+    async def claim(self) -> Optional[Job]:
+        "Take the job that has been due the longest, if there is one."
+        if not self.handlers:
+            return None
+
+        kinds = list(self.handlers)
+        rows = await self.database.fetchall(
+            f"""UPDATE jobs SET claimed=TRUE, attempts=attempts + 1
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE NOT claimed AND not_before <= ? AND kind IN ({",".join("?" * len(kinds))})
+                ORDER BY not_before, id LIMIT 1
+            )
+            RETURNING *""",
+            [int(time.time()), *kinds],
+        )
+        return Job(self, rows[0]) if rows else None
+
+    async def next_due(self) -> Optional[int]:
+        "Return when the next job we can run becomes due, if any."
+        kinds = list(self.handlers)
+        row = await self.database.fetchone(
+            f"""SELECT min(not_before) FROM jobs
+            WHERE NOT claimed AND kind IN ({",".join("?" * len(kinds))})""",
+            kinds,
+            readonly=True,
+        )
+        return row[0]
+
+    async def dispatch(self):
+        """Claim and start jobs as workers become free, sleeping while there's nothing to do.
+        Errors are logged and retried later, so one bad job or query can't stop it."""
+        while True:
+            await self.slots.acquire()
+            self.wakeup.clear()
+            try:
+                job = await self.claim()
+            except Exception as ex:  # pylint: disable=broad-except
+                self.log.error("Couldn't claim a job", exc_info=ex)
+                job = None
+
+            if not job:
+                self.slots.release()
+                await self.idle()
+                continue
+
+            task = asyncio.create_task(self.run(job))
+            self.running[job.id] = task
+            task.add_done_callback(lambda _, job_id=job.id: self.finish(job_id))
+
+    async def idle(self):
+        "Sleep until the next job is due or the queue is woken up."
+        try:
+            due = await self.next_due()
+        except Exception as ex:  # pylint: disable=broad-except
+            self.log.error("Couldn't look up when the next job is due", exc_info=ex)
+            due = time.time() + self.backoff
+
+        try:
+            await asyncio.wait_for(
+                self.wakeup.wait(),
+                timeout=None if due is None else max(1, due - time.time()),
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    def finish(self, job_id: int):
+        "Free the worker of a job that's no longer running."
+        self.running.pop(job_id)
+        self.slots.release()
+
+    async def run(self, job: Job):
+        "Run a job's handler, then either delete it or schedule it to be retried."
+        try:
+            await self.handlers[job.kind](job)
+        except Exception as ex:  # pylint: disable=broad-except
+            if job.attempts >= self.max_attempts:
+                self.log.error(
+                    f"Job {job.id} ({job.kind}) failed for the last time", exc_info=ex
+                )
+                await self.database.execute(
+                    "DELETE FROM jobs WHERE id=:id", {"id": job.id}
+                )
+                await self.report(
+                    job,
+                    f"Giving up after {job.attempts} attempts: {ex}",
+                    color=self.bot.Context.Color.BAD,
+                )
+                return
+
+            delay = self.backoff * 2 ** (job.attempts - 1)
+            self.log.warning(
+                f"Job {job.id} ({job.kind}) failed, retrying in {delay}s", exc_info=ex
+            )
+            await self.database.execute(
+                """UPDATE jobs SET claimed=FALSE, not_before=:not_before, error=:error
+                WHERE id=:id""",
+                {
+                    "not_before": int(time.time() + delay),
+                    "error": str(ex),
+                    "id": job.id,
+                },
+            )
+            await self.report(
+                job,
+                f"Attempt {job.attempts} failed, retrying in {delay:.0f}s: {ex}",
+                color=self.bot.Context.Color.I_GUESS,
+            )
+            self.wakeup.set()
+            return
+
+        await self.database.execute("DELETE FROM jobs WHERE id=:id", {"id": job.id})
+
+    async def report(self, job: Job, text: Optional[str] = None, **kwargs):
+        "Post a message or embed about a job to the log of its guild, if it has one."
+        guild = self.bot.get_guild(job.guild_id) if job.guild_id else None
+        if not guild:
+            return
+
+        if embed := kwargs.get("embed"):
+            embed.set_footer(text=f"Job #{job.id}")
+        try:
+            await self.bot.post_log(guild, text, subtitle=f"Job #{job.id}", **kwargs)
+        except Exception as ex:  # pylint: disable=broad-except
+            self.log.warning(f"Couldn't report on job {job.id}", exc_info=ex)
@@ -1,61 +1,163 @@
-import json
 import sqlite3
-from typing import Tuple
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .database import Database
+
+Identity = Tuple[str, int, int]
 
 
 class BlimpObjects:
     """
     Internal "object" manager for Blimp. Powers aliasing.
+
+    Objects are stored as a kind ("m" for messages, "tc" for text channels, ...) and up to two
+    snowflakes. Only messages use both, as [channel_id, message_id].
+
+    Objects never change or get deleted once created, so lookups in both directions are kept in a
+    bounded least-recently-used cache that gets filled on reads as well as on make_object().
     """
 
-    def __init__(self, database: sqlite3.Connection):
+    PAIRED_KINDS = ("m",)
+
+    def __init__(self, database: Database, cache_size: int = 4096):
         self.database = database
 
-    def by_alias(self, guild_id: int, alias: str) -> Tuple[int, dict]:
+        self.cache_size = cache_size
+        self.oid_cache: "OrderedDict[Identity, int]" = OrderedDict()
+        self.data_cache: "OrderedDict[int, dict]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def identity(data: dict) -> Identity:
+        "Turn object data like {'m': [cid, mid]} into the (kind, primary, secondary) it's kept as."
+        ((kind, value),) = data.items()
+        if isinstance(value, (list, tuple)):
+            return (kind, value[0], value[1])
+
+        return (kind, value, 0)
+
+    @classmethod
+    def data_from_row(cls, row: sqlite3.Row) -> dict:
+        "Turn an objects row back into the data dict used everywhere else."
+        if row["kind"] in cls.PAIRED_KINDS:
+            return {row["kind"]: [row["primary_id"], row["secondary_id"]]}
+
+        return {row["kind"]: row["primary_id"]}
+
+    def remember(self, oid: int, data: dict):
+        "Put an object into both directions of the cache, evicting the least recently used ones."
+        if self.cache_size <= 0:
+            return
+
+        key = self.identity(data)
+        self.oid_cache[key] = oid
+        self.oid_cache.move_to_end(key)
+        self.data_cache[oid] = data
+        self.data_cache.move_to_end(oid)
+
+        while len(self.oid_cache) > self.cache_size:
+            self.oid_cache.popitem(last=False)
+        while len(self.data_cache) > self.cache_size:
+            self.data_cache.popitem(last=False)
+
+    def cache_info(self) -> dict:
+        "Return statistics on how well the cache is doing."
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.oid_cache),
+            "max_size": self.cache_size,
+        }
+
+    async def by_alias(self, guild_id: int, alias: str) -> Tuple[int, dict]:
         """Get (oid, data) or None behind an alias for the specified guild."""
-        alias = self.database.execute(
+        alias = await self.database.fetchone(
             "SELECT * FROM aliases WHERE gid=:gid AND alias=:alias",
             {"gid": guild_id, "alias": alias},
-        ).fetchone()
+        )
         if not alias:
             return None
 
-        return (alias["oid"], self.by_oid(alias["oid"]))
+        return (alias["oid"], await self.by_oid(alias["oid"]))
 
-    def by_data(self, **kwargs) -> int:
+    def cached_oid(self, key: Identity) -> Optional[int]:
+        "Return the oid for an identity if it's cached, counting the hit or miss."
+        if key in self.oid_cache:
+            self.hits += 1
+            self.oid_cache.move_to_end(key)
+            return self.oid_cache[key]
+
+        self.misses += 1
+        return None
+
+    async def by_data(self, **kwargs) -> Optional[int]:
         """
         Find an object and return its oid or None.
         """
-        obj = self.database.execute(
-            "SELECT * FROM objects WHERE data=json(:data)", {"data": json.dumps(kwargs)}
-        ).fetchone()
+        key = self.identity(kwargs)
+        if oid := self.cached_oid(key):
+            return oid
+
+        obj = await self.database.fetchone(
+            """SELECT oid FROM objects
+            WHERE kind=:kind AND primary_id=:primary_id AND secondary_id=:secondary_id""",
+            {"kind": key[0], "primary_id": key[1], "secondary_id": key[2]},
+            readonly=True,
+        )
         if not obj:
             return None
 
+        # inside a transaction, the row may be rolled back and its oid reused
+        if not self.database.in_transaction:
+            self.remember(obj["oid"], kwargs)
         return obj["oid"]
 
-    def by_oid(self, oid: int) -> dict:
+    async def by_oid(self, oid: int) -> Optional[dict]:
         """
         Find an object's data or None by oid.
         """
-        obj = self.database.execute(
-            "SELECT * FROM objects WHERE oid=:oid", {"oid": oid}
-        ).fetchone()
+        if oid in self.data_cache:
+            self.hits += 1
+            self.data_cache.move_to_end(oid)
+            return self.data_cache[oid]
+
+        self.misses += 1
+        obj = await self.database.fetchone(
+            "SELECT * FROM objects WHERE oid=:oid", {"oid": oid}, readonly=True
+        )
         if not obj:
             return None
 
-        return json.loads(obj["data"])
+        data = self.data_from_row(obj)
+        # inside a transaction, the row may be rolled back and its oid reused
+        if not self.database.in_transaction:
+            self.remember(oid, data)
+        return data
 
-    def make_object(self, **kwargs) -> int:
+    async def make_object(self, **kwargs) -> int:
         """
         INSERT OR IGNORE an object and return its oid.
         """
-        old = self.by_data(**kwargs)
-        if old:
-            return old
+        key = self.identity(kwargs)
+        if oid := self.cached_oid(key):
+            return oid
 
-        cursor = self.database.execute(
-            "INSERT INTO objects(data) VALUES(json(:data))",
-            {"data": json.dumps(kwargs)},
-        )
-        return cursor.lastrowid
+        # the no-op update makes RETURNING yield the existing row's oid on conflict
+        oid = (
+            await self.database.fetchall(
+                """INSERT INTO objects(kind, primary_id, secondary_id)
+                VALUES(:kind, :primary_id, :secondary_id)
+                ON CONFLICT(kind, primary_id, secondary_id) DO UPDATE SET kind=excluded.kind
+                RETURNING oid""",
+                {"kind": key[0], "primary_id": key[1], "secondary_id": key[2]},
+            )
+        )[0]["oid"]
+
+        # if this happens inside a transaction, it may still get rolled back and the oid reused
+        if not self.database.in_transaction:
+            self.remember(oid, kwargs)
+
+        return oid
@@ -11,7 +11,7 @@ from .cogs.alias import (
     find_aliased_channel_id,
     find_aliased_message_id,
 )
-from .customizations import Blimp, cid_mid_to_message, maybe
+from .customizations import Blimp, cid_mid_to_message, maybe, maybe_async
 
 
 class CanceledError(RuntimeError):
@@ -64,7 +64,7 @@ class ProgressII:
         EMOJI = auto()
         ROLE = auto()
 
-        def parse(  # pylint: disable=too-many-return-statements, too-many-branches
+        async def parse(  # pylint: disable=too-many-return-statements, too-many-branches
             self, ctx: Blimp.Context, text: str
         ) -> Any:
             "Return a meaningful object parsed from `text` based on self's kind or None."
@@ -86,8 +86,8 @@ class ProgressII:
                 return None
 
             if self == self.CATEGORY:
-                aliased_cat = maybe(
-                    lambda: find_aliased_category_id(ctx, text), commands.BadArgument
+                aliased_cat = await maybe_async(
+                    find_aliased_category_id(ctx, text), commands.BadArgument
                 )
                 if aliased_cat:
                     return ctx.bot.get_channel(aliased_cat)
@@ -98,8 +98,8 @@ class ProgressII:
                 )
 
             if self == self.CHANNEL:
-                aliased_channel = maybe(
-                    lambda: find_aliased_channel_id(ctx, text), commands.BadArgument
+                aliased_channel = await maybe_async(
+                    find_aliased_channel_id(ctx, text), commands.BadArgument
                 )
                 if aliased_channel:
                     return ctx.bot.get_channel(aliased_cat)
@@ -110,8 +110,8 @@ class ProgressII:
                 )
 
             if self == self.MESSAGE:
-                aliased_message = maybe(
-                    lambda: find_aliased_message_id(ctx, text), commands.BadArgument
+                aliased_message = await maybe_async(
+                    find_aliased_message_id(ctx, text), commands.BadArgument
                 )
                 if aliased_message:
                     return aliased_message
@@ -199,16 +199,16 @@ class ProgressII:
         "Accept a value from the user. Raises CanceledError if user cancels or input times out."
 
         def predicate(msg: discord.Message):
-            if not (msg.channel == self.ctx.channel and msg.author == self.ctx.author):
-                return False
+            return msg.channel == self.ctx.channel and msg.author == self.ctx.author
 
+        async def acceptable(msg: discord.Message):
             if msg.content == f"cancel{self.ctx.bot.suffix}":
                 return True
 
             if default is not None and msg.content == f"ok{self.ctx.bot.suffix}":
                 return True
 
-            return kind.parse(self.ctx, msg.content) is not None
+            return await kind.parse(self.ctx, msg.content) is not None
 
         if default and kind == self.InputKindOption.BOOL:
             default = bool(default)
@@ -227,11 +227,14 @@ class ProgressII:
         await self.update()
 
         try:
-            message = await self.ctx.bot.wait_for(
-                "message",
-                check=predicate,
-                timeout=300.0,
-            )
+            # parsing may need the database, so it can't happen inside the wait_for predicate
+            message = None
+            while not message or not await acceptable(message):
+                message = await self.ctx.bot.wait_for(
+                    "message",
+                    check=predicate,
+                    timeout=300.0,
+                )
 
             self.input_messages.append(message)
 
@@ -243,10 +246,10 @@ class ProgressII:
                 await self.update()
                 raise CanceledError()
 
-            parsed = kind.parse(self.ctx, message.content)
+            parsed = await kind.parse(self.ctx, message.content)
 
             if default is not None and message.content == f"ok{self.ctx.bot.suffix}":
-                parsed = kind.parse(self.ctx, display(default))
+                parsed = await kind.parse(self.ctx, display(default))
 
             self.edit_last_field(f"✅ {name}", display(parsed), True)
 
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import discord
+
+ReactionHandler = Callable[[discord.RawReactionActionEvent], Awaitable[None]]
+
+
+class ReactionRouter:
+    """
+    Single entry point for raw reaction events. Cogs register handlers under a kind ("kiosk",
+    "trigger", ...) and tell the router which messages, or which guilds as a whole, that kind is
+    interested in. Each reaction is only handed to the kinds watching its message or guild, so
+    the vast majority of reactions cost a dictionary lookup and nothing else.
+
+    The index lives in memory only: cogs fill it from the database when they're loaded and keep it
+    up to date wherever they write the underlying tables.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.log = bot.log.getChild("ReactionRouter")
+
+        self.handlers: Dict[str, Dict[str, ReactionHandler]] = {}
+        self.messages: Dict[int, Set[str]] = {}
+        self.guilds: Dict[int, Set[str]] = {}
+
+        bot.add_listener(self.on_raw_reaction_add)
+        bot.add_listener(self.on_raw_reaction_remove)
+
+    def register(
+        self,
+        kind: str,
+        on_add: Optional[ReactionHandler] = None,
+        on_remove: Optional[ReactionHandler] = None,
+    ):
+        "Set the handlers for reactions being added to or removed from what a kind watches."
+        self.handlers[kind] = {"add": on_add, "remove": on_remove}
+
+    def unregister(self, kind: str):
+        "Remove a kind's handlers and forget everything it watches."
+        self.handlers.pop(kind, None)
+        for index in (self.messages, self.guilds):
+            for key in [key for key, kinds in index.items() if kind in kinds]:
+                self.forget(index, kind, key)
+
+    @staticmethod
+    def forget(index: Dict[int, Set[str]], kind: str, key: int):
+        "Remove a kind from an index entry, and the entry if no kind is left."
+        kinds = index.get(key)
+        if kinds is None:
+            return
+
+        kinds.discard(kind)
+        if not kinds:
+            del index[key]
+
+    def watch(self, kind: str, *message_ids: int):
+        "Route reactions on these messages to a kind."
+        for message_id in message_ids:
+            self.messages.setdefault(message_id, set()).add(kind)
+
+    def unwatch(self, kind: str, message_id: int):
+        "Stop routing reactions on a message to a kind."
+        self.forget(self.messages, kind, message_id)
+
+    def watching(self, kind: str, message_id: int) -> bool:
+        "Return if a kind watches a message."
+        return kind in self.messages.get(message_id, ())
+
+    def watch_guild(self, kind: str, guild_id: int):
+        "Route reactions on any message in a guild to a kind."
+        self.guilds.setdefault(guild_id, set()).add(kind)
+
+    def unwatch_guild(self, kind: str, guild_id: int):
+        "Stop routing reactions in a guild to a kind, except for messages it watches."
+        self.forget(self.guilds, kind, guild_id)
+
+    async def dispatch(self, event: str, payload: discord.RawReactionActionEvent):
+        "Hand a reaction to the handlers of all kinds watching its message or guild."
+        kinds = self.messages.get(payload.message_id)
+        if payload.guild_id in self.guilds:
+            kinds = (kinds or set()) | self.guilds[payload.guild_id]
+        if not kinds:
+            return
+
+        handlers = [
+            (kind, handler)
+            for kind in kinds
+            if (handler := self.handlers.get(kind, {}).get(event))
+        ]
+        # like separate listeners, one failing handler doesn't keep the others from running
+        results = await asyncio.gather(
+            *(handler(payload) for _, handler in handlers), return_exceptions=True
+        )
+        for (kind, _), result in zip(handlers, results):
+            if isinstance(result, Exception):
+                self.log.error(
+                    f"Reaction handler for {kind} failed on {payload.message_id}",
+                    exc_info=result,
+                )
+
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        "Route an added reaction."
+        await self.dispatch("add", payload)
+
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        "Route a removed reaction."
+        await self.dispatch("remove", payload)
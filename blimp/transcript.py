@@ -1,8 +1,14 @@
+import asyncio
 import html
 import io
+import json
 import re
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from datetime import datetime, timedelta, timezone
 from string import Template
-from typing import List, Optional
+from types import SimpleNamespace
+from typing import IO, Dict, List, Optional, Set, Tuple
 
 import discord
 
@@ -14,31 +20,301 @@ def shrink(string):
     return re.sub(r"\n\s*", "", string)
 
 
-class Transcript:
-    "Create a transcript of a channel."
+class TranscriptSummary:
+    "Statistics on a transcript, collected while it's being written."
 
-    @staticmethod
-    def fancify_content(content):
-        "Faithfully recreate discord's markup in HTML. absolutely disgusting"
-        content = html.escape(content)
+    def __init__(self):
+        self.count = 0
+        self.parts: List[IO[bytes]] = []
+        self.participants: Set[discord.abc.User] = set()
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
 
-        def emojify(match):
-            return (
-                f"<img src='https://cdn.discordapp.com/emojis/{match[3]}"
-                + (".gif" if match[1] == "a" else ".png")
-                + f"' class='emoji' title='{match[2]}'>"
+    def add(self, message: discord.Message):
+        "Account for one more message."
+        self.count += 1
+        self.participants.add(message.author)
+        if not self.first_timestamp:
+            self.first_timestamp = clean_timestamp(message)
+        self.last_timestamp = clean_timestamp(message)
+
+
+class TranscriptAssets:
+    """Images used in one transcript part. Each avatar or emoji is defined once as a CSS class
+    with a short name and referred to by that class name afterwards."""
+
+    def __init__(self):
+        self.classes: Dict[str, str] = {}
+        self.pending: List[str] = []
+
+    def css_class(self, prefix: str, url: str) -> str:
+        "Return the class name showing url as background image, defining it if necessary."
+        if url not in self.classes:
+            self.classes[url] = f"{prefix}{len(self.classes):x}"
+            self.pending.append(
+                f".{self.classes[url]}{{background-image:url('{html.escape(url)}')}}"
             )
 
-        content = re.sub(r"&lt;(a?):(\w+):(\d+)&gt;", emojify, content)
+        return self.classes[url]
+
+    def avatar(self, user: discord.abc.User) -> str:
+        "Return the class name for a user's avatar."
+        return self.css_class("a", user.display_avatar.url)
+
+    def emoji(self, emoji_id: str, animated: bool) -> str:
+        "Return the class name for a custom emoji."
+        return self.css_class(
+            "e",
+            f"https://cdn.discordapp.com/emojis/{emoji_id}"
+            + (".gif" if animated else ".png"),
+        )
+
+    def take_styles(self) -> str:
+        "Return a style block with all classes defined since the last call, if any."
+        if not self.pending:
+            return ""
+
+        styles = "<style>" + "".join(self.pending) + "</style>"
+        self.pending.clear()
+        return styles
+
+
+class JournalMessage:
+    """A message read back from a journal, with everything the transcript needs from it. Each
+    revision of a message is stored as the output of dump(), a deletion as None."""
+
+    class Author:
+        "The author of a journaled message as they were when it was sent."
+
+        def __init__(self, user_id: int, tag: str, name: str, avatar_url: str):
+            self.id = user_id
+            self.tag = tag
+            self.display_name = name
+            self.display_avatar = SimpleNamespace(url=avatar_url)
+
+        def __str__(self):
+            return self.tag
+
+        def __eq__(self, other):
+            return isinstance(other, JournalMessage.Author) and self.id == other.id
+
+        def __hash__(self):
+            return hash(self.id)
+
+        @property
+        def mention(self) -> str:
+            "Return a mention of the author."
+            return f"<@{self.id}>"
+
+    class Attachment:
+        "An attachment of a journaled message."
+
+        def __init__(self, url: str, filename: str):
+            self.url = url
+            self.filename = filename
+
+    def __init__(self, message_id: int, revisions: List[Tuple[int, Optional[str]]]):
+        self.id = message_id
+        self.created_at = discord.utils.snowflake_time(message_id)
+        self.edited_at: Optional[datetime] = None
+        self.deleted_at: Optional[datetime] = None
+
+        contents = [(timestamp, data) for timestamp, data in revisions if data]
+        if revisions[-1][1] is None:
+            self.deleted_at = datetime.fromtimestamp(revisions[-1][0], tz=timezone.utc)
+        if len(contents) > 1:
+            self.edited_at = datetime.fromtimestamp(contents[-1][0], tz=timezone.utc)
+
+        data = json.loads(contents[-1][1])
+        self.author = self.Author(*data["a"])
+        self.clean_content = data.get("c", "")
+        self.attachments = [self.Attachment(*a) for a in data.get("f", [])]
+        self.embeds = [discord.Embed.from_dict(e) for e in data.get("e", [])]
+        self.revisions = [json.loads(c).get("c", "") for _, c in contents[:-1]]
+
+    @staticmethod
+    def dump(message: discord.Message) -> str:
+        "Serialize the parts of a message that end up in a transcript as compact JSON."
+        data = {
+            "a": [
+                message.author.id,
+                str(message.author),
+                message.author.display_name,
+                message.author.display_avatar.url,
+            ]
+        }
+        if message.clean_content:
+            data["c"] = message.clean_content
+        if message.attachments:
+            data["f"] = [[a.url, a.filename] for a in message.attachments]
+        if embeds := [e.to_dict() for e in message.embeds if e.type == "rich"]:
+            data["e"] = embeds
+
+        return json.dumps(data, separators=(",", ":"))
+
+
+class Transcript:
+    """Create a transcript of a channel.
+
+    Transcripts are split into numbered parts that each stay below a size limit, so channels of
+    any length can be uploaded. Every part links to the ones before and after it.
+
+    To keep files small, avatars and emoji are defined once per part by TranscriptAssets, and
+    consecutive messages by the same author are grouped under one header like Discord does.
+    """
+
+    # every token in one pattern, so the text between them is skipped without returning to Python.
+    # The lookahead lists the characters a token can start with, which lets the regex engine jump
+    # from one candidate to the next instead of trying every alternative at every position.
+    MARKDOWN = re.compile(
+        r"""
+        (?=[`<\[\\>*_~|\nh])
+        # a single _ between letters or digits is snake_case, not italic
+        (?:(?P<marker>\*{1,3}|__|~~|\|\||_(?<![^\W_]_)|_(?![^\W_]))
+        |(?P<newline>\n)
+        |(?P<codeblock>```(?:[\w+-]+\n)?(?P<code>.+?)```)
+        |(?P<inline>`(?P<inlinecode>[^`]++)`)
+        |(?P<emoji><(?P<animated>a?):(?P<emojiname>\w++):(?P<emojiid>\d++)>)
+        |(?P<masked>\[(?P<linktext>[^\[\]\n]++)\]\((?P<linkurl>https?://[^\s)]++)\))
+        |(?P<url>https?://[^\s<]*[^\s<.,:;"')\]])
+        |(?P<escape>\\(?P<escaped>[*_~|`>\\\[\]]))
+        # quotes only count at the start of a line
+        |^(?P<blockquote>>>>\ )
+        |^(?P<quote>>\ ))
+        """,
+        re.DOTALL | re.VERBOSE | re.MULTILINE,
+    )
+
+    MARKDOWN_TAGS = {
+        "**": ("<b>", "</b>"),
+        "*": ("<i>", "</i>"),
+        "_": ("<i>", "</i>"),
+        "__": ("<u>", "</u>"),
+        "~~": ("<del>", "</del>"),
+        "||": ("<span class='spoiler'>", "</span>"),
+    }
+
+    @classmethod
+    def fancify_content(
+        cls, content: str, assets: Optional[TranscriptAssets] = None
+    ) -> str:
+        """Faithfully recreate discord's markup in HTML, in a single pass over the content.
+
+        MARKDOWN finds one token after the other, whatever lies between them is escaped as one
+        piece.
 
-        content = re.sub(r"```(.+)```", r"<pre>\1</pre>", content, flags=re.DOTALL)
-        # advanced[tm] markdown processing
-        content = content.replace("\n", "<br>")
-        content = re.sub(r"\*\*([^\*]+)\*\*", r"<b>\1</b>", content)
-        content = re.sub(r"\*([^\*]+)\*", r"<i>\1</i>", content)
-        content = re.sub(r"~~([^~]+)~~", r"<del>\1</del>", content)
-        content = re.sub(r"`([^`]+)`", r"<code>\1</code>", content)
-        return content
+        Markers are written out literally at first and remembered on a stack. Once the matching
+        closing marker comes along, the opening one is swapped for its tag, and markers opened in
+        between stay literal. Quotes are on the stack too, so markers can't span their borders.
+        A quote ends with the last of the consecutive lines starting with "> ".
+
+        >>> Transcript.fancify_content("> *one\\n> two*\\nthree")
+        '<blockquote><i>one<br>two</i></blockquote>three'
+
+        With `assets`, custom emoji refer to their CSS class instead of repeating the image URL.
+        """
+
+        out = []
+        stack = []
+        text_start = 0
+        tags = cls.MARKDOWN_TAGS
+
+        def toggle(marker):
+            # most markers close the one opened right before them, so check that first
+            if stack and stack[-1][0] == marker:
+                out[stack.pop()[1]], closing = tags[marker]
+                out.append(closing)
+                return
+
+            for position in range(len(stack) - 1, -1, -1):
+                opened = stack[position][0]
+                if opened == marker:
+                    opening, closing = tags[marker]
+                    out[stack[position][1]] = opening
+                    out.append(closing)
+                    del stack[position:]
+                    return
+                if opened in ("quote", "blockquote"):
+                    break
+
+            # no marker character needs escaping
+            stack.append((marker, len(out)))
+            out.append(marker)
+
+        def open_position(marker):
+            for position in range(len(stack) - 1, -1, -1):
+                if stack[position][0] == marker:
+                    return position
+            return -1
+
+        escape = html.escape
+
+        for match in cls.MARKDOWN.finditer(content):
+            index = match.start()
+            if index > text_start:
+                out.append(escape(content[text_start:index]))
+            text_start = match.end()
+
+            kind = match.lastgroup
+            if kind == "marker":
+                marker = match[0]
+                if marker != "***":
+                    toggle(marker)
+                # close whichever of bold and italic was opened last first
+                elif open_position("*") > open_position("**"):
+                    toggle("*")
+                    toggle("**")
+                else:
+                    toggle("**")
+                    toggle("*")
+            elif kind == "newline":
+                quote = open_position("quote")
+                # consecutive quoted lines make up one quote, like in the client
+                if quote < 0 or content.startswith("> ", text_start):
+                    out.append("<br>")
+                else:
+                    del stack[quote:]
+                    out.append("</blockquote>")
+            elif kind == "codeblock":
+                out.append(f"<pre>{escape(match['code'])}</pre>")
+            elif kind == "inline":
+                out.append(f"<code>{escape(match['inlinecode'])}</code>")
+            elif kind == "emoji" and assets:
+                out.append(
+                    f"<i class='emoji {assets.emoji(match['emojiid'], match['animated'])}' "
+                    f"title='{match['emojiname']}'></i>"
+                )
+            elif kind == "emoji":
+                out.append(
+                    f"<img src='https://cdn.discordapp.com/emojis/{match['emojiid']}"
+                    + (".gif" if match["animated"] else ".png")
+                    + f"' class='emoji' title='{match['emojiname']}'>"
+                )
+            elif kind == "masked":
+                out.append(
+                    f"<a href='{escape(match['linkurl'])}'>{escape(match['linktext'])}</a>"
+                )
+            elif kind == "url":
+                url = escape(match["url"])
+                out.append(f"<a href='{url}'>{url}</a>")
+            elif kind == "escape":
+                out.append(escape(match["escaped"]))
+            elif kind == "quote" and open_position("quote") >= 0:
+                # the next line of a quote that's still open
+                continue
+            else:
+                stack.append((kind, len(out)))
+                out.append("<blockquote>")
+
+        if text_start < len(content):
+            out.append(html.escape(content[text_start:]))
+
+        out.extend(
+            "</blockquote>"
+            for kind, _ in reversed(stack)
+            if kind in ("quote", "blockquote")
+        )
+        return "".join(out)
 
     TRANSCRIPT_HEADER = Template(
         shrink(
@@ -84,10 +360,28 @@ class Transcript:
                     .message-container .metadata .id-anchor:hover {
                         text-decoration: underline;
                     }
-                    .message-container img.avatar {
+                    .message-container .avatar {
                         grid-column: 1;
                         width: 3rem;
+                        height: 3rem;
                         border-radius: 50%;
+                        background-size: cover;
+                    }
+                    .message-container.continued {
+                        margin-top: -.8rem;
+                        grid-template-rows: auto;
+                        min-height: 0;
+                    }
+                    .message-container.continued .id-anchor {
+                        grid-column: 1;
+                        color: transparent;
+                        font-size: .7rem;
+                        text-align: right;
+                        text-decoration: none;
+                        line-height: 1.3rem;
+                    }
+                    .message-container.continued:hover .id-anchor {
+                        color: #72767d;
                     }
                     .message-container .content {
                         max-width: 75ch;
@@ -109,6 +403,14 @@ class Transcript:
                         height: 1.3rem;
                         vertical-align: middle;
                     }
+                    .content i.emoji {
+                        display: inline-block;
+                        width: 1.3rem;
+                        height: 1.3rem;
+                        background-size: contain;
+                        background-repeat: no-repeat;
+                        vertical-align: middle;
+                    }
                     .content img.emoji.emoji-big {
                         height: 2.6rem;
                     }
@@ -128,6 +430,32 @@ class Transcript:
                         margin: 0.3rem;
                         padding: 0;
                     }
+                    nav a {
+                        color: #00b0f4;
+                    }
+                    .content blockquote {
+                        margin: 0;
+                        padding-left: .6rem;
+                        border-left: 4px solid #4f545c;
+                    }
+                    .content .remark {
+                        color: #72767d;
+                        font-size: .7rem;
+                        margin-left: .3rem;
+                    }
+                    .content details.revisions {
+                        color: #72767d;
+                        font-size: .8rem;
+                    }
+                    .spoiler {
+                        background: #202225;
+                        color: transparent;
+                        border-radius: .2rem;
+                    }
+                    .spoiler:hover {
+                        background: #2f3136;
+                        color: inherit;
+                    }
                 </style>
             </head>
             <body>
@@ -141,7 +469,7 @@ class Transcript:
         shrink(
             """
             <div class="message-container" id="$messageid">
-                <img class="avatar" src="$authoravatar">
+                <div class="avatar $avatarclass"></div>
                 <div class="metadata">
                     <span class="author" title="$authortag">$authornick </span>
                     <span class="timestamp">$timestamp </span>
@@ -153,12 +481,37 @@ class Transcript:
         )
     )
 
-    TRUNCATED_WARNING = "<h2>Transcript truncated at 5000 messages.</h2>"
+    TRANSCRIPT_CONTINUATION = Template(
+        shrink(
+            """
+            <div class="message-container continued" id="$messageid">
+                <a href="#$messageid" class="id-anchor" title="$timestamp">$time</a>
+                <div class="content">$content</div>
+            </div>
+            """
+        )
+    )
+
+    # how far apart consecutive messages by the same author may be to still be grouped
+    GROUPING_WINDOW = timedelta(minutes=7)
+
+    NAVIGATION = Template('<nav><a href="$href">$text</a></nav>')
 
     TRANSCRIPT_FOOTER = "</section></body></html>"
 
+    # bytes kept free in every part for the navigation, footer and summary that close it
+    PART_RESERVE = 4096
+
+    # messages per REST request, how finely a parallel fetch splits the channel per worker, and
+    # how many pages each slice may fetch before the previous ones have been read
+    HISTORY_PAGE_SIZE = 100
+    HISTORY_SLICES_PER_WORKER = 8
+    HISTORY_BUFFER_PAGES = 10
+
     @classmethod
-    def write_embed(cls, embed: discord.Embed) -> str:
+    def write_embed(
+        cls, embed: discord.Embed, assets: Optional[TranscriptAssets] = None
+    ) -> str:
         "Render an embed to HTML. TODO more than bare minimum of effort"
 
         result = "<div class='embed' "
@@ -176,25 +529,195 @@ class Transcript:
             result += "</h3>"
 
         if embed.description:
-            result += f"<p>{cls.fancify_content(embed.description)}</p>"
+            result += f"<p>{cls.fancify_content(embed.description, assets)}</p>"
 
         result += "</div>"
         return result
 
     @classmethod
-    async def write_transcript(
+    def write_message(
+        cls, message: discord.Message, assets: TranscriptAssets, continued: bool
+    ) -> str:
+        """Render a message to HTML, preceded by the definitions of any new assets it uses. If
+        `continued`, the author header is left out as the message belongs to the group above.
+        """
+
+        content = (
+            cls.fancify_content(message.clean_content, assets)
+            + "\n".join(
+                [
+                    f"<img src='{a.url}' class='attachment' title='{a.filename}'>"
+                    for a in message.attachments
+                ]
+            )
+            + "\n".join(
+                [cls.write_embed(e, assets) for e in message.embeds if e.type == "rich"]
+            )
+        )
+
+        # only journaled messages remember earlier versions and their deletion
+        if revisions := getattr(message, "revisions", None):
+            content += (
+                "<details class='revisions'><summary>earlier versions</summary>"
+                + "".join(
+                    f"<p>{cls.fancify_content(revision, assets)}</p>"
+                    for revision in revisions
+                )
+                + "</details>"
+            )
+        if message.edited_at:
+            content += (
+                f"<span class='remark' title='{message.edited_at.replace(microsecond=0)}'>"
+                + "(edited)</span>"
+            )
+        if deleted_at := getattr(message, "deleted_at", None):
+            content += f"<span class='remark' title='{deleted_at}'>(deleted)</span>"
+        timestamp = clean_timestamp(message)
+
+        if continued:
+            item = cls.TRANSCRIPT_CONTINUATION.substitute(
+                messageid=message.id,
+                timestamp=timestamp,
+                time=timestamp.strftime("%H:%M"),
+                content=content,
+            )
+        else:
+            item = cls.TRANSCRIPT_ITEM.substitute(
+                messageid=message.id,
+                authortag=html.escape(str(message.author)),
+                authornick=html.escape(message.author.display_name),
+                avatarclass=assets.avatar(message.author),
+                timestamp=timestamp,
+                content=content,
+            )
+
+        return assets.take_styles() + item
+
+    @staticmethod
+    def part_filename(channel, number: int, total: int) -> str:
+        "Return the file name a part of a transcript should be uploaded as."
+        if total == 1:
+            return f"{channel.name}.html"
+
+        return f"{channel.name}-{number}.html"
+
+    @classmethod
+    async def history(  # pylint: disable=too-many-arguments
+        cls,
+        channel,
+        after: Optional[discord.abc.Snowflake] = None,
+        before: Optional[discord.abc.Snowflake] = None,
+        concurrency: int = 1,
+        pages_per_second: Optional[float] = None,
+    ) -> AsyncIterator[discord.Message]:
+        """Iterate over the messages of a channel between after and before (both exclusive),
+        oldest first. With a concurrency above 1, the range of snowflakes is cut into
+        HISTORY_SLICES_PER_WORKER time slices per worker. The slice being read and the next
+        concurrency - 1 ones are fetched at the same time, each buffering up to
+        HISTORY_BUFFER_PAGES pages, so memory use is bounded by the concurrency and not the length
+        of the channel. pages_per_second caps the requests made by all slices together.
+        """
+
+        if concurrency <= 1 and not pages_per_second:
+            async for message in channel.history(
+                oldest_first=True, limit=None, after=after, before=before
+            ):
+                yield message
+            return
+
+        concurrency = max(1, concurrency)
+        # nothing in a channel is older than the channel itself, but a thread's first message
+        # can share its id
+        lower = after.id if after else channel.id - 1
+        upper = (
+            before.id
+            if before
+            else discord.utils.time_snowflake(datetime.now(timezone.utc), high=True) + 1
+        )
+        slices = concurrency * cls.HISTORY_SLICES_PER_WORKER
+        # slice n covers the ids in (bounds[n], bounds[n + 1]]
+        bounds = [lower + (upper - 1 - lower) * n // slices for n in range(slices + 1)]
+
+        interval = 1 / pages_per_second if pages_per_second else 0
+        next_page = time.monotonic()
+
+        async def pace():
+            nonlocal next_page
+            now = time.monotonic()
+            wait = next_page - now
+            next_page = max(next_page, now) + interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        async def fetch(number: int, queue: asyncio.Queue):
+            try:
+                cursor = discord.Object(bounds[number])
+                end = discord.Object(bounds[number + 1] + 1)
+                while True:
+                    await pace()
+                    page = [
+                        message
+                        async for message in channel.history(
+                            oldest_first=True,
+                            limit=cls.HISTORY_PAGE_SIZE,
+                            after=cursor,
+                            before=end,
+                        )
+                    ]
+                    await queue.put(page)
+                    if len(page) < cls.HISTORY_PAGE_SIZE:
+                        break
+                    cursor = page[-1]
+            except Exception as ex:  # pylint: disable=broad-except
+                await queue.put(ex)
+
+        def start(number: int):
+            queue = asyncio.Queue(cls.HISTORY_BUFFER_PAGES)
+            return queue, asyncio.create_task(fetch(number, queue))
+
+        window = [start(number) for number in range(min(concurrency, slices))]
+        # the slice being read is no longer in the window, but has to be stopped all the same
+        current = None
+        try:
+            for number in range(slices):
+                queue, current = window.pop(0)
+                if number + len(window) + 1 < slices:
+                    window.append(start(number + len(window) + 1))
+
+                while True:
+                    page = await queue.get()
+                    if isinstance(page, Exception):
+                        raise page
+                    for message in page:
+                        yield message
+                    if len(page) < cls.HISTORY_PAGE_SIZE:
+                        break
+                await current
+        finally:
+            if current:
+                current.cancel()
+            for _, task in window:
+                task.cancel()
+
+    @classmethod
+    async def write_transcript(  # pylint: disable=too-many-arguments
         cls,
-        file,
+        open_part: Callable[[], IO[bytes]],
         channel,
         first_message_id: Optional[int] = None,
         last_message_id: Optional[int] = None,
-    ) -> List[discord.Message]:
-        "Write a transcript of the channel into file and return a list of all messages processed."
-
-        # write the message transcript into memory first, after we have processed all messages,
-        # write a header based on the information gathered to the actual file and only then flush
-        # the messages into there
-        memory = io.StringIO()
+        max_size: Optional[int] = None,
+        concurrency: int = 1,
+        pages_per_second: Optional[float] = None,
+        messages: Optional[AsyncIterable[discord.Message]] = None,
+    ) -> TranscriptSummary:
+        """Write a transcript of the channel into as many files from open_part() as needed to keep
+        each below max_size bytes, and return a summary of the messages processed. Messages are
+        written out as they come in and aren't kept around, so memory use doesn't depend on the
+        length of the channel. As the statistics are only known at the end, they're appended to
+        the last part in a trailing comment. `concurrency` and `pages_per_second` are passed on to
+        history(). If `messages` is given, they are transcribed instead of the channel's history,
+        e.g. JournalMessages from a ticket journal."""
 
         # because channel.history() bounds args are exclusive, expand the bounds very slightly
         # to make them inclusive
@@ -204,63 +727,172 @@ class Transcript:
         if last_message_id:
             last_message_id = discord.Object(last_message_id + 1)
 
-        all_messages = []
-        count = 0
-        was_truncated = False
-
-        async for message in channel.history(
-            oldest_first=True,
-            limit=5001,
-            after=first_message_id,
-            before=last_message_id,
-        ):
-            count += 1
-            if count == 5001:
-                memory.write(cls.TRUNCATED_WARNING)
-                was_truncated = True
-                break
-
-            all_messages.append(message)
-            memory.write(
-                cls.TRANSCRIPT_ITEM.substitute(
-                    messageid=message.id,
-                    authortag=str(message.author),
-                    authornick=message.author.display_name,
-                    authoravatar=message.author.avatar,
-                    timestamp=clean_timestamp(message),
-                    content=cls.fancify_content(message.clean_content)
-                    + "\n".join(
-                        [
-                            f"<img src='{a.url}' class='attachment' title='{a.filename}'>"
-                            for a in message.attachments
-                        ]
-                    )
-                    + "\n".join(
-                        [cls.write_embed(e) for e in message.embeds if e.type == "rich"]
-                    ),
+        summary = TranscriptSummary()
+        part = None
+        part_size = 0
+        part_messages = 0
+        assets = None
+        previous = None
+
+        def start_part():
+            nonlocal part, part_size, part_messages, assets
+            part = open_part()
+            assets = TranscriptAssets()
+            summary.parts.append(part)
+            number = len(summary.parts)
+
+            header = cls.TRANSCRIPT_HEADER.substitute(
+                channelname=channel.name,
+                headline=f"#{channel.name} on {channel.guild.name}"
+                + (f", part {number}" if number > 1 else ""),
+            )
+            if number > 1:
+                header += cls.NAVIGATION.substitute(
+                    href=f"{channel.name}-{number - 1}.html", text="← previous part"
                 )
+
+            part_size = part.write(header.encode())
+            part_messages = 0
+
+        def comment(text: str) -> bytes:
+            return (
+                "\n\n<!--\n"
+                + f"  BLIMP Transcript of #{channel.name} ({channel.id}) "
+                + f"from {getattr(first_message_id, 'id', 'start')} "
+                + f"to {getattr(last_message_id, 'id', 'end')}\n"
+                + f"  {text}"
+                + "\n-->\n"
+            ).encode()
+
+        if messages is None:
+            messages = cls.history(
+                channel,
+                after=first_message_id,
+                before=last_message_id,
+                concurrency=concurrency,
+                pages_per_second=pages_per_second,
             )
 
-        participants = {message.author for message in all_messages}
-
-        file.write(
-            "<!--\n"
-            + f"  BLIMP Transcript of #{channel.name} ({channel.id}) "
-            + f"from {getattr(first_message_id, 'id', 'start')} "
-            + f"to {getattr(last_message_id, 'id', 'end')}\n"
-            + f"  {count - 1} messages "
-            + ("(truncated) " if was_truncated else "")
-            + f"by {len(participants)} users "
-            + f"from {clean_timestamp(all_messages[0])} to {clean_timestamp(all_messages[-1])}"
-            + "\n-->\n\n"
+        async for message in messages:
+            summary.add(message)
+            if not part:
+                start_part()
+
+            continued = bool(
+                part_messages
+                and previous.author.id == message.author.id
+                and message.created_at - previous.created_at < cls.GROUPING_WINDOW
+            )
+            previous = message
+            item = cls.write_message(message, assets, continued).encode()
+
+            # a part always gets at least one message, even if that alone is too big
+            if (
+                max_size
+                and part_messages
+                and part_size + len(item) + cls.PART_RESERVE > max_size
+            ):
+                number = len(summary.parts)
+                part.write(
+                    cls.NAVIGATION.substitute(
+                        href=f"{channel.name}-{number + 1}.html", text="next part →"
+                    ).encode()
+                )
+                part.write(cls.TRANSCRIPT_FOOTER.encode())
+                part.write(comment(f"part {number}"))
+
+                # the new part doesn't know about the assets of the old one
+                start_part()
+                item = cls.write_message(message, assets, False).encode()
+
+            part_size += part.write(item)
+            part_messages += 1
+
+        if not part:
+            start_part()
+
+        part.write(cls.TRANSCRIPT_FOOTER.encode())
+        part.write(
+            comment(
+                (f"part {len(summary.parts)}, " if len(summary.parts) > 1 else "")
+                + f"{summary.count} messages "
+                + f"by {len(summary.participants)} users "
+                + f"from {summary.first_timestamp} to {summary.last_timestamp}"
+            )
         )
-        file.write(
-            cls.TRANSCRIPT_HEADER.substitute(
-                channelname=channel.name,
-                headline=f"#{channel.name} on {channel.guild.name}",
+
+        return summary
+
+    @staticmethod
+    def read_parts(summary: TranscriptSummary) -> List[bytes]:
+        """Read all parts of a transcript into memory, so they can be uploaded to several targets
+        at the same time."""
+        buffers = []
+        for part in summary.parts:
+            part.seek(0)
+            buffers.append(part.read())
+
+        return buffers
+
+    @classmethod
+    async def send(
+        cls,
+        target: discord.abc.Messageable,
+        channel,
+        summary: TranscriptSummary,
+        buffers: Optional[List[bytes]] = None,
+        **kwargs,
+    ):
+        """Upload all parts of a transcript to target, one message per part. kwargs are passed
+        along with the first part. The parts are streamed from their files, unless they have
+        already been read with read_parts() and are passed as buffers."""
+
+        if buffers is None:
+            files = summary.parts
+            for part in files:
+                part.seek(0)
+        else:
+            # initializing BytesIO with bytes doesn't copy them
+            files = [io.BytesIO(buffer) for buffer in buffers]
+
+        for number, file in enumerate(files, start=1):
+            await target.send(
+                **(kwargs if number == 1 else {}),
+                file=discord.File(
+                    fp=file,
+                    filename=cls.part_filename(channel, number, len(files)),
+                ),
             )
+
+    @classmethod
+    async def fan_out(  # pylint: disable=too-many-arguments
+        cls,
+        targets: List[discord.abc.Messageable],
+        channel,
+        summary: TranscriptSummary,
+        concurrency: int = 4,
+        **kwargs,
+    ) -> Dict[discord.abc.Messageable, Exception]:
+        """Upload a transcript to all targets, up to `concurrency` of them at a time, and return
+        the targets it couldn't be sent to along with why. Concurrent uploads can't share the
+        part files, so if more than one runs at a time the parts are read into memory once and
+        the same buffers are used for every upload."""
+
+        concurrency = max(1, concurrency)
+        buffers = (
+            cls.read_parts(summary) if min(len(targets), concurrency) > 1 else None
         )
-        file.write(memory.getvalue())
-        file.write(cls.TRANSCRIPT_FOOTER)
+        semaphore = asyncio.Semaphore(concurrency)
 
-        return all_messages
+        async def send_to(target):
+            async with semaphore:
+                await cls.send(target, channel, summary, buffers=buffers, **kwargs)
+
+        results = await asyncio.gather(
+            *(send_to(target) for target in targets), return_exceptions=True
+        )
+        return {
+            target: result
+            for target, result in zip(targets, results)
+            if isinstance(result, Exception)
+        }
@@ -0,0 +1,21 @@
+-- schema update 2026-10-17
+-- store object identities as typed integer columns under a composite unique index instead of
+-- JSON text, so looking up or creating objects doesn't need any JSON work
+
+CREATE TABLE new_objects (
+    oid INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    primary_id INTEGER NOT NULL,
+    secondary_id INTEGER NOT NULL DEFAULT 0
+);
+INSERT INTO new_objects(oid, kind, primary_id, secondary_id)
+SELECT
+    objects.oid,
+    entry.key,
+    CASE entry.type WHEN 'array' THEN json_extract(entry.value, '$[0]') ELSE entry.value END,
+    CASE entry.type WHEN 'array' THEN json_extract(entry.value, '$[1]') ELSE 0 END
+FROM objects, json_each(objects.data) AS entry;
+DROP TABLE objects;
+ALTER TABLE new_objects RENAME TO objects;
+
+CREATE UNIQUE INDEX objects_identity ON objects(kind, primary_id, secondary_id);
@@ -0,0 +1,19 @@
+-- schema update 2026-10-17
+-- store slowmode timestamps as integer unix epochs with an index over them, so expired entries
+-- can be found and pruned without parsing every row
+
+CREATE TABLE new_slowmode_entries (
+    channel_oid INTEGER NOT NULL,
+    user_oid INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    FOREIGN KEY (channel_oid) REFERENCES objects(oid),
+    FOREIGN KEY (user_oid) REFERENCES objects(oid),
+    PRIMARY KEY (channel_oid, user_oid)
+);
+INSERT INTO new_slowmode_entries(channel_oid, user_oid, timestamp)
+SELECT channel_oid, user_oid, CAST(strftime('%s', timestamp) AS INTEGER)
+FROM slowmode_entries;
+DROP TABLE slowmode_entries;
+ALTER TABLE new_slowmode_entries RENAME TO slowmode_entries;
+
+CREATE INDEX slowmode_entries_expiry ON slowmode_entries(channel_oid, timestamp);
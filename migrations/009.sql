@@ -0,0 +1,19 @@
+-- schema update 2026-10-17
+-- store reminder due times as indexed integer unix epochs, so the scheduler can cheaply ask for
+-- the next reminders instead of comparing date strings across the whole table
+
+CREATE TABLE new_reminders_entries (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    message_oid INTEGER NOT NULL,
+    due INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    FOREIGN KEY (message_oid) REFERENCES objects(oid)
+);
+INSERT INTO new_reminders_entries(id, user_id, message_oid, due, text)
+SELECT id, user_id, message_oid, CAST(strftime('%s', due) AS INTEGER), text
+FROM reminders_entries;
+DROP TABLE reminders_entries;
+ALTER TABLE new_reminders_entries RENAME TO reminders_entries;
+
+CREATE INDEX reminders_entries_due ON reminders_entries(due);
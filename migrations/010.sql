@@ -0,0 +1,18 @@
+-- schema update 2026-10-17
+-- optionally journal ticket messages as they are sent, edited and deleted, so a transcript can be
+-- rendered locally when the ticket is closed. Categories opt in, and tickets remember whether
+-- they were journaled from the start. Every revision of a message is a row, deletions have no data
+
+ALTER TABLE ticket_categories ADD COLUMN journal BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE ticket_entries ADD COLUMN journal BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE TABLE ticket_journal (
+    channel_oid INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    revision INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    data STRING,
+
+    FOREIGN KEY (channel_oid) REFERENCES objects(oid),
+    PRIMARY KEY (channel_oid, message_id, revision)
+) WITHOUT ROWID;
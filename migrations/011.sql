@@ -0,0 +1,16 @@
+-- schema update 2026-10-17
+-- persistent queue for background jobs, so long-running work like archiving tickets happens
+-- outside of command handlers and survives restarts
+
+CREATE TABLE jobs (
+    id INTEGER PRIMARY KEY,
+    kind STRING NOT NULL,
+    payload STRING NOT NULL,
+    guild_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before INTEGER NOT NULL,
+    claimed BOOLEAN NOT NULL DEFAULT FALSE,
+    error STRING
+);
+
+CREATE INDEX jobs_due ON jobs(claimed, not_before);
@@ -0,0 +1,4 @@
+-- schema update 2026-10-17
+-- kiosks can offer their roles in select menus instead of as reactions
+
+ALTER TABLE rolekiosk_entries ADD COLUMN menu BOOLEAN NOT NULL DEFAULT FALSE;